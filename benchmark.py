@@ -0,0 +1,161 @@
+import ast
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+import types
+
+import click
+import simpy
+
+import coexistanceSimpy.Coexistence as coexistence
+import coexistanceSimpy.simulation_runner as simulation_runner
+from coexistanceSimpy.Coexistence import *
+from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json, \
+    get_station_list_from_json_lists
+
+FBE_CONFIGS = ["four_stations_no_offset", "four_stations_with_offset"]  # sim_configs folders of the fbe benchmark
+
+
+def timed_sweep(engine, start_node_number, end_node_number, seed, simulation_time):
+    start = time.perf_counter()
+    for node_number in range(start_node_number, end_node_number + 1):
+        simulate(Config(), Config_NR(), node_number, node_number, seed, simulation_time, engine)
+    return time.perf_counter() - start
+
+
+def stripped_coexistence():
+    # Coexistence.py compiled without the `if logger_util.enabled:` blocks, as if the log calls were never written
+    class StripLogging(ast.NodeTransformer):
+        def visit_If(self, node):
+            test = node.test
+            if (isinstance(test, ast.Attribute) and test.attr == "enabled"
+                    and getattr(test.value, "id", None) == "logger_util"):
+                return None
+            return self.generic_visit(node)
+
+        def generic_visit(self, node):
+            super().generic_visit(node)
+            if hasattr(node, "body") and node.body == []:  # block which held only log calls
+                node.body = [ast.Pass()]
+            return node
+
+    path = coexistence.__file__
+    with open(path) as source:
+        tree = ast.fix_missing_locations(StripLogging().visit(ast.parse(source.read(), path)))
+    module = types.ModuleType("coexistanceSimpy.Coexistence_stripped")
+    module.__file__ = path
+    sys.modules[module.__name__] = module  # dataclasses look the module up by name
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
+
+
+def timed_lbe(module, node_number, seed, simulation_time):
+    start = time.perf_counter()
+    module.simulate(module.Config(), module.Config_NR(), node_number, node_number, seed, simulation_time)
+    return time.perf_counter() - start
+
+
+def timed_fbe(module, node_number, seed, simulation_time):
+    # DB-FBE stations have the most log calls per fixed frame period
+    start = time.perf_counter()
+    env = simpy.Environment()
+    channel = module.Channel(None, 0, 0, None, None, None, None, None, simulation_time)
+    for i in range(node_number):
+        station = module.DeterministicBackoffFBE(str(i), module.FBETimers(1000, 900), offset=i * 9)
+        station.set_channel(channel)
+        station.set_environment(env, module.node_stream(seed, station.name))
+    env.run(until=simulation_time)
+    return time.perf_counter() - start
+
+
+def timed_fbe_config(json_path, seed, simulation_time, engine):
+    # all runs of an FBE scenario file, returns the wall time and the number of channel events (transmissions and
+    # collisions) of the runs
+    simulation_params = get_scenario_directly_from_json(json_path)
+    simulation_time = simulation_time or simulation_params.simulation_time
+    stations_list = get_station_list_from_json_lists(seed)
+    events = 0
+    start = time.perf_counter()
+    for run_number in range(simulation_runner.get_total_run_number(stations_list)):
+        stations = simulation_runner.get_stations_for_current_run(stations_list, run_number)
+        channel = simulation_runner.run_stations(stations, simulation_time, seed, engine)
+        events += len(channel.event_dict["time"])
+    return time.perf_counter() - start, events
+
+
+@click.group()
+def benchmark():
+    pass
+
+
+@benchmark.command()
+@click.option("--seed", "seed", default=1, help="Seed for simulation")
+@click.option("--start_node_number", "start_node_number", default=1, help="Starting number of Wi-Fi and NR-U nodes")
+@click.option("--end_node_number", "end_node_number", default=16, help="Ending number of Wi-Fi and NR-U nodes")
+@click.option("-t", "--simulation-time", "simulation_time", default=100.0,
+              help="Duration of the simulation per stations number in s")
+@click.option("--engine", "engines", type=click.Choice(ENGINES), multiple=True, default=ENGINES,
+              help="Engines to compare (can be repeated)")
+def engines(seed: int, start_node_number: int, end_node_number: int, simulation_time: float, engines):
+    # wall time of the changing number of nodes sweep for every engine
+    results = {}
+    for engine in engines:
+        results[engine] = timed_sweep(engine, start_node_number, end_node_number, seed, simulation_time)
+        print(f"{engine}: {results[engine]:.2f} s")
+    if SIMPY_ENGINE in results:
+        for engine, elapsed in results.items():
+            if engine != SIMPY_ENGINE:
+                print(f"{engine} speedup over {SIMPY_ENGINE}: {results[SIMPY_ENGINE] / elapsed:.1f}x")
+
+
+@benchmark.command()
+@click.option("--seed", "seed", default=1, help="Seed for simulation")
+@click.option("-n", "--node_number", "node_number", default=8, help="Number of Wi-Fi and NR-U (or DB-FBE) nodes")
+@click.option("-t", "--simulation-time", "simulation_time", default=20.0,
+              help="Duration of the simulation in s")
+@click.option("-r", "--repeats", "repeats", default=7, help="Runs of every variant, the fastest one is reported")
+def logging(seed: int, node_number: int, simulation_time: float, repeats: int):
+    # logging disabled against the same simulator with the log calls stripped from the source
+    stripped = stripped_coexistence()
+    scenarios = {
+        "LBE": lambda module: timed_lbe(module, node_number, seed, simulation_time),
+        "DB-FBE": lambda module: timed_fbe(module, node_number, seed, int(simulation_time * 1000000)),
+    }
+    for scenario, timed in scenarios.items():
+        results = {"logging off": [], "stripped": []}
+        for _ in range(repeats):  # interleaved so both variants see the same machine load
+            for variant, module in (("logging off", coexistence), ("stripped", stripped)):
+                gc.collect()  # garbage of the previous run is not collected during this one
+                results[variant].append(timed(module))
+        logging_off, without_calls = min(results["logging off"]), min(results["stripped"])
+        print(f"{scenario}: logging off {logging_off:.3f} s, stripped {without_calls:.3f} s, "
+              f"overhead {(logging_off / without_calls - 1) * 100:+.1f}%")
+
+
+@benchmark.command()
+@click.option("--seed", "seed", default=1, help="Seed for simulation")
+@click.option("-t", "--simulation-time", "simulation_time", default=0,
+              help="Duration of every run in us (0 - SIMULATION_TIME of the scenario)")
+@click.option("--engine", "engine", type=click.Choice([SIMPY_ENGINE, HEAP_ENGINE]), default=SIMPY_ENGINE,
+              help="FBE engine")
+@click.option("-r", "--repeats", "repeats", default=3, help="Runs of every scenario, the fastest one is reported")
+def fbe(seed: int, simulation_time: int, engine: str, repeats: int):
+    # channel events per second of the four_stations_* FBE scenarios
+    configs = os.path.join(os.path.dirname(coexistence.__file__), "sim_configs")
+    for folder in FBE_CONFIGS:
+        for file_name in sorted(os.listdir(os.path.join(configs, folder))):
+            timings = []
+            for _ in range(repeats):
+                gc.collect()
+                with contextlib.redirect_stdout(io.StringIO()):  # FBETimers print the corrected COT / CCA
+                    timings.append(timed_fbe_config(os.path.join(configs, folder, file_name), seed, simulation_time,
+                                                    engine))
+            elapsed, events = min(timings)
+            print(f"{folder}/{file_name}: {events} events in {elapsed:.3f} s, {events / elapsed:.0f} events/s")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -12,17 +12,10 @@ def single_run(
         payload_size: int,
         mcs_value: int,
 ):
-    backoffs = {key: {stations_number: 0} for key in range(cw_max + 1)}
-    airtime_data = {"Station {}".format(i): 0 for i in range(1, stations_number + 1)}
-    airtime_control = {"Station {}".format(i): 0 for i in range(1, stations_number + 1)}
-    airtime_data_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
-    airtime_control_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
-    # run_simulation(stations_number, gnb_number, seeds, simulation_time, Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
-    #                backoffs, airtime_data, airtime_control)
+    # run_simulation(stations_number, gnb_number, seeds, simulation_time, Config(payload_size, cw_min, cw_max, r_limit, mcs_value))
     run_simulation(stations_number, gnb_number, seeds, simulation_time,
                    Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
-                   Config_NR(16, 9, 1000, 1000, 0, 3, cw_min, cw_max, 6),
-                   backoffs, airtime_data, airtime_control, airtime_data_NR, airtime_control_NR)
+                   Config_NR(16, 9, 1000, 1000, 0, 3, cw_min, cw_max, 6))
 
 
 if __name__ == "__main__":
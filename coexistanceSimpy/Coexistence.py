@@ -1,33 +1,32 @@
-import csv
-import os
 import random
+from coexistanceSimpy.backoff_countdowns import BackoffCountdowns
+from coexistanceSimpy.backoff_histogram import BackoffHistogram
+from coexistanceSimpy.channel_state import ChannelState, NR, NR_FBE, WIFI
+from coexistanceSimpy.counter_changes import CounterChanges
+from coexistanceSimpy.random_streams import RandomStream, node_stream
+from coexistanceSimpy.result_sink import CsvResultSink, ResultSink
+from coexistanceSimpy import logger_util
 from coexistanceSimpy.logger_util import station_log
 from abc import abstractmethod, ABC
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List
 
+import numpy as np
 import simpy
 
 from coexistanceSimpy.Times import *
 
 output_csv = "output_test.csv"
 
-colors = [
-    "\033[30m",
-    "\033[32m",
-    "\033[31m",
-    "\033[33m",
-    "\033[34m",
-    "\033[35m",
-    "\033[36m",
-    "\033[37m",
-]  # colors to distinguish stations in output
-
-big_num = 100000  # some big number for quesing in peeemtive resources - big starting point
-
 gap = True
 
+SIMPY_ENGINE = "simpy"  # SimPy processes (reference implementation)
+HEAP_ENGINE = "heap"  # explicit state machines on a single heapq calendar, see heap_engine.py
+VECTOR_ENGINE = "vector"  # NumPy arrays of many seeds advanced contention cycle by contention cycle, see vector_engine.py
+ENGINES = [SIMPY_ENGINE, HEAP_ENGINE, VECTOR_ENGINE]
+CHECKPOINT_INTERVAL = 10.0  # simulated time between checkpoints of a run, s
+
 
 class Channel_occupied(Exception):
     pass
@@ -55,6 +54,18 @@ class Config_NR:
     cw_max: int = 63
     mcot: int = 6  # max ocupancy time
 
+    def __post_init__(self):
+        # durations have to be whole clock ticks, already converted values are kept (dataclasses.replace)
+        for name in ["deter_period", "observation_slot_duration", "synchronization_slot_duration",
+                     "max_sync_slot_desync", "min_sync_slot_desync"]:
+            setattr(self, name, to_ticks(getattr(self, name), name))
+        self.transmission_time  # mcot
+
+    @property
+    def transmission_time(self):
+        # MCOT in clock ticks
+        return to_ticks(self.mcot * 1000, "mcot")
+
 
 def random_sample(max, number, min_distance=0):  # func used to desync gNBs
     # returns number * elements <0, max>
@@ -64,6 +75,96 @@ def random_sample(max, number, min_distance=0):  # func used to desync gNBs
     return [sample + (min_distance - 1) * rank for sample, rank in zip(samples, ranks)]
 
 
+class EndOfInstant(simpy.Event):
+    # event processed after all other events scheduled for the current simulation time
+    def __init__(self, env: simpy.Environment):
+        super().__init__(env)
+        self._ok = True
+        self._value = None
+        env.schedule(self, priority=2)  # URGENT = 0 and NORMAL = 1 go first
+
+
+class ChannelArbiter:
+    # collects all nodes starting to transmit at the same time and decides in one step which of them holds the channel
+    # (the one with the longest frame) and whether there was a collision
+    def __init__(self, env: simpy.Environment):
+        self.env = env
+        self.contenders = []  # (transmission time, outcome event) of nodes starting to transmit at this time
+
+    def contend(self, transmission_time):
+        # returned event value: (holds_channel, collision)
+        if not self.contenders:
+            EndOfInstant(self.env).callbacks.append(self.arbitrate)
+        outcome = self.env.event()
+        self.contenders.append((transmission_time, outcome))
+        return outcome
+
+    def arbitrate(self, _):
+        contenders = self.contenders
+        self.contenders = []
+        collision = len(contenders) > 1
+        _, winner = max(contenders, key=lambda contender: contender[0])  # first of the longest frames wins
+        for _, outcome in contenders:
+            outcome.succeed((outcome is winner, collision))
+
+
+class FBEChannelArbiter:
+    # collects the FBE stations starting to transmit at the same time and resolves them in one pass: the CCA / channel
+    # monitoring of the sensing stations is interrupted once, the collision is decided once for the whole group and
+    # the starters share a single outcome event. A transmission which held the channel alone until then is the only
+    # one interrupted by a colliding group, transmissions which already collided are left to end as they are.
+    def __init__(self, env: simpy.Environment):
+        self.env = env
+        self.starters = []  # FBE stations starting to transmit at this time
+        self.outcome = None  # shared event of the starters, value: collision
+        self.holder = None  # FBE station transmitting alone, interrupted when another transmission starts
+
+    def contend(self, station):
+        if not self.starters:
+            EndOfInstant(self.env).callbacks.append(self.resolve)
+            self.outcome = self.env.event()
+        self.starters.append(station)
+        return self.outcome
+
+    def resolve(self, _):
+        starters = self.starters
+        self.starters = []
+        state = starters[0].channel.state
+        for station in state.sensing_nodes():
+            if logger_util.enabled:
+                station_log(station, "CCA interrupted by a transmission start")
+            station.process.interrupt()
+        collision = len(starters) > 1 or state.transmitter_count > len(starters)
+        if collision and self.holder is not None:
+            if logger_util.enabled:
+                station_log(self.holder, "Transmission interrupted by a transmission start")
+            self.holder.process.interrupt()
+            self.holder = None
+        elif not collision:
+            self.holder = starters[0]
+        self.outcome.succeed(collision)
+
+    def end_transmission(self, station):
+        if self.holder is station:
+            self.holder = None
+
+
+class IdleChannelSignal:
+    # single "channel became idle" event shared by all nodes waiting for the idle channel
+    def __init__(self, env: simpy.Environment):
+        self.env = env
+        self.idle = None  # triggered when the current busy period ends, None while the channel is idle
+
+    def busy(self):
+        if self.idle is None:
+            self.idle = self.env.event()
+
+    def release(self):
+        idle = self.idle
+        self.idle = None
+        idle.succeed()
+
+
 class Station:
     def __init__(
             self,
@@ -71,12 +172,13 @@ class Station:
             name: str,
             channel: dataclass,
             config: Config = Config(),
+            rng: RandomStream = None,
     ):
         self.config = config
+        self.rng = rng if rng is not None else node_stream(None, name)  # backoff draws of the station
         self.times = Times(config.data_size, config.mcs)  # using Times script to get time calculations
         self.name = name  # name of the station
         self.env = env  # simpy environment
-        self.col = random.choice(colors)  # color of output -- for future station distinction
         self.frame_to_send = None  # the frame object which is next to send
         self.succeeded_transmissions = 0  # all succeeded transmissions for station
         self.failed_transmissions = 0  # all failed transmissions for station
@@ -88,9 +190,11 @@ class Station:
         self.process = None  # waiting back off process
         self.channel.airtime_data.update({name: 0})
         self.channel.airtime_control.update({name: 0})
-        self.first_interrupt = False
         self.back_off_time = 0
-        self.start = 0
+        self.back_off_waited_event = None
+        self.countdown_index = channel.backoff_countdowns.add_node(self, Times.t_difs, Times.t_slot)
+        self.transmitting = False  # set by the channel state
+        self.frame_stats = add_frame_stats(channel, name)
 
     def start(self):
         while True:
@@ -104,107 +208,69 @@ class Station:
                 # self.process = None
 
     def wait_back_off(self):
-        # global start
         self.back_off_time = self.generate_new_back_off_time(
             self.failed_transmissions_in_row)  # generating the new Back Off time
 
-        while self.back_off_time > -1:
-            try:
-                with self.channel.tx_lock.request() as req:  # waiting  for idle channel -- empty channel
-                    yield req
-                self.back_off_time += Times.t_difs  # add DIFS time
-                station_log(self, f"Starting to wait backoff (with DIFS): ({self.back_off_time})u...")
-                self.first_interrupt = True
-                self.start = self.env.now  # store the current simulation time
-                self.channel.back_off_list.append(self)  # join the list off stations which are waiting Back Offs
-
-                yield self.env.timeout(self.back_off_time)  # join the environment action queue
-
-                station_log(self, f"Backoff waited, sending frame...")
-                self.back_off_time = -1  # leave the loop
-
-                self.channel.back_off_list.remove(self)  # leave the waiting list as Backoff was waited successfully
-
-            except simpy.Interrupt:  # handle the interruptions from transmitting stations
-                if self.first_interrupt and self.start is not None:
-                    # tak jest po mojemu:
-                    station_log(self, "Waiting was interrupted, waiting to resume backoff...")
-                    all_waited = self.env.now - self.start
-                    if all_waited <= Times.t_difs:
-                        self.back_off_time -= Times.t_difs
-                        station_log(self,
-                                    f"Interupted in DIFS ({Times.t_difs}), backoff {self.back_off_time}, already waited: {all_waited}")
-                    else:
-                        back_waited = all_waited - Times.t_difs
-                        slot_waited = int(back_waited / Times.t_slot)
-                        self.back_off_time -= ((slot_waited * Times.t_slot) + Times.t_difs)
-                        station_log(self,
-                                    f"Completed slots(9us) {slot_waited} = {(slot_waited * Times.t_slot)}  plus DIFS time {Times.t_difs}")
-                        station_log(self,
-                                    f"Backoff decresed by {((slot_waited * Times.t_slot) + Times.t_difs)} new Backoff {self.back_off_time}")
-                    self.first_interrupt = False
+        if self.channel.idle_signal.idle is not None:  # waiting  for idle channel -- empty channel
+            yield self.channel.idle_signal.idle
+        if logger_util.enabled:
+            station_log(self, "Starting to wait backoff (with DIFS): (%s)u...", self.back_off_time + Times.t_difs)
+        self.back_off_waited_event = self.env.event()
+        # the channel freezes the countdown while it is busy and resumes it when it is idle again
+        self.channel.backoff_countdowns.count_down(self.countdown_index, self.back_off_time)
+        yield self.back_off_waited_event
+        if logger_util.enabled:
+            station_log(self, "Backoff waited, sending frame...")
+
+    def back_off_waited(self):
+        self.back_off_waited_event.succeed()
 
     def send_frame(self):
-        self.channel.tx_list.append(self)  # add station to currently transmitting list
-        res = self.channel.tx_queue.request(
-            priority=(big_num - self.frame_to_send.frame_time))  # create request basing on this station frame length
+        self.channel.state.start_transmission(self, WIFI)  # add station to currently transmitting stations
+        holds_channel, collision = yield self.channel.arbiter.contend(self.frame_to_send.frame_time)
 
-        try:
-            result = yield res | self.env.timeout(
-                0)  # try to hold transmitting lock(station with the longest frame will get this)
-            if res not in result:  # check if this station got lock, if not just wait you frame time
-                raise simpy.Interrupt("There is a longer frame...")
-
-            with self.channel.tx_lock.request() as lock:  # this station has the longest frame so hold the lock
-                yield lock
-
-                for station in self.channel.back_off_list:  # stop all station which are waiting backoff as channel is not idle
-                    if station.process.is_alive:
-                        station.process.interrupt()
-                for gnb in self.channel.back_off_list_NR:  # stop all station which are waiting backoff as channel is not idle
-                    if gnb.process.is_alive:
-                        gnb.process.interrupt()
-
-                station_log(self, f'Starting sending frame: {self.frame_to_send.frame_time}')
-
-                yield self.env.timeout(self.frame_to_send.frame_time)  # wait this station frame time
-                self.channel.back_off_list.clear()  # channel idle, clear backoff waiting list
-                was_sent = self.check_collision()  # check if collision occurred
-
-                if was_sent:  # transmission successful
-                    self.channel.airtime_control[self.name] += self.times.get_ack_frame_time()
-                    yield self.env.timeout(self.times.get_ack_frame_time())  # wait ack
-                    self.channel.tx_list.clear()  # clear transmitting list
-                    self.channel.tx_list_NR.clear()
-                    self.channel.tx_queue.release(res)  # leave the transmitting queue
-                    return True
-
-                # there was collision
-                self.channel.tx_list.clear()  # clear transmitting list
-                self.channel.tx_list_NR.clear()
-                self.channel.tx_queue.release(res)  # leave the transmitting queue
-                self.channel.tx_queue = simpy.PreemptiveResource(self.env,
-                                                                 capacity=1)  # create new empty transmitting queue
-                yield self.env.timeout(self.times.ack_timeout)  # simulate ack timeout after failed transmission
-                return False
-
-        except simpy.Interrupt:  # this station does not have the longest frame, waiting frame time
-            yield self.env.timeout(self.frame_to_send.frame_time)
-
-        was_sent = self.check_collision()
+        if holds_channel:
+            self.channel.idle_signal.busy()
+            self.channel.backoff_countdowns.freeze()  # channel is not idle, all backoff countdowns stop
+
+            if logger_util.enabled:
+                station_log(self, "Starting sending frame: %s", self.frame_to_send.frame_time)
+
+            yield self.env.timeout(self.frame_to_send.frame_time)  # wait this station frame time
+            was_sent = self.check_collision(collision)
+
+            if was_sent:  # transmission successful
+                self.channel.airtime_control[self.name] += self.times.get_ack_frame_time()
+                yield self.env.timeout(self.times.get_ack_frame_time())  # wait ack
+                self.channel.state.end_all_transmissions(WIFI, NR)  # clear transmitting stations
+                self.channel.backoff_countdowns.resume()  # channel idle again
+                self.channel.idle_signal.release()
+                return True
+
+            # there was collision
+            self.channel.state.end_all_transmissions(WIFI, NR)  # clear transmitting stations
+            yield self.env.timeout(self.times.ack_timeout)  # simulate ack timeout after failed transmission
+            self.channel.backoff_countdowns.resume()  # channel idle again
+            self.channel.idle_signal.release()
+            return False
+
+        # this station does not have the longest frame, waiting frame time
+        yield self.env.timeout(self.frame_to_send.frame_time)
+
+        was_sent = self.check_collision(collision)
 
         if was_sent:  # check if collision occurred
-            station_log(self, f'Waiting for ACK time: {self.times.get_ack_frame_time()}')
+            if logger_util.enabled:
+                station_log(self, "Waiting for ACK time: %s", self.times.get_ack_frame_time())
             yield self.env.timeout(self.times.get_ack_frame_time())  # wait ack
         else:
-            station_log(self, "waiting ack timeout slave")
+            if logger_util.enabled:
+                station_log(self, "waiting ack timeout slave")
             yield self.env.timeout(Times.ack_timeout)  # simulate ack timeout after failed transmission
         return was_sent
 
-    def check_collision(self):  # check if the collision occurred
-
-        if (len(self.channel.tx_list) + len(self.channel.tx_list_NR)) > 1 or (
-                len(self.channel.tx_list) + len(self.channel.tx_list_NR)) == 0:
+    def check_collision(self, collision):  # collision decided by the channel arbiter
+        if collision:
             self.sent_failed()
             return False
         else:
@@ -216,30 +282,40 @@ class Station:
                 self.cw_min + 1) - 1)  # define the upper limit basing on  unsuccessful transmissions in the row
         upper_limit = (
             upper_limit if upper_limit <= self.cw_max else self.cw_max)  # set upper limit to CW Max if is bigger then this parameter
-        back_off = random.randint(0, upper_limit)  # draw the back off value
-        self.channel.backoffs[back_off][self.channel.n_of_stations] += 1  # store drawn value for future analyzes
+        back_off = self.rng.randint(0, upper_limit)  # draw the back off value
+        self.channel.backoffs.add(WIFI, back_off)  # store drawn value for future analyzes
         return back_off * self.times.t_slot
 
     def generate_new_frame(self):
-        # frame_length = self.times.get_ppdu_frame_time()
-        frame_length = 5400
-        return Frame(frame_length, self.name, self.col, self.config.data_size, self.env.now)
+        if self.frame_to_send is None:
+            # frame_length = self.times.get_ppdu_frame_time()
+            frame_length = 5400
+            return Frame(frame_length, self.name, self.config.data_size, self.env.now)
+        self.frame_to_send.reset(self.env.now)  # the same record is reused for every frame of the station
+        return self.frame_to_send
 
     def sent_failed(self):
-        station_log(self, "There was a collision")
+        if logger_util.enabled:
+            station_log(self, "There was a collision")
         self.frame_to_send.number_of_retransmissions += 1
         self.channel.failed_transmissions += 1
         self.failed_transmissions += 1
         self.failed_transmissions_in_row += 1
-        station_log(self, self.channel.failed_transmissions)
+        if logger_util.enabled:
+            station_log(self, "%s", self.channel.failed_transmissions)
         if self.frame_to_send.number_of_retransmissions > self.config.r_limit:
+            if self.frame_stats is not None:
+                self.frame_stats.dropped += 1
             self.frame_to_send = self.generate_new_frame()
             self.failed_transmissions_in_row = 0
 
     def sent_completed(self):
-        station_log(self, f"Successfully sent frame, waiting ack: {self.times.get_ack_frame_time()}")
+        if logger_util.enabled:
+            station_log(self, "Successfully sent frame, waiting ack: %s", self.times.get_ack_frame_time())
         self.frame_to_send.t_end = self.env.now
         self.frame_to_send.t_to_send = (self.frame_to_send.t_end - self.frame_to_send.t_start)
+        if self.frame_stats is not None:
+            self.frame_stats.add(self.frame_to_send.t_to_send, self.frame_to_send.number_of_retransmissions)
         self.channel.succeeded_transmissions += 1
         self.succeeded_transmissions += 1
         self.failed_transmissions_in_row = 0
@@ -256,36 +332,37 @@ class Gnb:
             name: str,
             channel: dataclass,
             config_nr: Config_NR = Config_NR(),
+            rng: RandomStream = None,
     ):
         self.config_nr = config_nr
+        self.rng = rng if rng is not None else node_stream(None, name)  # desync and backoff draws of the gNB
         # self.times = Times(config.data_size, config.mcs)  # using Times script to get time calculations
         self.name = name  # name of the station
         self.env = env  # simpy environment
-        self.col = random.choice(colors)  # color of output -- for future station distinction
         self.transmission_to_send = None  # the transmision object which is next to send
         self.succeeded_transmissions = 0  # all succeeded transmissions for station
         self.failed_transmissions = 0  # all failed transmissions for station
         self.failed_transmissions_in_row = 0  # all failed transmissions for station in a row
         self.cw_min = config_nr.cw_min  # cw min parameter value
         self.N = None  # backoff counter
-        self.desync = 0
-        self.next_sync_slot_boundry = 0
+        self.desync = 0  # first sync slot boundary, drawn when the gNB starts
         self.cw_max = config_nr.cw_max  # cw max parameter value
         self.channel = channel  # channel objfirst_transmission
         env.process(self.start())  # starting simulation process
-        env.process(self.sync_slot_counter())
         self.process = None  # waiting back off process
         self.channel.airtime_data_NR.update({name: 0})
         self.channel.airtime_control_NR.update({name: 0})
         self.desync_done = False
-        self.first_interrupt = False
         self.back_off_time = 0
-        self.time_to_next_sync_slot = 0
-        self.waiting_backoff = False
-        self.start_nr = 0
+        self.back_off_waited_event = None
+        self.transmitting = False  # set by the channel state
+        self.frame_stats = add_frame_stats(channel, name)
+        prioritization_period_time = config_nr.deter_period + config_nr.M * config_nr.observation_slot_duration
+        self.countdown_index = channel.backoff_countdowns.add_node(self, prioritization_period_time,
+                                                                   config_nr.observation_slot_duration)
 
     def start(self):
-
+        self.select_desync()  # boundaries follow from desync, no process is ticking every sync slot
         # yield self.env.timeout(self.desync)
         while True:
             # self.transmission_to_send = self.gen_new_transmission()
@@ -302,229 +379,113 @@ class Gnb:
 
     def wait_back_off_gap(self):
         self.back_off_time = self.generate_new_back_off_time(self.failed_transmissions_in_row)
-        # adding pp to the backoff timer
-        m = self.config_nr.M
-        prioritization_period_time = self.config_nr.deter_period + m * self.config_nr.observation_slot_duration
-        self.back_off_time += prioritization_period_time  # add Priritization Period time to bacoff procedure
-
-        while self.back_off_time > -1:
-            try:
-                with self.channel.tx_lock.request() as req:  # waiting  for idle channel -- empty channel
-                    yield req
-
-                self.time_to_next_sync_slot = self.next_sync_slot_boundry - self.env.now
-
-                station_log(self,
-                            f'Backoff = {self.back_off_time} , and time to next slot: {self.time_to_next_sync_slot}')
-                while self.back_off_time >= self.time_to_next_sync_slot:
-                    self.time_to_next_sync_slot += self.config_nr.synchronization_slot_duration
-                    station_log(self,
-                                f'Backoff > time to sync slot: new time to next possible sync +1000 = {self.time_to_next_sync_slot}')
-
-                gap_time = self.time_to_next_sync_slot - self.back_off_time
-                station_log(self, f"Waiting gap period of : {gap_time} us")
-                assert gap_time >= 0, "Gap period is < 0!!!"
 
-                yield self.env.timeout(gap_time)
-                station_log(self, f"Finished gap period")
+        if self.channel.idle_signal.idle is not None:  # waiting  for idle channel -- empty channel
+            yield self.channel.idle_signal.idle
 
-                self.first_interrupt = True
-
-                self.start_nr = self.env.now  # store the current simulation time
-
-                station_log(self, f'Channels in use by {self.channel.tx_lock.count} stations')
-
-                # checking if channel if idle
-                if (len(self.channel.tx_list_NR) + len(self.channel.tx_list)) > 0:
-                    station_log(self, 'Channel busy -- waiting to be free')
-                    with self.channel.tx_lock.request() as req:
-                        yield req
-                    station_log(self, 'Finished waiting for free channel - restarting backoff procedure')
-
-                else:
-                    station_log(self, 'Channel free')
-                    station_log(self, f"Starting to wait backoff: ({self.back_off_time}) us...")
-                    self.channel.back_off_list_NR.append(self)  # join the list off stations which are waiting Back Offs
-                    self.waiting_backoff = True
-
-                    yield self.env.timeout(self.back_off_time)  # join the environment action queue
-
-                    station_log(self, f"Backoff waited, sending frame...")
-                    self.back_off_time = -1  # leave the loop
-                    self.waiting_backoff = False
-
-                    self.channel.back_off_list_NR.remove(
-                        self)  # leave the waiting list as Backoff was waited successfully
-
-            except simpy.Interrupt:  # handle the interruptions from transmitting stations
-                station_log(self, "Waiting was interrupted")
-                if self.first_interrupt and self.start is not None and self.waiting_backoff is True:
-                    station_log(self, "Backoff was interrupted, waiting to resume backoff...")
-                    already_waited = self.env.now - self.start_nr
-
-                    if already_waited <= prioritization_period_time:
-                        self.back_off_time -= prioritization_period_time
-                        station_log(self,
-                                    f"Interrupted in PP time {prioritization_period_time}, backoff {self.back_off_time}")
-                    else:
-                        slots_waited = int(
-                            (already_waited - prioritization_period_time) / self.config_nr.observation_slot_duration)
-                        # self.back_off_time -= already_waited  # set the Back Off to the remaining one
-                        self.back_off_time -= ((
-                                                       slots_waited * self.config_nr.observation_slot_duration) + prioritization_period_time)
-                        station_log(self,
-                                    f"Completed slots(9us) {slots_waited} = {(slots_waited * self.config_nr.observation_slot_duration)}  plus PP time {prioritization_period_time}")
-                        station_log(self,
-                                    f"Backoff decresed by {(slots_waited * self.config_nr.observation_slot_duration) + prioritization_period_time} new Backoff {self.back_off_time}")
-
-                    # log(self, f"already waited {already_waited} Backoff us, new Backoff {self.back_off_time}")
-                    self.back_off_time += prioritization_period_time  # addnin new PP before next weiting
-                    self.first_interrupt = False
-                    self.waiting_backoff = False
+        # the channel adds the gap so the backoff with PP ends on a sync slot boundary, freezes the countdown while
+        # it is busy and computes the gap again when it is idle
+        if logger_util.enabled:
+            station_log(self, "Starting to wait backoff (with PP and gap): (%s) us...", self.back_off_time)
+        self.back_off_waited_event = self.env.event()
+        self.channel.backoff_countdowns.count_down(self.countdown_index, self.back_off_time)
+        yield self.back_off_waited_event
+        if logger_util.enabled:
+            station_log(self, "Backoff waited, sending frame...")
 
     def wait_back_off(self):
         # Wait random number of slots N x OBSERVATION_SLOT_DURATION us
-        global start
         self.back_off_time = self.generate_new_back_off_time(self.failed_transmissions_in_row)
-        m = self.config_nr.M
-        prioritization_period_time = self.config_nr.deter_period + m * self.config_nr.observation_slot_duration
-
-        while self.back_off_time > -1:
-
-            try:
-                with self.channel.tx_lock.request() as req:  # waiting  for idle channel -- empty channel
-                    yield req
-
-                self.first_interrupt = True
-                self.back_off_time += prioritization_period_time  # add Priritization Period time to bacoff procedure
-                station_log(self, f"Starting to wait backoff (with PP): ({self.back_off_time}) us...")
-                start = self.env.now  # store the current simulation time
-                self.channel.back_off_list_NR.append(self)  # join the list off stations which are waiting Back Offs
 
-                yield self.env.timeout(self.back_off_time)  # join the environment action queue
+        if self.channel.idle_signal.idle is not None:  # waiting  for idle channel -- empty channel
+            yield self.channel.idle_signal.idle
 
-                station_log(self, f"Backoff waited, sending frame...")
-                self.back_off_time = -1  # leave the loop
+        if logger_util.enabled:
+            station_log(self, "Starting to wait backoff (with PP): (%s) us...", self.back_off_time)
+        self.back_off_waited_event = self.env.event()
+        self.channel.backoff_countdowns.count_down(self.countdown_index, self.back_off_time)
+        yield self.back_off_waited_event
+        if logger_util.enabled:
+            station_log(self, "Backoff waited, sending frame...")
 
-                self.channel.back_off_list_NR.remove(self)  # leave the waiting list as Backoff was waited successfully
+    def back_off_waited(self):
+        self.back_off_waited_event.succeed()
 
-            except simpy.Interrupt:  # handle the interruptions from transmitting stations
-                station_log(self, "Backoff was interrupted, waiting to resume backoff...")
-                if self.first_interrupt and start is not None:
-                    already_waited = self.env.now - start
+    def select_desync(self):
+        self.desync = self.rng.randint(self.config_nr.min_sync_slot_desync, self.config_nr.max_sync_slot_desync)
+        if gap:
+            self.channel.backoff_countdowns.align(self.countdown_index, self.desync,
+                                                  self.config_nr.synchronization_slot_duration)
+        if logger_util.enabled:
+            station_log(self, "Selected random desync to %s us", self.desync)
 
-                    if already_waited <= prioritization_period_time:
-                        self.back_off_time -= prioritization_period_time
-                        station_log(self,
-                                    f"Interrupted in PP time {prioritization_period_time}, backoff {self.back_off_time}")
-                    else:
-                        slots_waited = int(
-                            (already_waited - prioritization_period_time) / self.config_nr.observation_slot_duration)
-                        # self.back_off_time -= already_waited  # set the Back Off to the remaining one
-                        self.back_off_time -= ((
-                                                       slots_waited * self.config_nr.observation_slot_duration) + prioritization_period_time)
-                        station_log(self,
-                                    f"Completed slots(9us) {slots_waited} = {(slots_waited * self.config_nr.observation_slot_duration)}  plus PP time {prioritization_period_time}")
-                        station_log(self,
-                                    f"Backoff decresed by {(slots_waited * self.config_nr.observation_slot_duration) + prioritization_period_time} new Backoff {self.back_off_time}")
-
-                    self.first_interrupt = False
-                    self.waiting_backoff = False
-
-    def sync_slot_counter(self):
-        # Process responsible for keeping the next sync slot boundry timestamp
-        self.desync = random.randint(self.config_nr.min_sync_slot_desync, self.config_nr.max_sync_slot_desync)
-        self.next_sync_slot_boundry = self.desync
-        station_log(self, f"Selected random desync to {self.desync} us")
-        yield self.env.timeout(self.desync)  # waiting randomly chosen desync time
-        while True:
-            self.next_sync_slot_boundry += self.config_nr.synchronization_slot_duration
-            station_log(self, f"Next synch slot boundry is: {self.next_sync_slot_boundry}")
-            yield self.env.timeout(self.config_nr.synchronization_slot_duration)
+    def next_sync_slot_boundary(self):
+        # sync slot boundaries are at desync + k * synchronization_slot_duration
+        now = self.env.now
+        if now < self.desync:
+            return self.desync
+        sync_slot = self.config_nr.synchronization_slot_duration
+        return self.desync + ((now - self.desync) // sync_slot + 1) * sync_slot
 
     def send_transmission(self):
-        self.channel.tx_list_NR.append(self)  # add station to currently transmitting list
+        self.channel.state.start_transmission(self, NR)  # add station to currently transmitting stations
         self.transmission_to_send = self.gen_new_transmission()
-        res = self.channel.tx_queue.request(priority=(
-                big_num - self.transmission_to_send.transmission_time))  # create request basing on this station frame length
+        holds_channel, collision = yield self.channel.arbiter.contend(self.transmission_to_send.transmission_time)
 
-        try:
-            result = yield res | self.env.timeout(
-                0)  # try to hold transmitting lock(station with the longest frame will get this)
-
-            if res not in result:  # check if this station got lock, if not just wait you frame time
-                raise simpy.Interrupt("There is a longer frame...")
-
-            with self.channel.tx_lock.request() as lock:  # this station has the longest frame so hold the lock
-                yield lock
-
-                for station in self.channel.back_off_list:  # stop all station which are waiting backoff as channel is not idle
-                    if station.process.is_alive:
-                        station.process.interrupt()
-                for gnb in self.channel.back_off_list_NR:  # stop all station which are waiting backoff as channel is not idle
-                    if gnb.process.is_alive:
-                        gnb.process.interrupt()
-
-                station_log(self, f'Transmission will be for: {self.transmission_to_send.transmission_time} time')
+        if holds_channel:
+            self.channel.idle_signal.busy()
+            self.channel.backoff_countdowns.freeze()  # channel is not idle, all backoff countdowns stop
 
-                yield self.env.timeout(self.transmission_to_send.transmission_time)
+            if logger_util.enabled:
+                station_log(self, "Transmission will be for: %s time", self.transmission_to_send.transmission_time)
 
-                self.channel.back_off_list_NR.clear()  # channel idle, clear backoff waiting list
-                was_sent = self.check_collision()  # check if collision occurred
+            yield self.env.timeout(self.transmission_to_send.transmission_time)
 
-                if was_sent:  # transmission successful
-                    self.channel.airtime_control_NR[self.name] += self.transmission_to_send.rs_time
-                    station_log(self, f"adding rs time to control data: {self.transmission_to_send.rs_time}")
-                    self.channel.airtime_data_NR[self.name] += self.transmission_to_send.airtime
-                    station_log(self, f"adding data airtime to data: {self.transmission_to_send.airtime}")
-                    self.channel.tx_list_NR.clear()  # clear transmitting list
-                    self.channel.tx_list.clear()
-                    self.channel.tx_queue.release(res)  # leave the transmitting queue
-                    return True
+            was_sent = self.check_collision(collision)
+
+            if was_sent:  # transmission successful
+                self.channel.airtime_control_NR[self.name] += self.transmission_to_send.rs_time
+                if logger_util.enabled:
+                    station_log(self, "adding rs time to control data: %s", self.transmission_to_send.rs_time)
+                self.channel.airtime_data_NR[self.name] += self.transmission_to_send.airtime
+                if logger_util.enabled:
+                    station_log(self, "adding data airtime to data: %s", self.transmission_to_send.airtime)
+                self.channel.state.end_all_transmissions(WIFI, NR)  # clear transmitting stations
+                self.channel.backoff_countdowns.resume()  # channel idle again
+                self.channel.idle_signal.release()
+                return True
 
             # there was collision
-            self.channel.tx_list_NR.clear()  # clear transmitting list
-            self.channel.tx_list.clear()
-            self.channel.tx_queue.release(res)  # leave the transmitting queue
-            self.channel.tx_queue = simpy.PreemptiveResource(self.env,
-                                                             capacity=1)  # create new empty transmitting queue
-            # yield self.env.timeout(self.times.ack_timeout)
+            self.channel.state.end_all_transmissions(WIFI, NR)  # clear transmitting stations
+            self.channel.backoff_countdowns.resume()  # channel idle again
+            self.channel.idle_signal.release()
             return False
 
-        except simpy.Interrupt:  # this station does not have the longest frame, waiting frame time
-            yield self.env.timeout(self.transmission_to_send.transmission_time)
+        # this station does not have the longest frame, waiting frame time
+        yield self.env.timeout(self.transmission_to_send.transmission_time)
 
-        was_sent = self.check_collision()
+        was_sent = self.check_collision(collision)
         return was_sent
 
-    def check_collision(self):  # check if the collision occurred
-
-        if gap:
-            # if (len(self.channel.tx_list) + len(self.channel.tx_list_NR)) > 1 and self.waiting_backoff is True:
-            if (len(self.channel.tx_list) + len(self.channel.tx_list_NR)) > 1 or (
-                    len(self.channel.tx_list) + len(self.channel.tx_list_NR)) == 0:
-                self.sent_failed()
-                return False
-            else:
-                self.sent_completed()
-                return True
+    def check_collision(self, collision):  # collision decided by the channel arbiter
+        if collision:
+            self.sent_failed()
+            return False
         else:
-            if (len(self.channel.tx_list) + len(self.channel.tx_list_NR)) > 1 or (
-                    len(self.channel.tx_list) + len(self.channel.tx_list_NR)) == 0:
-                self.sent_failed()
-                return False
-            else:
-                self.sent_completed()
-                return True
+            self.sent_completed()
+            return True
 
     def gen_new_transmission(self):
-        transmission_time = self.config_nr.mcot * 1000  # transforming to usec
+        transmission_time = self.config_nr.transmission_time
         if gap:
             rs_time = 0
         else:
-            rs_time = self.next_sync_slot_boundry - self.env.now
+            rs_time = self.next_sync_slot_boundary() - self.env.now
         airtime = transmission_time - rs_time
-        return Transmission_NR(transmission_time, self.name, self.col, self.env.now, airtime, rs_time)
+        if self.transmission_to_send is None:
+            return Transmission_NR(transmission_time, self.name, self.env.now, airtime, rs_time)
+        self.transmission_to_send.reset(self.env.now, airtime, rs_time)  # reused for every transmission of the gNB
+        return self.transmission_to_send
 
     def generate_new_back_off_time(self, failed_transmissions_in_row):
         # BACKOFF TIME GENERATION
@@ -532,220 +493,422 @@ class Gnb:
                 self.cw_min + 1) - 1)  # define the upper limit basing on  unsuccessful transmissions in the row
         upper_limit = (
             upper_limit if upper_limit <= self.cw_max else self.cw_max)  # set upper limit to CW Max if is bigger then this parameter
-        back_off = random.randint(0, upper_limit)  # draw the back off value
-        self.channel.backoffs[back_off][self.channel.n_of_stations] += 1  # store drawn value for future analyzes
+        back_off = self.rng.randint(0, upper_limit)  # draw the back off value
+        self.channel.backoffs.add(NR, back_off)  # store drawn value for future analyzes
         return back_off * self.config_nr.observation_slot_duration
 
     def sent_failed(self):
-        station_log(self, "There was a collision")
+        if logger_util.enabled:
+            station_log(self, "There was a collision")
         self.transmission_to_send.number_of_retransmissions += 1
         self.channel.failed_transmissions_NR += 1
         self.failed_transmissions += 1
         self.failed_transmissions_in_row += 1
-        station_log(self, self.channel.failed_transmissions_NR)
+        if logger_util.enabled:
+            station_log(self, "%s", self.channel.failed_transmissions_NR)
         if self.transmission_to_send.number_of_retransmissions > 7:
             self.failed_transmissions_in_row = 0
 
     def sent_completed(self):
-        station_log(self, f"Successfully sent transmission")
+        if logger_util.enabled:
+            station_log(self, "Successfully sent transmission")
         self.transmission_to_send.t_end = self.env.now
         self.transmission_to_send.t_to_send = (self.transmission_to_send.t_end - self.transmission_to_send.t_start)
+        if self.frame_stats is not None:
+            self.frame_stats.add(self.transmission_to_send.t_to_send,
+                                 self.transmission_to_send.number_of_retransmissions)
         self.channel.succeeded_transmissions_NR += 1
         self.succeeded_transmissions += 1
         self.failed_transmissions_in_row = 0
         return True
 
 
-@dataclass()
 class Frame:
-    frame_time: int  # time of the frame
-    station_name: str  # name of the owning it station
-    col: str  # output color
-    data_size: int  # payload size
-    t_start: int  # generation time
-    number_of_retransmissions: int = 0  # retransmissions count
-    t_end: int = None  # sent time
-    t_to_send: int = None  # how much time it took to sent successfully
+    # frame record reused by its station for every new frame
+    __slots__ = ("frame_time", "station_name", "data_size", "t_start", "number_of_retransmissions", "t_end",
+                 "t_to_send")
+
+    def __init__(self, frame_time: int, station_name: str, data_size: int, t_start: int):
+        self.frame_time = frame_time  # time of the frame
+        self.station_name = station_name  # name of the owning it station
+        self.data_size = data_size  # payload size
+        self.reset(t_start)
+
+    def reset(self, t_start: int):
+        self.t_start = t_start  # generation time
+        self.number_of_retransmissions = 0  # retransmissions count
+        self.t_end = None  # sent time
+        self.t_to_send = None  # how much time it took to sent successfully
 
     def __repr__(self):
-        return (self.col + "Frame: start=%d, end=%d, frame_time=%d, retransmissions=%d"
+        return ("Frame: start=%d, end=%d, frame_time=%d, retransmissions=%d"
                 % (self.t_start, self.t_end, self.t_to_send, self.number_of_retransmissions)
                 )
 
 
-@dataclass()
 class Transmission_NR:
-    transmission_time: int
-    enb_name: str  # name of the owning it station
-    col: str
-    t_start: int  # generation time / transmision start (including RS)
-    airtime: int  # time spent on sending data
-    rs_time: int  # time spent on sending reservation signal before data
-    number_of_retransmissions: int = 0
-    t_end: int = None  # sent time / transsmision end = start + rs_time + airtime
-    t_to_send: int = None
-    collided: bool = False  # true if transmission colided with another one
+    # transmission record reused by its gNB for every new transmission
+    __slots__ = ("transmission_time", "enb_name", "t_start", "airtime", "rs_time", "number_of_retransmissions", "t_end",
+                 "t_to_send", "collided")
+
+    def __init__(self, transmission_time: int, enb_name: str, t_start: int, airtime: int, rs_time: int):
+        self.transmission_time = transmission_time
+        self.enb_name = enb_name  # name of the owning it station
+        self.reset(t_start, airtime, rs_time)
+
+    def reset(self, t_start: int, airtime: int, rs_time: int):
+        self.t_start = t_start  # generation time / transmision start (including RS)
+        self.airtime = airtime  # time spent on sending data
+        self.rs_time = rs_time  # time spent on sending reservation signal before data
+        self.number_of_retransmissions = 0
+        self.t_end = None  # sent time / transsmision end = start + rs_time + airtime
+        self.t_to_send = None
+        self.collided = False  # true if transmission colided with another one
+
+
+class FrameStats:
+    # aggregated statistics of the frames of one node, kept instead of the frame records (opt-in)
+    __slots__ = ("delivered", "dropped", "delay_sum", "max_delay", "retransmissions_sum")
+
+    def __init__(self):
+        self.delivered = 0
+        self.dropped = 0  # dropped after exceeding the retry limit
+        self.delay_sum = 0  # from the frame generation to the end of its successful transmission, us
+        self.max_delay = 0
+        self.retransmissions_sum = 0
+
+    def add(self, delay: int, retransmissions: int):
+        self.delivered += 1
+        self.delay_sum += delay
+        self.max_delay = max(self.max_delay, delay)
+        self.retransmissions_sum += retransmissions
+
+    def merge(self, other: "FrameStats"):
+        self.delivered += other.delivered
+        self.dropped += other.dropped
+        self.delay_sum += other.delay_sum
+        self.max_delay = max(self.max_delay, other.max_delay)
+        self.retransmissions_sum += other.retransmissions_sum
 
+    def __repr__(self):
+        delivered = max(self.delivered, 1)
+        return (f"delivered: {self.delivered} dropped: {self.dropped} mean delay: {self.delay_sum / delivered:.1f} us "
+                f"max delay: {self.max_delay} us mean retransmissions: {self.retransmissions_sum / delivered:.3f}")
 
-def run_simulation(
+
+def add_frame_stats(channel, name):
+    # FrameStats of the node if they are collected in this simulation
+    if channel.frame_stats is None:
+        return None
+    channel.frame_stats[name] = FrameStats()
+    return channel.frame_stats[name]
+
+
+def merged_frame_stats(frame_stats: Dict[str, FrameStats], prefix: str):
+    merged = FrameStats()
+    for name, node_stats in frame_stats.items():
+        if name.startswith(prefix):
+            merged.merge(node_stats)
+    return merged
+
+
+def schedule_simpy_callback(env):
+    # schedule(delay, callback) of BackoffCountdowns on the SimPy environment
+    def schedule(delay, callback):
+        env.timeout(delay).callbacks.append(callback)
+
+    return schedule
+
+
+def run_simpy_engine(
         number_of_stations: int,
         number_of_gnb: int,
         seed: int,
         simulation_time: int,
         config: Config,
         configNr: Config_NR,
-        backoffs: Dict[int, Dict[int, int]],
-        airtime_data: Dict[str, int],
-        airtime_control: Dict[str, int],
-        airtime_data_NR: Dict[str, int],
-        airtime_control_NR: Dict[str, int],
+        channel: "Channel",
 ):
-    random.seed(seed)
+    # simulation_time in us, returns the stations and gNBs, every node draws from its own stream of the seed
     environment = simpy.Environment()
-    channel = Channel(
-        simpy.PreemptiveResource(environment, capacity=1),
-        simpy.Resource(environment, capacity=1),
-        number_of_stations,
-        number_of_gnb,
-        backoffs,
-        airtime_data,
-        airtime_control,
-        airtime_data_NR,
-        airtime_control_NR
-    )
-    # config_nr = Config_NR()
-    # config_wifi = Config()
+    channel.arbiter = ChannelArbiter(environment)
+    channel.backoff_countdowns = BackoffCountdowns(environment, schedule_simpy_callback(environment))
+    channel.idle_signal = IdleChannelSignal(environment)
 
+    stations = []
     for i in range(1, number_of_stations + 1):
-        Station(environment, "Station {}".format(i), channel, config)
-
+        name = "Station {}".format(i)
+        stations.append(Station(environment, name, channel, config, node_stream(seed, name)))
+    gnbs = []
     for i in range(1, number_of_gnb + 1):
-        # Gnb(environment, "Gnb {}".format(i), channel, config_nr)
-        Gnb(environment, "Gnb {}".format(i), channel, configNr)
+        name = "Gnb {}".format(i)
+        gnbs.append(Gnb(environment, name, channel, configNr, node_stream(seed, name)))
 
-    # environment.run(until=simulation_time * 1000000) 10^6 milisekundy
-    environment.run(until=simulation_time * 1000000)
+    environment.run(until=simulation_time)
+    return stations, gnbs
 
-    if number_of_stations != 0:
-        if (channel.failed_transmissions + channel.succeeded_transmissions) != 0:
-            p_coll = "{:.4f}".format(
-                channel.failed_transmissions / (channel.failed_transmissions + channel.succeeded_transmissions))
-        else:
-            p_coll = 0
-    else:
-        p_coll = 0
 
-    if number_of_gnb != 0:
-        if (channel.failed_transmissions_NR + channel.succeeded_transmissions_NR) != 0:
-            p_coll_NR = "{:.4f}".format(
-                channel.failed_transmissions_NR / (
-                        channel.failed_transmissions_NR + channel.succeeded_transmissions_NR))
-        else:
-            p_coll_NR = 0
-    else:
-        p_coll_NR = 0
-
-    # DETAILED OUTPUTS:
-
-    # print(
-    #     f"SEED = {seed} N_stations:={number_of_stations}  CW_MIN = {config.cw_min} CW_MAX = {config.cw_max}  PCOLL: {p_coll} THR:"
-    #     f" {(channel.bytes_sent * 8) / (simulation_time * 100000)} "
-    #     f"FAILED_TRANSMISSIONS: {channel.failed_transmissions}"
-    #     f" SUCCEEDED_TRANSMISSION {channel.succeeded_transmissions}"
-    # )
-
-    # print('stats for GNB ------------------')
-    #
-    # print(
-    #     f"SEED = {seed} N_gnbs={number_of_gnb} CW_MIN = {config_nr.cw_min} CW_MAX = {config_nr.cw_max}  PCOLL: {p_coll_NR} "
-    #     f"FAILED_TRANSMISSIONS: {channel.failed_transmissions_NR}"
-    #     f" SUCCEEDED_TRANSMISSION {channel.succeeded_transmissions_NR}"
-    # )
-
-    # print('airtimes summary: Wifi, NR ---- 1)data, 2)control')
-    #
-    # print(channel.airtime_data)
-    # print(channel.airtime_control)
-    # print(channel.airtime_data_NR)
-    # print(channel.airtime_control_NR)
-    #
-    # print("sumarizing airtime --------------")
-    channel_occupancy_time = 0
-    channel_efficiency = 0
-    channel_occupancy_time_NR = 0
-    channel_efficiency_NR = 0
-    time = simulation_time * 1000000  # DEBUG
-
-    # nodes = number_of_stations + number_of_gnb
+def node_array(nodes, attribute):
+    return np.array([getattr(node, attribute) for node in nodes], dtype=np.int64)
 
-    for i in range(1, number_of_stations + 1):
-        channel_occupancy_time += channel.airtime_data["Station {}".format(i)] + channel.airtime_control[
-            "Station {}".format(i)]
-        channel_efficiency += channel.airtime_data["Station {}".format(i)]
 
-    for i in range(1, number_of_gnb + 1):
-        channel_occupancy_time_NR += channel.airtime_data_NR["Gnb {}".format(i)] + channel.airtime_control_NR[
-            "Gnb {}".format(i)]
-        channel_efficiency_NR += channel.airtime_data_NR["Gnb {}".format(i)]
-
-    normalized_channel_occupancy_time = channel_occupancy_time / time
-    normalized_channel_efficiency = channel_efficiency / time
-    # print(f'Wifi occupancy: {normalized_channel_occupancy_time}')
-    # print(f'Wifi efficieny: {normalized_channel_efficiency}')
-
-    normalized_channel_occupancy_time_NR = channel_occupancy_time_NR / time
-    normalized_channel_efficiency_NR = channel_efficiency_NR / time
-    # print(f'Gnb occupancy: {normalized_channel_occupancy_time_NR}')
-    # print(f'Gnb efficieny: {normalized_channel_efficiency_NR}')
-
-    normalized_channel_occupancy_time_all = (channel_occupancy_time + channel_occupancy_time_NR) / time
-    normalized_channel_efficiency_all = (channel_efficiency + channel_efficiency_NR) / time
-    # print(f'All occupancy: {normalized_channel_occupancy_time_all}')
-    # print(f'All efficieny: {normalized_channel_efficiency_all}')
-
-    print(
-        f"SEED = {seed} N_stations:={number_of_stations} N_gNB:={number_of_gnb}  CW_MIN = {config.cw_min} CW_MAX = {config.cw_max} "
-        f"WiFi pcol:={p_coll} WiFi cot:={normalized_channel_occupancy_time} WiFi eff:={normalized_channel_efficiency} "
-        f"gNB pcol:={p_coll_NR} gNB cot:={normalized_channel_occupancy_time_NR} gNB eff:={normalized_channel_efficiency_NR} "
-        f" all cot:={normalized_channel_occupancy_time_all} all eff:={normalized_channel_efficiency_all}"
+@dataclass()
+class SimulationResult:
+    # KPIs of a Wi-Fi / NR-U LBE run, per node arrays are ordered as Station 1..n and Gnb 1..n, airtime in us
+    seed: int
+    simulation_time: float  # s
+    config: Config
+    config_nr: Config_NR
+    airtime_data: np.ndarray
+    airtime_control: np.ndarray
+    succeeded_transmissions: np.ndarray
+    failed_transmissions: np.ndarray
+    airtime_data_NR: np.ndarray
+    airtime_control_NR: np.ndarray
+    succeeded_transmissions_NR: np.ndarray
+    failed_transmissions_NR: np.ndarray
+    backoffs: BackoffHistogram
+    frame_stats: Dict[str, FrameStats] = None  # aggregated frame statistics per node, None when not collected
+    resumed_from: float = None  # s, time of the checkpoint the run was continued from, None when run from the start
+
+    @property
+    def number_of_stations(self):
+        return len(self.succeeded_transmissions)
+
+    @property
+    def number_of_gnb(self):
+        return len(self.succeeded_transmissions_NR)
+
+    def normalized(self, airtime):
+        return int(airtime.sum()) / seconds_to_ticks(self.simulation_time)
+
+    @staticmethod
+    def collision_probability(succeeded, failed):
+        attempts = int(succeeded.sum() + failed.sum())
+        return int(failed.sum()) / attempts if attempts else 0.0
+
+    @property
+    def p_coll(self):
+        return self.collision_probability(self.succeeded_transmissions, self.failed_transmissions)
+
+    @property
+    def p_coll_NR(self):
+        return self.collision_probability(self.succeeded_transmissions_NR, self.failed_transmissions_NR)
+
+    @property
+    def channel_occupancy(self):
+        return self.normalized(self.airtime_data + self.airtime_control)
+
+    @property
+    def channel_efficiency(self):
+        return self.normalized(self.airtime_data)
+
+    @property
+    def channel_occupancy_NR(self):
+        return self.normalized(self.airtime_data_NR + self.airtime_control_NR)
+
+    @property
+    def channel_efficiency_NR(self):
+        return self.normalized(self.airtime_data_NR)
+
+    @property
+    def channel_occupancy_all(self):
+        return (int((self.airtime_data + self.airtime_control).sum()) + int(
+            (self.airtime_data_NR + self.airtime_control_NR).sum())) / seconds_to_ticks(self.simulation_time)
+
+    @property
+    def channel_efficiency_all(self):
+        return (int(self.airtime_data.sum()) + int(self.airtime_data_NR.sum())) / seconds_to_ticks(self.simulation_time)
+
+    @property
+    def fairness(self):
+        return (self.channel_occupancy_all ** 2) / (
+                2 * (self.channel_occupancy ** 2 + self.channel_occupancy_NR ** 2))
+
+    @property
+    def joint(self):
+        return self.fairness * self.channel_occupancy_all
+
+
+def simulation_channel(config: Config, configNr: Config_NR, number_of_stations: int, number_of_gnb: int,
+                       simulation_time: float, frame_stats: bool = False):
+    # Channel collecting the results of a Wi-Fi / NR-U LBE run, simulation_time in s
+    channel = Channel(None, number_of_stations, number_of_gnb,
+                      BackoffHistogram(max(config.cw_max, configNr.cw_max)), {}, {}, {}, {},
+                      seconds_to_ticks(simulation_time))
+    channel.frame_stats = {} if frame_stats else None
+    return channel
+
+
+def simulation_result(config: Config, configNr: Config_NR, seed: int, simulation_time: float, channel: "Channel",
+                      stations, gnbs) -> SimulationResult:
+    return SimulationResult(
+        seed, simulation_time, config, configNr,
+        np.array([channel.airtime_data[station.name] for station in stations], dtype=np.int64),
+        np.array([channel.airtime_control[station.name] for station in stations], dtype=np.int64),
+        node_array(stations, "succeeded_transmissions"),
+        node_array(stations, "failed_transmissions"),
+        np.array([channel.airtime_data_NR[gnb.name] for gnb in gnbs], dtype=np.int64),
+        np.array([channel.airtime_control_NR[gnb.name] for gnb in gnbs], dtype=np.int64),
+        node_array(gnbs, "succeeded_transmissions"),
+        node_array(gnbs, "failed_transmissions"),
+        channel.backoffs,
+        channel.frame_stats,
     )
-    print(f" Wifi succ: {channel.succeeded_transmissions} fail: {channel.failed_transmissions}")
-    print(f" NR succ: {channel.succeeded_transmissions_NR} fail: {channel.failed_transmissions_NR}")
 
-    fairness = (normalized_channel_occupancy_time_all ** 2) / (
-            2 * (normalized_channel_occupancy_time ** 2 + normalized_channel_occupancy_time_NR ** 2))
 
-    print(f'fairness: {fairness}')
-    joint = fairness * normalized_channel_occupancy_time_all
-    print(f'joint: {joint}')
+def simulate(
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        seed: int,
+        simulation_time: float,
+        engine: str = SIMPY_ENGINE,
+        frame_stats: bool = False,
+        checkpoint_dir: str = None,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+) -> SimulationResult:
+    # runs the Wi-Fi / NR-U LBE scenario for simulation_time s, nothing is printed or written.
+    # With checkpoint_dir the run state is saved there every checkpoint_interval s of simulated time and the run
+    # continues from its checkpoint if there is one (heap engine only, see checkpoint.py)
+    if checkpoint_dir is not None:
+        if engine != HEAP_ENGINE:
+            raise ValueError(f"Checkpoints are supported by the {HEAP_ENGINE} engine only, not {engine}")
+        from coexistanceSimpy.checkpoint import check_interval, simulate_with_checkpoints  # it imports this module
+        check_interval(checkpoint_interval)
+        return simulate_with_checkpoints(checkpoint_dir, checkpoint_interval, config, configNr, number_of_stations,
+                                         number_of_gnb, seed, simulation_time, frame_stats)
+
+    if engine == VECTOR_ENGINE:
+        return simulate_seeds(config, configNr, number_of_stations, number_of_gnb, [seed], simulation_time, engine,
+                              frame_stats)[0]
+
+    channel = simulation_channel(config, configNr, number_of_stations, number_of_gnb, simulation_time, frame_stats)
+    if engine == HEAP_ENGINE:
+        from coexistanceSimpy.heap_engine import run_heap_engine  # heap engine imports this module
+        stations, gnbs = run_heap_engine(number_of_stations, number_of_gnb, seed, seconds_to_ticks(simulation_time),
+                                         config, configNr, channel)
+    else:
+        stations, gnbs = run_simpy_engine(number_of_stations, number_of_gnb, seed, seconds_to_ticks(simulation_time),
+                                          config, configNr, channel)
+    return simulation_result(config, configNr, seed, simulation_time, channel, stations, gnbs)
 
-    write_header = True
-    if os.path.isfile(output_csv):
-        write_header = False
-    with open(output_csv, mode='a', newline="") as result_file:
-        result_adder = csv.writer(result_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
 
-        if write_header:
-            result_adder.writerow([
-                "Seed,WiFi,Gnb,ChannelOccupancyWiFi,ChannelEfficiencyWiFi,PcolWifi,ChannelOccupancyNR,ChannelEfficiencyNR,PcolNR,ChannelOccupancyAll,ChannelEfficiencyAll"])
+def simulate_seeds(
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        seeds: list,
+        simulation_time: float,
+        engine: str = SIMPY_ENGINE,
+        frame_stats: bool = False,
+        checkpoint_dir: str = None,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+) -> List[SimulationResult]:
+    # simulate() of every seed, the vector engine runs all of them at once
+    if engine != VECTOR_ENGINE:
+        return [simulate(config, configNr, number_of_stations, number_of_gnb, seed, simulation_time, engine,
+                         frame_stats, checkpoint_dir, checkpoint_interval) for seed in seeds]
+    if checkpoint_dir is not None:
+        raise ValueError(f"Checkpoints are supported by the {HEAP_ENGINE} engine only, not {engine}")
+    if frame_stats:
+        raise ValueError(f"Frame statistics are not collected by the {VECTOR_ENGINE} engine")
+    from coexistanceSimpy.vector_engine import simulate_replicas  # vector engine imports this module
+    return simulate_replicas(config, configNr, number_of_stations, number_of_gnb, seeds, simulation_time)
+
+
+def formatted_p_coll(succeeded, failed, p_coll):  # printed with 4 decimals, 0 when nothing was transmitted
+    return "{:.4f}".format(p_coll) if succeeded.sum() + failed.sum() != 0 else 0
+
+
+def format_result(result: SimulationResult) -> str:
+    # the summary printed by run_simulation
+    p_coll = formatted_p_coll(result.succeeded_transmissions, result.failed_transmissions, result.p_coll)
+    p_coll_NR = formatted_p_coll(result.succeeded_transmissions_NR, result.failed_transmissions_NR, result.p_coll_NR)
+    lines = [
+        f"SEED = {result.seed} N_stations:={result.number_of_stations} N_gNB:={result.number_of_gnb}  "
+        f"CW_MIN = {result.config.cw_min} CW_MAX = {result.config.cw_max} "
+        f"WiFi pcol:={p_coll} WiFi cot:={result.channel_occupancy} WiFi eff:={result.channel_efficiency} "
+        f"gNB pcol:={p_coll_NR} gNB cot:={result.channel_occupancy_NR} gNB eff:={result.channel_efficiency_NR} "
+        f" all cot:={result.channel_occupancy_all} all eff:={result.channel_efficiency_all}",
+        f" Wifi succ: {result.succeeded_transmissions.sum()} fail: {result.failed_transmissions.sum()}",
+        f" NR succ: {result.succeeded_transmissions_NR.sum()} fail: {result.failed_transmissions_NR.sum()}",
+    ]
+    if result.frame_stats is not None:
+        lines.append(f" Wifi frames {merged_frame_stats(result.frame_stats, 'Station')}")
+        lines.append(f" NR frames {merged_frame_stats(result.frame_stats, 'Gnb')}")
+    lines.append(f'fairness: {result.fairness}')
+    lines.append(f'joint: {result.joint}')
+    return "\n".join(lines)
+
+
+def result_row(result: SimulationResult):
+    # the row written to the result sink, columns in result_sink.RESULT_SCHEMA
+    return [result.seed, result.config.cw_max, result.fairness, result.number_of_stations, result.number_of_gnb,
+            result.channel_occupancy, result.channel_efficiency, result.p_coll,
+            result.channel_occupancy_NR, result.channel_efficiency_NR, result.p_coll_NR,
+            result.channel_occupancy_all, result.channel_efficiency_all]
+
+
+def report_result(result: SimulationResult, sink: ResultSink = None):
+    # without a sink the row is appended to output_csv right away
+    if result.resumed_from is not None:
+        print(f"Resumed N_stations:={result.number_of_stations} N_gNB:={result.number_of_gnb} SEED = {result.seed} "
+              f"from {result.resumed_from} s")
+    print(format_result(result))
+    if sink is None:
+        with CsvResultSink(output_csv) as sink:
+            sink.add(result_row(result))
+    else:
+        sink.add(result_row(result))
 
-        result_adder.writerow(
-            [seed, config.cw_max, fairness, number_of_stations, number_of_gnb, normalized_channel_occupancy_time,
-             normalized_channel_efficiency,
-             p_coll,
-             normalized_channel_occupancy_time_NR, normalized_channel_efficiency_NR, p_coll_NR,
-             normalized_channel_occupancy_time_all, normalized_channel_efficiency_all])
+
+def run_simulation(
+        number_of_stations: int,
+        number_of_gnb: int,
+        seed: int,
+        simulation_time: int,
+        config: Config,
+        configNr: Config_NR,
+        engine: str = SIMPY_ENGINE,
+        frame_stats: bool = False,
+        checkpoint_dir: str = None,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+):
+    # simulate() with the CLI output: printed summary and a row appended to output_csv
+    result = simulate(config, configNr, number_of_stations, number_of_gnb, seed, simulation_time, engine, frame_stats,
+                      checkpoint_dir, checkpoint_interval)
+    report_result(result)
+    return result
+
+
+def run_analytic(number_of_stations: int, number_of_gnb: int, config: Config, configNr: Config_NR):
+    # expected KPIs of the saturated scenario from the analytic model (see analytic.py), printed like run_simulation
+    from coexistanceSimpy.analytic import analytic_estimate, format_analytic_result  # analytic imports this module
+    result = analytic_estimate(config, configNr, number_of_stations, number_of_gnb)
+    print(format_analytic_result(result))
+    return result
 
 
-@dataclass()
 class TransmissionNRFbe:
-    transmission_time: int
-    gnb_name: str  # name of the owning it station
-    col: str
-    t_start: int
-    airtime: int
-    number_of_retransmissions: int = 0
-    t_to_send: int = None  # how much time it took to sent successfully
+    __slots__ = ("transmission_time", "gnb_name", "t_start", "airtime", "number_of_retransmissions", "t_to_send")
+
+    def __init__(self, transmission_time: int, gnb_name: str, t_start: int, airtime: int):
+        self.transmission_time = transmission_time
+        self.gnb_name = gnb_name  # name of the owning it station
+        self.t_start = t_start
+        self.airtime = airtime
+        self.number_of_retransmissions = 0
+        self.t_to_send = None  # how much time it took to sent successfully
+
+
+class FBEPhase(Enum):
+    # phases of the programs of FBE stations (FBE.phases) besides plain waits, which are yielded as their length
+    CCA = 1
+    TRANSMISSION = 2
+    MONITOR = 3  # channel monitoring of DB-FBE
 
 
 class FBETimers:
@@ -754,10 +917,10 @@ class FBETimers:
                  cot: int,
                  cca_slots_num=1):
         # fixed frame period
-        self.ffp = ffp
+        self.ffp = to_ticks(ffp, "ffp")
         self.observation_slot_time = 9
-        self.cot = self.check_cot(cot)
-        self.idle_period = ffp - self.cot
+        self.cot = self.check_cot(to_ticks(cot, "cot"))
+        self.idle_period = self.ffp - self.cot
         self.cca = self.check_cca(cca_slots_num)
 
     def __repr__(self):
@@ -765,7 +928,7 @@ class FBETimers:
             self.idle_period) + 'cca : {} \n'.format(self.cca)
 
     def check_cot(self, cot):
-        max_cot = self.ffp * 0.95
+        max_cot = self.ffp * 95 // 100  # whole ticks
         if cot > max_cot:
             print('COT exceeded maximum range. Setting {} (95% of FFP) instead.'.format(max_cot))
             return max_cot
@@ -788,33 +951,55 @@ class FBE(ABC):
         self.channel = None
         self.timers = timers
         self.process = None
-        self.transmission_process = None
         self.skip_next_cot = False
         self.air_time = 0
-        self.offset = offset
+        self.offset = to_ticks(offset, "offset")
         self.run_with_offset = self.offset > 0
         self.logger_name = logger_name
         self.handle_sim_end = False
+        self.transmitting = False  # membership flags set by the channel state
+        self.sensing = False
+        self.rng = None  # random stream of the station, set with the environment
 
-    @abstractmethod
     def start(self):
+        # SimPy process of the station, runs the phases of its program
+        for phase in self.phases():
+            if phase is FBEPhase.CCA:
+                yield from self.process_cca()
+            elif phase is FBEPhase.TRANSMISSION:
+                yield from self.send_transmission()
+            elif phase is FBEPhase.MONITOR:
+                yield from self.monitor_channel()
+            else:
+                yield self.env.timeout(phase)
+
+    @abstractmethod
+    def phases(self):
+        # Program of the station: generator of its phases, an FBEPhase or the length of a wait. Both engines run it
+        # (start() with SimPy processes, fbe_engine.py on a heap of decision points), the code between two phases
+        # runs when the first of them ends.
         pass
 
+    def cca(self):
+        yield FBEPhase.CCA
+
     def process_cca(self):
         init = self.env.now
         try:
-            self.channel.cca_list_NR_FBE.append(self)
-            station_log(self, 'Sensing if channel is idle')
-            if self.get_curr_transmissions_list_len_sum() > 0:
+            self.channel.state.start_sensing(self)
+            if logger_util.enabled:
+                station_log(self, "Sensing if channel is idle")
+            if self.channel.state.transmitter_count > 0:
                 raise simpy.Interrupt("CCA interrupted!")
             yield self.env.timeout(self.timers.cca)
             self.skip_next_cot = False
-            self.channel.cca_list_NR_FBE.remove(self)
+            self.channel.state.stop_sensing(self)
         except simpy.Interrupt:
             end = self.env.now
             diff = end - init
-            station_log(self, 'CCA interrupted, skipping next FFP')
-            self.channel.cca_list_NR_FBE.remove(self)
+            if logger_util.enabled:
+                station_log(self, "CCA interrupted, skipping next FFP")
+            self.channel.state.stop_sensing(self)
             if diff == 0:
                 yield self.env.timeout(self.timers.cca)
             else:
@@ -823,79 +1008,69 @@ class FBE(ABC):
 
     def process_init_offset(self):
         if self.run_with_offset:
-            yield self.env.timeout(self.offset)
-        # Init cca process
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+            yield self.offset
+        # Init cca
+        yield from self.cca()
 
     def check_collisions(self):
-        lists_len_sum = self.get_curr_transmissions_list_len_sum()
-        if lists_len_sum > 1 or lists_len_sum == 0:
+        transmitter_count = self.channel.state.transmitter_count
+        if transmitter_count > 1 or transmitter_count == 0:
             self.sent_failed()
             return False
         self.sent_completed()
         return True
 
     def send_transmission(self):
-        self.channel.tx_list_NR_FBE.append(self)
+        self.channel.state.start_transmission(self, NR_FBE)
         transmission_start = self.env.now
         transmission_end = transmission_start + self.timers.cot
-        with self.channel.tx_lock.request() as request_token:
-            try:
-                station_log(self, f"Starting transmission")
-                request = yield request_token | self.env.timeout(0)
-                self.interrupt_cca()
-                if request_token not in request:
-                    self.interrupt_transmissions()
-                remained_time = self.channel.simulation_time - transmission_start
-                if remained_time < self.timers.cot:
-                    station_log(self,
-                                f"Transmission interrupted by simulation end. COT len = {self.timers.cot}. "
-                                f"Time remained: {remained_time}")
-                    self.handle_sim_end = True
-                    transmission_end = transmission_start + remained_time
-                    # When simpy env reaches sim end time whole simulation will be shut down.
-                    # Handle this by waiting for 1 us less
-                    yield self.env.timeout(remained_time - 1)
-                else:
-                    yield self.env.timeout(self.timers.cot)
-                if self.get_curr_transmissions_list_len_sum() > 1:
-                    station_log(self, f"Collision in channel detected after transmission")
-                    self.sent_failed()
-                    self.add_event_to_dict(EventType.CHANNEL_COLLISION.name, transmission_start, transmission_end)
-                else:
-                    self.sent_completed(remained_time)
-                    self.add_event_to_dict(EventType.SUCCESSFUL_TRANSMISSION.name, transmission_start, transmission_end)
-
-                if self.handle_sim_end is True:
-                    yield self.env.timeout(1)
-                self.channel.tx_list_NR_FBE.remove(self)
-
-            except simpy.Interrupt:
-                now = self.env.now
-                remained_transmission_time = self.timers.cot - (now - transmission_start)
-                station_log(self, f"Collision in channel detected during transmission. "
-                                  f"Time to end transmission: {remained_transmission_time}")
+        try:
+            if logger_util.enabled:
+                station_log(self, "Starting transmission")
+            # all stations starting to transmit now are resolved together at the end of the instant
+            collision = yield self.channel.fbe_arbiter.contend(self)
+            if collision:
+                raise simpy.Interrupt("Collision in channel")
+            remained_time = self.channel.simulation_time - transmission_start
+            if remained_time < self.timers.cot:
+                if logger_util.enabled:
+                    station_log(self, "Transmission interrupted by simulation end. COT len = %s. Time remained: %s",
+                                self.timers.cot, remained_time)
+                self.handle_sim_end = True
+                transmission_end = transmission_start + remained_time
+                # When simpy env reaches sim end time whole simulation will be shut down.
+                # Handle this by waiting for 1 us less
+                yield self.env.timeout(remained_time - 1)
+            else:
                 yield self.env.timeout(self.timers.cot)
+            if self.channel.state.transmitter_count > 1:
+                if logger_util.enabled:
+                    station_log(self, "Collision in channel detected after transmission")
                 self.sent_failed()
                 self.add_event_to_dict(EventType.CHANNEL_COLLISION.name, transmission_start, transmission_end)
-                self.channel.tx_list_NR_FBE.remove(self)
+            else:
+                self.sent_completed(remained_time)
+                self.add_event_to_dict(EventType.SUCCESSFUL_TRANSMISSION.name, transmission_start, transmission_end)
 
-    def interrupt_cca(self):
-        for station in self.channel.cca_list_NR_FBE:
-            if station.process.is_alive:
-                station_log(self, f"Interrupting CCA process of station: {station.name}")
-                station.process.interrupt()
+            if self.handle_sim_end is True:
+                yield self.env.timeout(1)
+            self.channel.fbe_arbiter.end_transmission(self)
+            self.channel.state.end_transmission(self, NR_FBE)
 
-    def interrupt_transmissions(self):
-        for station in self.channel.tx_list_NR_FBE:
-            if station != self and station.transmission_process.is_alive:
-                station_log(self, f"Interrupting transmission process of station: {station.name}")
-                station.transmission_process.interrupt()
-        raise simpy.Interrupt("Collision in channel")
+        except simpy.Interrupt:
+            now = self.env.now
+            remained_transmission_time = self.timers.cot - (now - transmission_start)
+            if logger_util.enabled:
+                station_log(self, "Collision in channel detected during transmission. Time to end transmission: %s",
+                            remained_transmission_time)
+            yield self.env.timeout(self.timers.cot)
+            self.sent_failed()
+            self.add_event_to_dict(EventType.CHANNEL_COLLISION.name, transmission_start, transmission_end)
+            self.channel.state.end_transmission(self, NR_FBE)
 
     def sent_failed(self):
-        station_log(self, f"Transmission failed")
+        if logger_util.enabled:
+            station_log(self, "Transmission failed")
         self.failed_transmissions += 1
         self.channel.failed_transmissions_NR_FBE += 1
 
@@ -906,40 +1081,37 @@ class FBE(ABC):
         self.channel.event_dict["event_type"].append(event_type)
 
     def ffp_skip_transmission(self):
-        yield self.env.process(self.skip_cot())
-        yield self.env.process(self.wait_until_cca())
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+        yield from self.skip_cot()
+        yield from self.wait_until_cca()
+        yield from self.cca()
 
     def ffp_with_transmission(self):
-        self.transmission_process = self.env.process(self.send_transmission())
-        yield self.transmission_process
-        yield self.env.process(self.wait_until_cca())
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+        yield FBEPhase.TRANSMISSION
+        yield from self.wait_until_cca()
+        yield from self.cca()
 
     def sent_completed(self, sim_end_air_time=None):
-        station_log(self, f"Successfully sent transmission")
+        if logger_util.enabled:
+            station_log(self, "Successfully sent transmission")
         if self.handle_sim_end:
-            station_log(self, f"Current air time: {self.air_time}. Airtime to add: {sim_end_air_time}. "
-                              f"Sum : {self.air_time + sim_end_air_time}")
+            if logger_util.enabled:
+                station_log(self, "Current air time: %s. Airtime to add: %s. Sum : %s",
+                            self.air_time, sim_end_air_time, self.air_time + sim_end_air_time)
             self.air_time += sim_end_air_time
             self.succeeded_transmissions += 1
         else:
-            station_log(self, f"Current air time: {self.air_time}. Airtime to add: {self.timers.cot}. "
-                              f"Sum : {self.air_time + self.timers.cot}")
+            if logger_util.enabled:
+                station_log(self, "Current air time: %s. Airtime to add: %s. Sum : %s",
+                            self.air_time, self.timers.cot, self.air_time + self.timers.cot)
             self.succeeded_transmissions += 1
             self.air_time += self.timers.cot
         self.channel.succeeded_transmissions_NR_FBE += 1
 
-    def get_curr_transmissions_list_len_sum(self):
-        return len(self.channel.tx_list) + len(self.channel.tx_list_NR) + len(self.channel.tx_list_NR_FBE)
-
     def wait_until_cca(self):
-        yield self.env.timeout(self.timers.idle_period - self.timers.cca)
+        yield self.timers.idle_period - self.timers.cca
 
     def skip_cot(self):
-        yield self.env.timeout(self.timers.cot)
+        yield self.timers.cot
 
     def set_log_name(self, log_name):
         self.logger_name = log_name
@@ -948,9 +1120,17 @@ class FBE(ABC):
     def get_fbe_version(self):
         pass
 
-    def set_environment(self, env):
+    def set_environment(self, env, rng: RandomStream = None):
         self.env = env
-        self.env.process(self.start())
+        self.rng = rng if rng is not None else node_stream(None, self.name)
+        if self.channel.fbe_arbiter is None:
+            self.channel.fbe_arbiter = FBEChannelArbiter(env)
+        # one process per station, its phases are generators run with yield from, so CCA and transmission
+        # interrupts are delivered to the phase in progress
+        self.process = self.env.process(self.start())
+
+    def select_random_number(self, random_range, bottom_range=1):
+        return self.rng.randint(bottom_range, random_range)
 
     def set_channel(self, channel):
         self.channel = channel
@@ -972,13 +1152,13 @@ class StandardFBE(FBE):
     def __init__(self, name: str, timers: FBETimers, offset=0):
         super().__init__(name, timers, offset)
 
-    def start(self):
-        yield self.env.process(self.process_init_offset())
+    def phases(self):
+        yield from self.process_init_offset()
         while True:
             if self.skip_next_cot:
-                yield self.env.process(self.ffp_skip_transmission())
+                yield from self.ffp_skip_transmission()
             else:
-                yield self.env.process(self.ffp_with_transmission())
+                yield from self.ffp_with_transmission()
 
     def get_fbe_version(self):
         return FBEVersion.STANDARD_FBE
@@ -987,10 +1167,6 @@ class StandardFBE(FBE):
         return "Standard FBE "
 
 
-def select_random_number(random_range, bottom_range=1):
-    return random.randint(bottom_range, random_range)
-
-
 class RandomMutingFBE(FBE):
 
     def __init__(self, name: str, timers: FBETimers, offset=0, max_frames_in_a_row=5, max_muted_periods=5):
@@ -1000,41 +1176,44 @@ class RandomMutingFBE(FBE):
         self.transmissions_in_a_row_to_go = -1
         self.muted_periods_to_go = 0
 
-    def start(self):
-        yield self.env.process(self.process_init_offset())
+    def phases(self):
+        yield from self.process_init_offset()
         while True:
             if self.transmissions_in_a_row_to_go == 0:
-                self.muted_periods_to_go = select_random_number(self.max_muted_periods)
-                station_log(self,
-                            f"Selecting number of muted periods. Selected number: {self.muted_periods_to_go}")
+                self.muted_periods_to_go = self.select_random_number(self.max_muted_periods)
+                if logger_util.enabled:
+                    station_log(self, "Selecting number of muted periods. Selected number: %s",
+                                self.muted_periods_to_go)
                 for i in range(self.muted_periods_to_go):
-                    station_log(self, f"Skipping frame... {i + 1}/{self.muted_periods_to_go}")
+                    if logger_util.enabled:
+                        station_log(self, "Skipping frame... %s/%s", i + 1, self.muted_periods_to_go)
                     if i == self.muted_periods_to_go - 1:
-                        yield self.env.process(self.ffp_skip_transmission())
+                        yield from self.ffp_skip_transmission()
                     else:
-                        yield self.env.process(self.ffp_skip_transmission_without_cca())
+                        yield from self.ffp_skip_transmission_without_cca()
 
                 self.transmissions_in_a_row_to_go = -1
 
             if self.skip_next_cot:
-                yield self.env.process(self.ffp_skip_transmission())
+                yield from self.ffp_skip_transmission()
             else:
                 if self.transmissions_in_a_row_to_go == -1:
-                    self.transmissions_in_a_row_to_go = select_random_number(self.max_transmissions_in_a_row)
-                    station_log(self,
-                                f'Selecting number of frames which will be transmitted in the row. '
-                                f'Selected number: {self.transmissions_in_a_row_to_go} ')
+                    self.transmissions_in_a_row_to_go = self.select_random_number(self.max_transmissions_in_a_row)
+                    if logger_util.enabled:
+                        station_log(self, "Selecting number of frames which will be transmitted in the row. "
+                                    "Selected number: %s ", self.transmissions_in_a_row_to_go)
 
-                station_log(self, f'Continuous frames to go: {self.transmissions_in_a_row_to_go}')
-                yield self.env.process(self.ffp_with_transmission())
+                if logger_util.enabled:
+                    station_log(self, "Continuous frames to go: %s", self.transmissions_in_a_row_to_go)
+                yield from self.ffp_with_transmission()
 
-    def process_cca(self):
-        yield from super().process_cca()
+    def cca(self):
+        yield from super().cca()
         if self.skip_next_cot:
             self.transmissions_in_a_row_to_go = -1
 
     def ffp_skip_transmission_without_cca(self):
-        yield self.env.timeout(self.timers.ffp)
+        yield self.timers.ffp
 
     def sent_failed(self):
         super().sent_failed()
@@ -1060,41 +1239,41 @@ class FloatingFBE(FBE):
 
     def __init__(self, name: str, timers: FBETimers, offset=0):
         super().__init__(name, timers, offset)
-        self.number_of_slots = math.floor(timers.idle_period / timers.observation_slot_time) - 1
+        self.number_of_slots = timers.idle_period // timers.observation_slot_time - 1
         self.pause_time_after_transmission = 0
 
-    def start(self):
-        yield self.env.process(self.process_init_offset())
+    def phases(self):
+        yield from self.process_init_offset()
         while True:
-            yield self.env.process(self.backoff_process())
+            yield from self.backoff_process()
             if self.skip_next_cot:
-                yield self.env.process(self.ffp_skip_transmission())
+                yield from self.ffp_skip_transmission()
             else:
-                yield self.env.process(self.ffp_with_transmission())
+                yield from self.ffp_with_transmission()
 
     def wait_random_time_before_cca(self):
-        time_to_wait = select_random_number(self.number_of_slots) * self.timers.observation_slot_time
-        station_log(self, f'Selected backoff before CCA : {time_to_wait}')
+        time_to_wait = self.select_random_number(self.number_of_slots) * self.timers.observation_slot_time
+        if logger_util.enabled:
+            station_log(self, "Selected backoff before CCA : %s", time_to_wait)
         self.pause_time_after_transmission = self.timers.idle_period - time_to_wait - self.timers.cca
-        yield self.env.timeout(time_to_wait)
+        yield time_to_wait
 
     def ffp_skip_transmission(self):
-        yield self.env.timeout(self.timers.cot + self.pause_time_after_transmission)
+        yield self.timers.cot + self.pause_time_after_transmission
 
     def ffp_with_transmission(self):
-        self.transmission_process = self.env.process(self.send_transmission())
-        yield self.transmission_process
-        station_log(self, f'Waiting : {self.pause_time_after_transmission} before next FFP')
-        yield self.env.timeout(self.pause_time_after_transmission)
+        yield FBEPhase.TRANSMISSION
+        if logger_util.enabled:
+            station_log(self, "Waiting : %s before next FFP", self.pause_time_after_transmission)
+        yield self.pause_time_after_transmission
 
     def backoff_process(self):
-        yield self.env.process(self.wait_random_time_before_cca())
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+        yield from self.wait_random_time_before_cca()
+        yield from self.cca()
 
     def process_init_offset(self):
         if self.run_with_offset:
-            yield self.env.timeout(self.offset)
+            yield self.offset
 
     def get_fbe_version(self):
         return FBEVersion.FLOATING_FBE
@@ -1114,36 +1293,34 @@ class FixedMutingFBE(FBE):
         self.muted_periods_to_go = 0
         self.max_number_of_muted_periods = max_number_of_muted_periods
 
-    def start(self):
-        yield self.env.process(self.process_init_offset())
+    def phases(self):
+        yield from self.process_init_offset()
         while True:
             if self.muted_periods_to_go > 0:
-                station_log(self,
-                            f'Waiting muted periods after successful transmission. Muted periods to go '
-                            f'{self.muted_periods_to_go}')
+                if logger_util.enabled:
+                    station_log(self, "Waiting muted periods after successful transmission. Muted periods to go %s",
+                                self.muted_periods_to_go)
                 if self.muted_periods_to_go == 1:
-                    yield self.env.process(self.ffp_skip_transmission())
+                    yield from self.ffp_skip_transmission()
                 else:
-                    yield self.env.process(self.ffp_skip_transmission_without_cca())
+                    yield from self.ffp_skip_transmission_without_cca()
                 self.muted_periods_to_go += -1
             else:
                 if self.skip_next_cot:
-                    yield self.env.process(self.ffp_skip_transmission())
+                    yield from self.ffp_skip_transmission()
                 else:
-                    yield self.env.process(self.ffp_with_transmission())
+                    yield from self.ffp_with_transmission()
 
     def ffp_skip_transmission_without_cca(self):
-        yield self.env.timeout(self.timers.ffp)
+        yield self.timers.ffp
 
     def ffp_with_transmission(self):
-        self.transmission_process = self.env.process(self.send_transmission())
-        yield self.transmission_process
-        yield self.env.process(self.wait_until_cca())
+        yield FBEPhase.TRANSMISSION
+        yield from self.wait_until_cca()
         if self.muted_periods_to_go <= 0:
-            self.process = self.env.process(self.process_cca())
-            yield self.process
+            yield from self.cca()
         else:
-            yield self.env.timeout(self.timers.cca)
+            yield self.timers.cca
 
     def sent_completed(self, sim_end_air_time=None):
         super().sent_completed(sim_end_air_time)
@@ -1177,59 +1354,53 @@ class DeterministicBackoffFBE(FBE):
         self.incremented_during_monitor = False
         self.monitor_time = self.timers.ffp - self.timers.cca
 
-    def start(self):
-        yield self.env.process(self.process_init_offset())
+    def phases(self):
+        yield from self.process_init_offset()
         while True:
             if self.backoff_counter == 0:
                 self.is_interrupt_counter_incremented = False
-                yield self.env.process(self.ffp_with_transmission())
+                yield from self.ffp_with_transmission()
             else:
                 self.skip_next_cot = False
-                yield self.env.process(self.ffp_skip_transmission())
+                yield from self.ffp_skip_transmission()
             if self.drop_frame:
-                station_log(self, 'Dropping frame ...')
+                if logger_util.enabled:
+                    station_log(self, "Dropping frame ...")
                 self.drop_frame = False
                 self.select_backoff()
 
-    def send_transmission(self):
-        for db_station in self.channel.db_fbe_list:
-            db_station.log_actual_backoff()
-        yield from super().send_transmission()
-
     def process_init_offset(self):
         self.add_interrupt_counter_to_dict(True)
         if self.run_with_offset:
-            yield self.env.timeout(self.offset)
+            yield self.offset
 
         self.select_backoff()
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+        yield from self.cca()
 
     def ffp_skip_transmission(self):
-        self.process = self.env.process(self.monitor_channel())
-        yield self.process
-        self.process = self.env.process(self.process_cca())
-        yield self.process
+        yield FBEPhase.MONITOR
+        yield from self.cca()
 
     def monitor_channel(self):
         now = self.env.now
         try:
-            self.channel.cca_list_NR_FBE.append(self)
-            if self.get_curr_transmissions_list_len_sum() > 0:
-                station_log(self, 'Channel monitoring failed at the beginning')
+            self.channel.state.start_sensing(self)
+            if self.channel.state.transmitter_count > 0:
+                if logger_util.enabled:
+                    station_log(self, "Channel monitoring failed at the beginning")
                 raise simpy.Interrupt('Channel monitoring failed at the beginning')
             yield self.env.timeout(self.monitor_time)
-            self.channel.cca_list_NR_FBE.remove(self)
+            self.channel.state.stop_sensing(self)
         except simpy.Interrupt:
             end = self.env.now
             diff = end - now
-            self.channel.cca_list_NR_FBE.remove(self)
+            self.channel.state.stop_sensing(self)
             self.increment_interrupt_counter()
             self.incremented_during_monitor = True
-            station_log(self, f'Incrementing interrupt_counter. '
-                              f'Actual value: {self.interrupt_counter}. '
-                              f'Incremented during monitor: {self.incremented_during_monitor}. '
-                              f'Time to finish monitor mode: {self.monitor_time - diff}')
+            if logger_util.enabled:
+                station_log(self, "Incrementing interrupt_counter. Actual value: %s. Incremented during monitor: %s. "
+                            "Time to finish monitor mode: %s",
+                            self.interrupt_counter, self.incremented_during_monitor, self.monitor_time - diff)
             yield self.env.timeout(self.monitor_time - diff)
 
     def increment_interrupt_counter(self):
@@ -1238,33 +1409,38 @@ class DeterministicBackoffFBE(FBE):
         self.is_interrupt_counter_incremented = True
         self.add_interrupt_counter_to_dict()
 
-    def process_cca(self):
-        yield from super().process_cca()
+    def cca(self):
+        yield from super().cca()
         if self.skip_next_cot:
             if not self.incremented_during_monitor:
                 self.increment_interrupt_counter()
-                station_log(self, f'Interrupt counter incremented after CCA. Actual value: {self.interrupt_counter}')
+                if logger_util.enabled:
+                    station_log(self, "Interrupt counter incremented after CCA. Actual value: %s",
+                                self.interrupt_counter)
                 self.incremented_during_monitor = False
         else:
             if self.backoff_counter > 0:
                 self.backoff_counter -= 1
-                station_log(self, f'Backoff counter decremented. Actual value: {self.backoff_counter}')
+                if logger_util.enabled:
+                    station_log(self, "Backoff counter decremented. Actual value: %s", self.backoff_counter)
                 self.add_backoff_to_dict(False)
                 if self.backoff_counter == 0:
-                    station_log(self, f'Backoff = 0. Starting transmission immediately')
+                    if logger_util.enabled:
+                        station_log(self, "Backoff = 0. Starting transmission immediately")
 
     def sent_failed(self):
         super().sent_failed()
         if self.retransmission_counter < self.maximum_number_of_retransmissions:
             self.retransmission_counter += 1
-            station_log(self, f'Incrementing retransmission_counter to {self.retransmission_counter}')
+            if logger_util.enabled:
+                station_log(self, "Incrementing retransmission_counter to %s", self.retransmission_counter)
             self.select_backoff()
         else:
             # In our case simply setting counter to 0 and restarting procedure in next ffp
-            station_log(self,
-                        f'Retransmission_counter exceeded maximum number of retransmissions'
-                        f' {self.retransmission_counter}/{self.maximum_number_of_retransmissions}.'
-                        f'Frame will be dropped...')
+            if logger_util.enabled:
+                station_log(self, "Retransmission_counter exceeded maximum number of retransmissions %s/%s."
+                            "Frame will be dropped...",
+                            self.retransmission_counter, self.maximum_number_of_retransmissions)
             self.retransmission_counter = 0
             self.drop_frame = True
 
@@ -1277,39 +1453,33 @@ class DeterministicBackoffFBE(FBE):
         modulo = self.retransmission_counter % self.maximum_number_of_retransmissions
         if modulo < self.threshold:
             self.backoff_counter = self.init_backoff_value + self.interrupt_counter
-            station_log(self,
-                        f'Selected new backoff counter: {self.backoff_counter} = {self.init_backoff_value} + {self.interrupt_counter}')
+            if logger_util.enabled:
+                station_log(self, "Selected new backoff counter: %s = %s + %s",
+                            self.backoff_counter, self.init_backoff_value, self.interrupt_counter)
             self.interrupt_counter = 0
             self.add_interrupt_counter_to_dict()
         else:
-            station_log(self, f'False in r%m < threshold ({modulo}<{self.threshold})')
+            if logger_util.enabled:
+                station_log(self, "False in r%%m < threshold (%s<%s)", modulo, self.threshold)
             top_range = self.maximum_number_of_retransmissions - 1
-            self.backoff_counter = select_random_number(top_range, bottom_range=0)
-            station_log(self, f'Selected new random backoff counter: {self.backoff_counter} = rand({0}, {top_range})')
+            self.backoff_counter = self.select_random_number(top_range, bottom_range=0)
+            if logger_util.enabled:
+                station_log(self, "Selected new random backoff counter: %s = rand(%s, %s)",
+                            self.backoff_counter, 0, top_range)
         self.add_backoff_to_dict()
 
     def add_backoff_to_dict(self, is_init=True):
-        time = self.env.now
-        self.channel.db_fbe_backoff_change_dict["time"].append(time)
-        self.channel.db_fbe_backoff_change_dict["backoff"].append(self.backoff_counter)
-        self.channel.db_fbe_backoff_change_dict["station_name"].append(self.name)
-        self.channel.db_fbe_backoff_change_dict["is_init"].append(is_init)
+        self.channel.db_fbe_backoff_changes.add(self.env.now, self.backoff_counter, self.backoff_index, is_init)
 
     def add_interrupt_counter_to_dict(self, is_init=False):
-        if is_init:
-            time = 0
-        else:
-            time = self.env.now
-        self.channel.db_interrupt_counter["time"].append(time)
-        self.channel.db_interrupt_counter["value"].append(self.interrupt_counter)
-        self.channel.db_interrupt_counter["station_name"].append(self.name)
+        time = 0 if is_init else self.env.now
+        self.channel.db_interrupt_counter_changes.add(time, self.interrupt_counter, self.interrupt_counter_index)
 
     def set_channel(self, channel):
         super().set_channel(channel)
-        self.channel.db_fbe_list.append(self)
-
-    def log_actual_backoff(self):
-        station_log(self, f'Actual backoff log {self.backoff_counter}')
+        # indexes of the station in the changes of the channel
+        self.backoff_index = channel.db_fbe_backoff_changes.station_index(self.name)
+        self.interrupt_counter_index = channel.db_interrupt_counter_changes.station_index(self.name)
 
     def get_fbe_version(self):
         return FBEVersion.DETERMINISTIC_BACKOFF_FBE
@@ -1352,31 +1522,23 @@ class Event:
 
 @dataclass()
 class Channel:
-    tx_queue: simpy.PreemptiveResource  # lock for the stations with the longest frame to transmit
-    tx_lock: simpy.Resource  # channel lock (locked when there is ongoing transmission)
+    arbiter: ChannelArbiter  # decides which of the stations starting to transmit holds the channel
     n_of_stations: int  # number of transmitting stations in the channel
     n_of_eNB: int
-    backoffs: Dict[int, Dict[int, int]]
+    backoffs: BackoffHistogram  # drawn backoff values of Station and Gnb nodes (None in FBE simulations)
     airtime_data: Dict[str, int]
     airtime_control: Dict[str, int]
     airtime_data_NR: Dict[str, int]
     airtime_control_NR: Dict[str, int]
     simulation_time: int
 
-    tx_list: List[Station] = field(default_factory=list)  # transmitting stations in the channel
-    back_off_list: List[Station] = field(default_factory=list)  # stations in backoff phase
-    tx_list_NR: List[Gnb] = field(default_factory=list)  # transmitting stations in the channel
-    tx_list_NR_FBE: List[FBE] = field(default_factory=list)  # transmitting FBE stations in the channel
-    back_off_list_NR: List[Gnb] = field(default_factory=list)  # stations in backoff phase
-    cca_list_NR_FBE: List[FBE] = field(default_factory=list)
+    state: ChannelState = field(default_factory=ChannelState)  # transmitting and sensing stations in the channel
     event_dict: dict = field(
         default_factory=lambda: {"time": [], "event_end": [], "station_name": [], "event_type": []})
-    db_fbe_backoff_change_dict: dict = field(
-        default_factory=lambda: {"time": [], "backoff": [], "station_name": [], "is_init": []})
-    db_interrupt_counter: dict = field(
-        default_factory=lambda: {"time": [], "value": [], "station_name": []}
-    )
-    db_fbe_list: List[DeterministicBackoffFBE] = field(default_factory=list)
+    # DB-FBE backoff and interrupt counter changes, as_dict() gives the columns of the plots and CSV files
+    db_fbe_backoff_changes: CounterChanges = field(default_factory=lambda: CounterChanges("backoff", with_init=True))
+    db_interrupt_counter_changes: CounterChanges = field(default_factory=lambda: CounterChanges("value"))
+    fbe_arbiter: FBEChannelArbiter = None  # resolves FBE stations starting to transmit at the same time
     failed_transmissions: int = 0  # total failed transmissions
     succeeded_transmissions: int = 0  # total succeeded transmissions
     bytes_sent: int = 0  # total bytes sent
@@ -1384,6 +1546,9 @@ class Channel:
     succeeded_transmissions_NR: int = 0  # total succeeded transmissions
     failed_transmissions_NR_FBE: int = 0  # total failed FBE transmissions
     succeeded_transmissions_NR_FBE: int = 0  # total succeeded FBE transmissions
+    backoff_countdowns: BackoffCountdowns = None  # backoff countdowns of Station and Gnb nodes
+    idle_signal: IdleChannelSignal = None  # wakes Station and Gnb nodes waiting for the idle channel
+    frame_stats: Dict[str, FrameStats] = None  # aggregated frame statistics per node, None when not collected
 
 
 def single_run_test(
@@ -1392,17 +1557,10 @@ def single_run_test(
         gnb_number: int,
         simulation_time: int,
 ):
-    backoffs = {key: {stations_number: 0} for key in range(63 + 1)}
-    airtime_data = {"Station {}".format(i): 0 for i in range(1, stations_number + 1)}
-    airtime_control = {"Station {}".format(i): 0 for i in range(1, stations_number + 1)}
-    airtime_data_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
-    airtime_control_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
-    # run_simulation(stations_number, gnb_number, seeds, simulation_time, Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
-    #                backoffs, airtime_data, airtime_control)
+    # run_simulation(stations_number, gnb_number, seeds, simulation_time, Config(payload_size, cw_min, cw_max, r_limit, mcs_value))
     run_simulation(stations_number, gnb_number, seeds, simulation_time,
                    Config(),
-                   Config_NR(),
-                   backoffs, airtime_data, airtime_control, airtime_data_NR, airtime_control_NR)
+                   Config_NR())
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
 import math
 
+# The simulation clock counts integer ticks of exactly 1 us: every duration scheduled by an engine is an int, so event
+# times are compared as ints and slot arithmetic is exact. The us constants of this module and of the engines (slots,
+# DIFS, ACK, frame lengths) are used as ticks as they are, configured durations are checked with to_ticks.
+
 MCS = {
     0: [6, 6],
     1: [9, 6],
@@ -12,6 +16,23 @@ MCS = {
 }
 
 
+def to_ticks(duration, name="duration"):
+    # duration in us as an int number of clock ticks, durations which are not whole us are rejected. Ticks are us,
+    # so converting a duration which is already in ticks returns it unchanged
+    ticks = round(duration)
+    if abs(duration - ticks) > 1e-6:
+        raise ValueError(f"{name} = {duration} us is not a whole number of 1 us clock ticks")
+    return ticks
+
+
+def seconds_to_ticks(seconds, name="simulation_time"):
+    return to_ticks(seconds * 1000000, name)
+
+
+def ticks_to_seconds(ticks):
+    return ticks / 1000000
+
+
 class Times:
 
     t_slot = 9  # [us]
@@ -0,0 +1,187 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from coexistanceSimpy.Coexistence import Config, Config_NR, Times, gap
+
+# Analytic (Bianchi-style) model of saturated Wi-Fi DCF and NR-U LBE coexistence.
+#
+# Every node draws its attempts in idle slots independently with the probability given by its backoff chain and its
+# collision probability (Bianchi's decoupling), the collision probabilities follow from the attempt probabilities of
+# the other nodes and the two are solved as a fixed point. Time is a sequence of cycles: an idle period (DIFS /
+# prioritization period and backoff slots) ended by the first node(s) starting to transmit, then the busy period.
+# The idle period is computed on a 1 us grid from the survival functions of both technologies, so the NR-U gap mode
+# (a gNB counts its backoff only right before its sync slot boundary, the gap before it is random) is covered too.
+
+FRAME_TIME = 5400  # Wi-Fi frame length used by Station.generate_new_frame, us
+SURVIVAL_CUTOFF = 1e-12  # idle periods longer than this probability are not integrated
+
+
+@dataclass()
+class AnalyticResult:
+    # expected KPIs of the saturated scenario, named as in SimulationResult
+    config: Config
+    config_nr: Config_NR
+    number_of_stations: int
+    number_of_gnb: int
+    p_coll: float
+    channel_occupancy: float
+    channel_efficiency: float
+    p_coll_NR: float
+    channel_occupancy_NR: float
+    channel_efficiency_NR: float
+    iterations: int  # fixed point iterations
+
+    @property
+    def channel_occupancy_all(self):
+        return self.channel_occupancy + self.channel_occupancy_NR
+
+    @property
+    def channel_efficiency_all(self):
+        return self.channel_efficiency + self.channel_efficiency_NR
+
+    @property
+    def fairness(self):
+        occupancy = self.channel_occupancy ** 2 + self.channel_occupancy_NR ** 2
+        return (self.channel_occupancy_all ** 2) / (2 * occupancy) if occupancy else 0.0
+
+    @property
+    def joint(self):
+        return self.fairness * self.channel_occupancy_all
+
+
+def attempt_probability(p, cw_min, cw_max, retry_limit=None):
+    # probability that a saturated node transmits in an idle slot for the collision probability p, backoff stage j has
+    # the window min(2^j * (cw_min + 1), cw_max + 1); after retry_limit retransmissions the stage is reset to 0,
+    # without the limit the node stays in the last stage until it succeeds
+    p = min(p, 1 - 1e-12)
+    attempts = 0.0
+    slots = 0.0  # mean backoff slots of the attempts plus the slot of the attempt itself
+    stage = 0
+    while True:
+        window = min(pow(2, stage) * (cw_min + 1), cw_max + 1)
+        if retry_limit is not None and stage == retry_limit:
+            attempts += pow(p, stage)
+            slots += pow(p, stage) * (window + 1) / 2
+            break
+        if retry_limit is None and window == cw_max + 1:  # geometric tail of the last stage
+            attempts += pow(p, stage) / (1 - p)
+            slots += pow(p, stage) / (1 - p) * (window + 1) / 2
+            break
+        attempts += pow(p, stage)
+        slots += pow(p, stage) * (window + 1) / 2
+        stage += 1
+    return attempts / slots
+
+
+def survival_length(pre, slot, attempt, cutoff=SURVIVAL_CUTOFF):
+    # time after which the node (or technology) transmitting with probability attempt per slot surely started
+    if attempt <= 0:
+        return math.inf
+    if attempt >= 1:
+        return pre + slot
+    return pre + slot * (math.log(cutoff) / math.log(1 - attempt) + 1)
+
+
+def survival(t, pre, slot, attempt):
+    # P(no transmission started at or before t), transmissions start at pre + k * slot, k >= 0
+    started_slots = np.where(t < pre, 0, (t - pre) // slot + 1)
+    return np.power(1 - attempt, started_slots)
+
+
+def gnb_survival(t, pre, slot, attempt, sync_slot):
+    # gNB survival averaged over the gap before its countdown: none (sync_slot 0) or uniform in <1, sync_slot> us
+    if not sync_slot:
+        return survival(t, pre, slot, attempt)
+    u = np.arange(-sync_slot, len(t))  # t - gap for every gap, t is 0..len(t) - 1
+    cumulative = np.concatenate(([0.0], np.cumsum(survival(u, pre, slot, attempt))))
+    # mean over gap = 1..sync_slot of survival(t - gap), u index of t - gap is t - gap + sync_slot
+    return (cumulative[t + sync_slot] - cumulative[t]) / sync_slot
+
+
+def analytic_estimate(
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        gap_mode: bool = gap,
+        tolerance: float = 1e-9,
+        max_iterations: int = 1000,
+) -> AnalyticResult:
+    times = Times(config.data_size, config.mcs)
+    success_time = FRAME_TIME + times.get_ack_frame_time()
+    collision_time = FRAME_TIME + Times.ack_timeout
+    nr_time = configNr.transmission_time
+    sync_slot = configNr.synchronization_slot_duration if gap_mode else 0
+    nr_pre = configNr.deter_period + configNr.M * configNr.observation_slot_duration
+    nr_slot = configNr.observation_slot_duration
+    # a collision with a gNB lasts as long as the longer transmission, the holder of the channel decides the end
+    mixed_collision_time = nr_time if nr_time >= FRAME_TIME else collision_time
+    rs_time = 0 if gap_mode else (configNr.synchronization_slot_duration + 1) / 2  # mean reservation signal
+
+    if number_of_stations == 0 and number_of_gnb == 0:
+        return AnalyticResult(config, configNr, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0)
+
+    p_wifi, p_nr = 0.0, 0.0
+    for iteration in range(1, max_iterations + 1):
+        tau_wifi = attempt_probability(p_wifi, config.cw_min, config.cw_max, config.r_limit)
+        tau_nr = attempt_probability(p_nr, configNr.cw_min, configNr.cw_max)
+        wifi_attempt = 1 - pow(1 - tau_wifi, number_of_stations)  # any station transmits in a slot
+
+        # grid long enough for the idle period to end with certainty
+        length = min(survival_length(Times.t_difs, Times.t_slot, wifi_attempt) if number_of_stations else math.inf,
+                     sync_slot + survival_length(nr_pre, nr_slot, tau_nr) if number_of_gnb else math.inf)
+        t = np.arange(int(length) + 1)
+        wifi = survival(t, Times.t_difs, Times.t_slot, wifi_attempt) if number_of_stations else np.ones(len(t))
+        gnb = gnb_survival(t, nr_pre, nr_slot, tau_nr, sync_slot) if number_of_gnb else np.ones(len(t))
+        wifi_before = np.concatenate(([1.0], wifi[:-1]))  # survival up to t - 1
+        gnb_before = np.concatenate(([1.0], gnb[:-1]))
+        wifi_starts = wifi_before - wifi  # P(first station transmission starts at t)
+        gnb_starts = gnb_before - gnb
+
+        others = np.power(gnb, max(number_of_gnb - 1, 0))
+        others_before = np.power(gnb_before, max(number_of_gnb - 1, 0))
+        gnb_attempts = float(np.sum(gnb_starts * wifi_before * others_before))  # of a gNB per cycle
+        gnb_successes = float(np.sum(gnb_starts * wifi * others))
+        all_gnbs = np.power(gnb, number_of_gnb)
+        wifi_cycles = float(np.sum(wifi_starts * np.power(gnb_before, number_of_gnb)))  # started by stations
+        wifi_only_cycles = float(np.sum(wifi_starts * all_gnbs))  # no gNB starts with them
+
+        new_p_nr = 1 - gnb_successes / gnb_attempts if gnb_attempts > 0 else 0.0
+        alone = pow(1 - tau_wifi, number_of_stations - 1) if number_of_stations else 0.0
+        new_p_wifi = 1 - alone * (wifi_only_cycles / wifi_cycles) if wifi_cycles > 0 else 0.0
+
+        converged = abs(new_p_wifi - p_wifi) < tolerance and abs(new_p_nr - p_nr) < tolerance
+        p_wifi = (p_wifi + new_p_wifi) / 2  # damped, plain iteration oscillates for many nodes
+        p_nr = (p_nr + new_p_nr) / 2
+        if converged:
+            break
+
+    wifi_single = number_of_stations * tau_wifi * pow(1 - tau_wifi, number_of_stations - 1) / wifi_attempt \
+        if number_of_stations else 0.0
+    wifi_successes = wifi_only_cycles * wifi_single  # per cycle
+    idle_time = float(np.sum(wifi * all_gnbs))
+    cycle_time = (idle_time + wifi_successes * success_time + (wifi_only_cycles - wifi_successes) * collision_time
+                  + (wifi_cycles - wifi_only_cycles) * mixed_collision_time + (1 - wifi_cycles) * nr_time)
+    nr_successes = number_of_gnb * gnb_successes
+
+    return AnalyticResult(
+        config, configNr, number_of_stations, number_of_gnb,
+        p_wifi, wifi_successes * success_time / cycle_time, wifi_successes * FRAME_TIME / cycle_time,
+        p_nr, nr_successes * nr_time / cycle_time, nr_successes * (nr_time - rs_time) / cycle_time,
+        iteration,
+    )
+
+
+def format_analytic_result(result: AnalyticResult) -> str:
+    # the first line of Coexistence.format_result with the expected values
+    return (f"ANALYTIC N_stations:={result.number_of_stations} N_gNB:={result.number_of_gnb}  "
+            f"CW_MIN = {result.config.cw_min} CW_MAX = {result.config.cw_max} "
+            f"WiFi pcol:={result.p_coll:.4f} WiFi cot:={result.channel_occupancy} "
+            f"WiFi eff:={result.channel_efficiency} "
+            f"gNB pcol:={result.p_coll_NR:.4f} gNB cot:={result.channel_occupancy_NR} "
+            f"gNB eff:={result.channel_efficiency_NR} "
+            f" all cot:={result.channel_occupancy_all} all eff:={result.channel_efficiency_all}\n"
+            f"fairness: {result.fairness}\n"
+            f"joint: {result.joint}")
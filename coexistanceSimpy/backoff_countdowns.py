@@ -0,0 +1,110 @@
+import numpy as np
+
+NEVER = np.iinfo(np.int64).max  # deadline of nodes which are not counting down (or are frozen)
+
+
+class BackoffCountdowns:
+    # Backoff countdowns of all nodes sharing the channel. Nothing is done per waiting node when the channel becomes
+    # busy: the countdowns are frozen in bulk and their deadlines are recomputed in bulk when the channel is idle again.
+    # Engine agnostic: clock has to provide `now`, schedule(delay, callback) calls callback(argument) after the delay
+    # and every node provides back_off_waited() which is called when its countdown ends.
+    def __init__(self, clock, schedule):
+        self.clock = clock
+        self.schedule = schedule
+        self.nodes = []
+        self.pre = np.zeros(0, dtype=np.int64)  # DIFS / prioritization period, slots are counted after it
+        self.slot = np.zeros(0, dtype=np.int64)  # slot duration
+        self.desync = np.zeros(0, dtype=np.int64)  # first sync slot boundary
+        self.sync_slot = np.zeros(0, dtype=np.int64)  # 0 if the countdown does not have to end on a sync slot boundary
+        self.remaining = np.zeros(0, dtype=np.int64)  # remaining backoff without DIFS / prioritization period
+        self.start = np.zeros(0, dtype=np.int64)  # when the countdown starts in the current idle period
+        self.deadline = np.zeros(0, dtype=np.int64)
+        self.counting = np.zeros(0, dtype=bool)
+        self.busy = False
+        self.wakeup = None  # deadline of the only wakeup which is still valid
+
+    def add_node(self, node, pre, slot):
+        self.nodes.append(node)
+        self.pre = np.append(self.pre, pre)
+        self.slot = np.append(self.slot, slot)
+        self.desync = np.append(self.desync, 0)
+        self.sync_slot = np.append(self.sync_slot, 0)
+        self.remaining = np.append(self.remaining, 0)
+        self.start = np.append(self.start, 0)
+        self.deadline = np.append(self.deadline, NEVER)
+        self.counting = np.append(self.counting, False)
+        return len(self.nodes) - 1
+
+    def align(self, index, desync, sync_slot):
+        # the countdown of the node ends on the sync slot boundary, the gap before it is not counted
+        self.desync[index] = desync
+        self.sync_slot[index] = sync_slot
+
+    def aligned_start(self, now, countdown):
+        # countdown starts now, or after the gap so it ends on the first sync slot boundary later than now + countdown
+        end = now + countdown
+        desync = self.desync
+        sync_slot = self.sync_slot
+        boundary = np.where(end < desync, desync, desync + ((end - desync) // np.maximum(sync_slot, 1) + 1) * sync_slot)
+        return np.where(sync_slot > 0, boundary - countdown, now)
+
+    def count_down(self, index, remaining):
+        # starts the countdown of the node, while the channel is busy it starts with the next idle period
+        self.remaining[index] = remaining
+        self.counting[index] = True
+        if self.busy:
+            return
+        now = self.clock.now
+        countdown = int(self.pre[index]) + remaining
+        start = now
+        sync_slot = int(self.sync_slot[index])
+        if sync_slot:
+            desync = int(self.desync[index])
+            end = now + countdown
+            boundary = desync if end < desync else desync + ((end - desync) // sync_slot + 1) * sync_slot
+            start = boundary - countdown
+        self.start[index] = start
+        deadline = start + countdown
+        self.deadline[index] = deadline
+        if self.wakeup is None or deadline < self.wakeup:
+            self.schedule_wakeup(deadline, now)
+
+    def freeze(self):
+        # channel became busy, only the slots completed after DIFS / prioritization period decrease the backoffs
+        if self.busy:
+            return
+        self.busy = True
+        self.wakeup = None
+        self.deadline[:] = NEVER
+        # computed for all nodes, remaining backoff of the nodes which are not counting is set again by count_down
+        waited = np.maximum(self.clock.now - self.start - self.pre, 0)
+        self.remaining -= waited // self.slot * self.slot
+
+    def resume(self):
+        # channel became idle, all frozen countdowns start again
+        self.busy = False
+        now = self.clock.now
+        countdown = self.pre + self.remaining
+        self.start = self.aligned_start(now, countdown)
+        self.deadline = np.where(self.counting, self.start + countdown, NEVER)
+        deadline = int(self.deadline.min())
+        if deadline != NEVER:
+            self.schedule_wakeup(deadline, now)
+
+    def schedule_wakeup(self, deadline, now):
+        self.wakeup = deadline
+        self.schedule(deadline - now, self.wake)
+
+    def wake(self, _):
+        now = self.clock.now
+        if self.busy or now != self.wakeup:  # countdowns were frozen or an earlier wakeup was scheduled meanwhile
+            return
+        self.wakeup = None
+        finished = np.flatnonzero(self.deadline == now)
+        self.counting[finished] = False
+        self.deadline[finished] = NEVER
+        deadline = int(self.deadline.min())
+        if deadline != NEVER:
+            self.schedule_wakeup(deadline, now)
+        for index in finished.tolist():  # all nodes ending the backoff at this instant are released together
+            self.nodes[index].back_off_waited()
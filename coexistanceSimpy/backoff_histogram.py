@@ -0,0 +1,49 @@
+from typing import Dict
+
+import numpy as np
+
+from coexistanceSimpy.channel_state import NR, WIFI
+
+HISTOGRAM_TECHNOLOGIES = [WIFI, NR]  # technologies drawing random backoffs, one histogram row each
+
+
+class BackoffHistogram:
+    # Counts of drawn backoff values (in slots): counts[row of the technology, backoff]
+    def __init__(self, max_back_off: int):
+        self.rows = {technology: row for row, technology in enumerate(HISTOGRAM_TECHNOLOGIES)}
+        self.counts = np.zeros((len(HISTOGRAM_TECHNOLOGIES), max_back_off + 1), dtype=np.int64)
+
+    def add(self, technology: str, back_off: int):
+        self.counts[self.rows[technology], back_off] += 1
+
+    def merge(self, other: "BackoffHistogram"):
+        # histograms of runs with different contention windows are merged too, the narrower one is padded with zeros
+        if other.counts.shape[1] > self.counts.shape[1]:
+            self.counts = np.pad(self.counts, ((0, 0), (0, other.counts.shape[1] - self.counts.shape[1])))
+        self.counts[:, :other.counts.shape[1]] += other.counts
+
+    def __getitem__(self, technology: str):
+        return self.counts[self.rows[technology]]
+
+    def __repr__(self):
+        return "BackoffHistogram(" + ", ".join(
+            f"{technology}={self[technology].sum()} draws" for technology in HISTOGRAM_TECHNOLOGIES) + ")"
+
+
+def save_backoff_histograms(path: str, histograms: Dict[str, BackoffHistogram]):
+    # single .npz file, one (technologies x backoffs) array per key, row order in "technologies"
+    np.savez_compressed(path, technologies=np.array(HISTOGRAM_TECHNOLOGIES),
+                        **{key: histogram.counts for key, histogram in histograms.items()})
+
+
+def load_backoff_histograms(path: str) -> Dict[str, BackoffHistogram]:
+    histograms = {}
+    with np.load(path) as arrays:
+        if list(arrays["technologies"]) != HISTOGRAM_TECHNOLOGIES:
+            raise ValueError(f"Unexpected histogram rows in {path}: {list(arrays['technologies'])}")
+        for key in arrays.files:
+            if key != "technologies":
+                histogram = BackoffHistogram(arrays[key].shape[1] - 1)
+                histogram.counts = arrays[key]
+                histograms[key] = histogram
+    return histograms
@@ -0,0 +1,46 @@
+WIFI = "wifi"  # Station
+NR = "nr"  # Gnb (NR-U LBE)
+NR_FBE = "nr_fbe"  # FBE stations
+
+TECHNOLOGIES = [WIFI, NR, NR_FBE]
+
+
+class ChannelState:
+    # Nodes transmitting in the channel (per technology) and FBE nodes sensing it. Dicts are used as insertion ordered
+    # sets and every node carries its membership flags, so joining, leaving and counting are O(1).
+    def __init__(self):
+        self.transmitting = {technology: {} for technology in TECHNOLOGIES}
+        self.sensing = {}  # FBE nodes in CCA or channel monitoring
+        self.transmitter_count = 0  # all transmitting nodes, whatever the technology
+
+    def start_transmission(self, node, technology):
+        self.transmitting[technology][node] = None
+        node.transmitting = True
+        self.transmitter_count += 1
+
+    def end_transmission(self, node, technology):
+        del self.transmitting[technology][node]
+        node.transmitting = False
+        self.transmitter_count -= 1
+
+    def end_all_transmissions(self, *technologies):
+        for technology in technologies:
+            transmitting = self.transmitting[technology]
+            for node in transmitting:
+                node.transmitting = False
+            self.transmitter_count -= len(transmitting)
+            transmitting.clear()
+
+    def transmitters(self, technology):
+        return self.transmitting[technology].keys()
+
+    def start_sensing(self, node):
+        self.sensing[node] = None
+        node.sensing = True
+
+    def stop_sensing(self, node):
+        del self.sensing[node]
+        node.sensing = False
+
+    def sensing_nodes(self):
+        return self.sensing.keys()
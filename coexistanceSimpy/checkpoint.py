@@ -0,0 +1,93 @@
+import os
+import pickle
+
+from coexistanceSimpy.Coexistence import (Config, Config_NR, SimulationResult, simulation_channel,
+                                          simulation_result)
+from coexistanceSimpy.heap_engine import HeapSimulation
+from coexistanceSimpy.Times import seconds_to_ticks, ticks_to_seconds
+
+# Checkpoints of long Wi-Fi / NR-U LBE runs. SimPy processes are generators which cannot be pickled, the heap engine
+# keeps all of its state (calendar, pending callbacks, node state machines, random streams, counters and the channel)
+# in plain objects, so a run is pickled as a whole between two calendar.run calls and continues bit-identically.
+
+CHECKPOINT_VERSION = 1  # checkpoints of another version are not loaded
+
+
+def check_interval(interval: float):
+    # a run with interval <= 0 would never get past its first checkpoint
+    if interval <= 0:
+        raise ValueError(f"Checkpoint interval must be positive, got {interval}")
+
+
+def checkpoint_path(checkpoint_dir: str, number_of_stations: int, number_of_gnb: int, seed) -> str:
+    return os.path.join(checkpoint_dir, f"lbe_{number_of_stations}_{number_of_gnb}_{seed}.pickle")
+
+
+def save_checkpoint(path: str, arguments: tuple, interval: float, simulation: HeapSimulation):
+    # written next to the previous checkpoint and renamed, a run killed while writing keeps the previous one
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        pickle.dump({"version": CHECKPOINT_VERSION, "arguments": arguments, "interval": interval,
+                     "simulation": simulation}, file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str):
+    # (simulate() arguments of the run, checkpoint interval, HeapSimulation at the time of the checkpoint)
+    with open(path, "rb") as file:
+        checkpoint = pickle.load(file)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is a checkpoint of version {checkpoint.get('version')}, "
+                         f"expected {CHECKPOINT_VERSION}")
+    return checkpoint["arguments"], checkpoint["interval"], checkpoint["simulation"]
+
+
+def run_with_checkpoints(path: str, interval: float, arguments: tuple, simulation: HeapSimulation) -> SimulationResult:
+    # runs the simulation to its end saving it every interval s, the checkpoint is removed when the run is finished
+    check_interval(interval)
+    resumed_from = ticks_to_seconds(simulation.now) if simulation.now > 0 else None
+    config, configNr, number_of_stations, number_of_gnb, seed, simulation_time, frame_stats = arguments
+    end = seconds_to_ticks(simulation_time)
+    while simulation.now < end:
+        until = min(simulation.now + seconds_to_ticks(interval, "checkpoint_interval"), end)
+        simulation.run(until)
+        if until < end:
+            save_checkpoint(path, arguments, interval, simulation)
+    if os.path.exists(path):
+        os.remove(path)
+    result = simulation_result(config, configNr, seed, simulation_time, simulation.channel, simulation.stations,
+                               simulation.gnbs)
+    result.resumed_from = resumed_from
+    return result
+
+
+def simulate_with_checkpoints(
+        checkpoint_dir: str,
+        interval: float,
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        seed: int,
+        simulation_time: float,
+        frame_stats: bool = False,
+) -> SimulationResult:
+    # simulate() on the heap engine, continues from the checkpoint of the same run in checkpoint_dir if there is one
+    arguments = (config, configNr, number_of_stations, number_of_gnb, seed, simulation_time, frame_stats)
+    path = checkpoint_path(checkpoint_dir, number_of_stations, number_of_gnb, seed)
+    if os.path.exists(path):
+        saved_arguments, _, simulation = load_checkpoint(path)
+        if saved_arguments != arguments:
+            raise ValueError(f"{path} is a checkpoint of another run: {saved_arguments}")
+    else:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        channel = simulation_channel(config, configNr, number_of_stations, number_of_gnb, simulation_time, frame_stats)
+        simulation = HeapSimulation(number_of_stations, number_of_gnb, seed, config, configNr, channel)
+    return run_with_checkpoints(path, interval, arguments, simulation)
+
+
+def resume_simulation(path: str, interval: float = None) -> SimulationResult:
+    # finishes the run saved in the checkpoint file, by default with the interval of the checkpointed run
+    arguments, saved_interval, simulation = load_checkpoint(path)
+    return run_with_checkpoints(path, saved_interval if interval is None else interval, arguments, simulation)
@@ -0,0 +1,48 @@
+from array import array
+
+# Changes of DB-FBE counters (backoff, interrupt counter) recorded during a run. A change costs a few appends to typed
+# arrays: the time as a delta from the previous change, the value and the index of the station name (registered once
+# per station with station_index), so a run keeps 20-21 bytes per change instead of a Python object per field. The
+# dict of lists read by pandas (plots and CSV files) is built only by as_dict().
+
+
+class CounterChanges:
+    def __init__(self, value_key: str, with_init: bool = False):
+        self.value_key = value_key  # column of the values in as_dict()
+        self.time_deltas = array("q")
+        self.values = array("q")
+        self.stations = array("i")  # index in names
+        self.is_init = array("b") if with_init else None  # "is_init" column, only for the changes which have it
+        self.names = []
+        self.indexes = {}  # station name -> index in names
+        self.last_time = 0
+
+    def station_index(self, station_name: str) -> int:
+        index = self.indexes.get(station_name)
+        if index is None:
+            index = self.indexes[station_name] = len(self.names)
+            self.names.append(station_name)
+        return index
+
+    def add(self, time: int, value: int, station_index: int, is_init: bool = False):
+        self.time_deltas.append(time - self.last_time)
+        self.last_time = time
+        self.values.append(value)
+        self.stations.append(station_index)
+        if self.is_init is not None:
+            self.is_init.append(is_init)
+
+    def __len__(self):
+        return len(self.values)
+
+    def as_dict(self):
+        times = []
+        time = 0
+        for delta in self.time_deltas:
+            time += delta
+            times.append(time)
+        changes = {"time": times, self.value_key: self.values.tolist(),
+                   "station_name": [self.names[index] for index in self.stations]}
+        if self.is_init is not None:
+            changes["is_init"] = [bool(is_init) for is_init in self.is_init]
+        return changes
@@ -0,0 +1,300 @@
+import heapq
+import math
+
+from coexistanceSimpy import logger_util
+from coexistanceSimpy.channel_state import NR_FBE
+from coexistanceSimpy.Coexistence import Channel, EventType, FBEPhase
+from coexistanceSimpy.logger_util import station_log
+from coexistanceSimpy.random_streams import node_stream
+
+# FBE stations stepped from decision point to decision point on a single heap. What a station does is its program
+# (FBE.phases in Coexistence.py, the same one the SimPy engine runs), this engine only gives the phases their timing:
+# a wait ends after its length, a CCA, channel monitoring or transmission is an interval [start, end) whose end is
+# known when it starts. Every station has one pending decision point, the end of its current phase. Overlaps are
+# resolved with interval arithmetic when all decision points of an instant were handled: a transmission starting
+# inside the sensing interval of a station cuts it (an interrupted CCA ends as long after the cut as it ran before
+# it, a CCA cut at its start after a full CCA, the channel monitoring keeps its end) and the stations starting to
+# transmit at the instant collide with each other and with the transmission holding the channel alone, which then
+# ends one COT after the cut. Decision points of the same instant are handled in the order they were scheduled, like
+# the timeouts of SimPy, so the engine gives the same results, events, DB-FBE counter changes and station logs as the
+# SimPy engine for the same seed.
+
+WAIT = "wait"  # stages of a station: the phases and the steps of a transmission
+CCA = "cca"
+MONITOR = "monitor"
+STARTING = "starting"  # transmission started, its collision is decided at the end of the instant
+TRANSMITTING = "transmitting"
+SIMULATION_END = "simulation_end"  # last tick of a transmission cut by the end of the simulation
+COLLIDED = "collided"
+
+
+class DecisionCalendar:
+    # heap of (time, sequence, station, version) of the next decision point of every station, an entry is stale once
+    # the station was rescheduled
+    def __init__(self):
+        self.now = 0
+        self.queue = []
+        self.sequence = 0  # keeps the order in which the decision points of the same instant were scheduled
+        self.end_of_instant = None  # called when all decision points of an instant were handled
+        self.check_time = math.inf  # check() is called once the calendar gets there, before the instant is handled
+        self.check = None
+
+    def schedule(self, station, delay):
+        if delay < 0:
+            raise ValueError(f'Negative delay {delay}')
+        station.version += 1
+        heapq.heappush(self.queue, (self.now + delay, self.sequence, station, station.version))
+        self.sequence += 1
+
+    def run(self, until):
+        # decision points at until are not handled, like in env.run(until)
+        queue = self.queue
+        while True:
+            if queue and queue[0][0] == self.now:
+                _, _, station, version = heapq.heappop(queue)
+                if version == station.version:
+                    station.decide()
+            elif self.end_of_instant():
+                continue
+            elif queue and queue[0][0] < until:
+                if queue[0][0] >= self.check_time:
+                    self.now = self.check_time
+                    self.check()
+                else:
+                    self.now = queue[0][0]
+            else:
+                break
+        self.now = until
+
+
+class TransmissionArbiter:
+    # stations starting to transmit at the same instant, the station transmitting alone (holder)
+    def __init__(self, calendar: DecisionCalendar, channel: Channel):
+        self.calendar = calendar
+        self.state = channel.state
+        self.starters = []
+        self.holder = None
+        calendar.end_of_instant = self.resolve
+
+    def contend(self, station):
+        self.starters.append(station)
+
+    def resolve(self):
+        # returns False when no transmission started at the instant
+        starters = self.starters
+        if not starters:
+            return False
+        self.starters = []
+        cut = list(self.state.sensing_nodes())
+        if logger_util.enabled:
+            for station in cut:
+                station_log(station.station, "CCA interrupted by a transmission start")
+        collision = len(starters) > 1 or self.state.transmitter_count > len(starters)
+        holder = None
+        if collision and self.holder is not None:
+            holder = self.holder
+            self.holder = None
+            if logger_util.enabled:
+                station_log(holder.station, "Transmission interrupted by a transmission start")
+        elif not collision:
+            self.holder = starters[0]
+        for station in cut:
+            station.cut_sensing()
+        if holder is not None:
+            holder.collide()
+        for station in starters:
+            station.transmit(collision)
+        return True
+
+    def end_transmission(self, station):
+        if self.holder is station:
+            self.holder = None
+
+
+class FBEStepper:
+    # runs the program of an FBE station, results and bookkeeping (sent_completed, sent_failed, event and DB-FBE
+    # dicts, logs) go through the methods of the station object itself
+    def __init__(self, station, calendar: DecisionCalendar, arbiter: TransmissionArbiter, channel: Channel):
+        self.station = station
+        self.timers = station.timers
+        self.calendar = calendar
+        self.arbiter = arbiter
+        self.channel = channel
+        self.state = channel.state
+        self.program = station.phases()
+        self.version = 0  # number of the pending decision point, see DecisionCalendar
+        self.stage = WAIT
+        self.transmitting = False  # membership flags set by the channel state
+        self.sensing = False
+        self.cut = False  # the sensing interval was cut by a transmission
+        self.start = 0  # start of the sensing interval or of the transmission
+        self.transmission_end = 0  # end of the transmission in its event
+        self.remained_time = 0  # time from the start of the transmission to the end of the simulation
+        self.decisions = {WAIT: self.next_phase, CCA: self.cca_end, MONITOR: self.monitor_end,
+                          TRANSMITTING: self.transmission_ended, SIMULATION_END: self.release,
+                          COLLIDED: self.collision_end}
+
+    def decide(self):
+        self.decisions[self.stage]()
+
+    def next_phase(self):
+        phase = next(self.program)
+        if phase is FBEPhase.CCA:
+            self.start_cca()
+        elif phase is FBEPhase.TRANSMISSION:
+            self.start_transmission()
+        elif phase is FBEPhase.MONITOR:
+            self.start_monitor()
+        else:
+            self.stage = WAIT
+            self.calendar.schedule(self, phase)
+
+    def start_sensing(self, stage):
+        # True when the channel is idle at the start of the sensing interval
+        self.stage = stage
+        self.start = self.calendar.now
+        self.cut = False
+        self.state.start_sensing(self)
+        return self.state.transmitter_count == 0
+
+    def cut_sensing(self):
+        if self.stage == CCA:
+            self.cut_cca()
+        else:
+            self.cut_monitor()
+
+    def start_cca(self):
+        idle = self.start_sensing(CCA)
+        if logger_util.enabled:
+            station_log(self.station, "Sensing if channel is idle")
+        if idle:
+            self.calendar.schedule(self, self.timers.cca)
+        else:
+            self.cut_cca()
+
+    def cut_cca(self):
+        diff = self.calendar.now - self.start
+        if logger_util.enabled:
+            station_log(self.station, "CCA interrupted, skipping next FFP")
+        self.state.stop_sensing(self)
+        self.cut = True
+        self.calendar.schedule(self, self.timers.cca if diff == 0 else diff)
+
+    def cca_end(self):
+        if self.cut:
+            self.station.skip_next_cot = True
+        else:
+            self.station.skip_next_cot = False
+            self.state.stop_sensing(self)
+        self.next_phase()
+
+    def start_monitor(self):
+        if self.start_sensing(MONITOR):
+            self.calendar.schedule(self, self.station.monitor_time)
+        else:
+            if logger_util.enabled:
+                station_log(self.station, "Channel monitoring failed at the beginning")
+            self.cut_monitor()
+
+    def cut_monitor(self):
+        station = self.station
+        diff = self.calendar.now - self.start
+        self.state.stop_sensing(self)
+        station.increment_interrupt_counter()
+        station.incremented_during_monitor = True
+        if logger_util.enabled:
+            station_log(station, "Incrementing interrupt_counter. Actual value: %s. Incremented during monitor: %s. "
+                        "Time to finish monitor mode: %s",
+                        station.interrupt_counter, station.incremented_during_monitor, station.monitor_time - diff)
+        self.cut = True
+        self.calendar.schedule(self, station.monitor_time - diff)
+
+    def monitor_end(self):
+        if not self.cut:
+            self.state.stop_sensing(self)
+        self.next_phase()
+
+    def start_transmission(self):
+        # the collision is decided by the arbiter at the end of the instant (transmit)
+        self.stage = STARTING
+        self.state.start_transmission(self, NR_FBE)
+        self.start = self.calendar.now
+        self.transmission_end = self.start + self.timers.cot
+        if logger_util.enabled:
+            station_log(self.station, "Starting transmission")
+        self.arbiter.contend(self)
+
+    def transmit(self, collision):
+        if collision:
+            self.collide()
+            return
+        self.remained_time = self.channel.simulation_time - self.start
+        if self.remained_time < self.timers.cot:
+            if logger_util.enabled:
+                station_log(self.station, "Transmission interrupted by simulation end. COT len = %s. Time remained: %s",
+                            self.timers.cot, self.remained_time)
+            self.station.handle_sim_end = True
+            self.transmission_end = self.start + self.remained_time
+            delay = self.remained_time - 1  # one tick before the end of the simulation, as in the SimPy engine
+        else:
+            delay = self.timers.cot
+        self.stage = TRANSMITTING
+        self.calendar.schedule(self, delay)
+
+    def transmission_ended(self):
+        station = self.station
+        if self.state.transmitter_count > 1:
+            if logger_util.enabled:
+                station_log(station, "Collision in channel detected after transmission")
+            station.sent_failed()
+            station.add_event_to_dict(EventType.CHANNEL_COLLISION.name, self.start, self.transmission_end)
+        else:
+            station.sent_completed(self.remained_time)
+            station.add_event_to_dict(EventType.SUCCESSFUL_TRANSMISSION.name, self.start, self.transmission_end)
+        if station.handle_sim_end is True:
+            self.stage = SIMULATION_END
+            self.calendar.schedule(self, 1)
+        else:
+            self.release()
+
+    def release(self):
+        self.arbiter.end_transmission(self)
+        self.state.end_transmission(self, NR_FBE)
+        self.next_phase()
+
+    def collide(self):
+        # the transmission collided, it ends one COT later whatever remained of it
+        if logger_util.enabled:
+            station_log(self.station, "Collision in channel detected during transmission. Time to end transmission: %s",
+                        self.timers.cot - (self.calendar.now - self.start))
+        self.stage = COLLIDED
+        self.calendar.schedule(self, self.timers.cot)
+
+    def collision_end(self):
+        self.station.sent_failed()
+        self.station.add_event_to_dict(EventType.CHANNEL_COLLISION.name, self.start, self.transmission_end)
+        self.state.end_transmission(self, NR_FBE)
+        self.next_phase()
+
+
+def run_fbe_engine(stations, channel: Channel, simulation_time: int, seed=None, extrapolate=True):
+    # env.run(until=simulation_time) of the stations with their programs run by FBEStepper instead of SimPy processes.
+    # Deterministic scenarios are extrapolated once their channel pattern repeats (extrapolate, see hyper_period.py),
+    # returns the HyperPeriodExtrapolation of such a scenario. Runs with station logs are simulated in full, so the logs
+    # cover the repeated periods too.
+    calendar = DecisionCalendar()
+    arbiter = TransmissionArbiter(calendar, channel)
+    steppers = []
+    for station in stations:
+        station.set_channel(channel)
+        station.env = calendar  # the bookkeeping methods and logs of the station read env.now
+        station.rng = node_stream(seed, station.name)
+        steppers.append(FBEStepper(station, calendar, arbiter, channel))
+        calendar.schedule(steppers[-1], 0)  # stations start in their order, like the processes of SimPy
+    extrapolation = None
+    if extrapolate and not logger_util.enabled:
+        from coexistanceSimpy.hyper_period import HyperPeriodExtrapolation, is_periodic  # it imports this module
+        if is_periodic(stations):
+            extrapolation = HyperPeriodExtrapolation(calendar, steppers, arbiter, channel, simulation_time)
+    calendar.run(simulation_time)
+    return extrapolation
@@ -0,0 +1,58 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from coexistanceSimpy.Coexistence import Config, Config_NR, SimulationResult, simulation_channel, simulation_result
+from coexistanceSimpy.heap_engine import HeapSimulation
+from coexistanceSimpy.Times import seconds_to_ticks
+
+# Forked Wi-Fi / NR-U LBE runs: a scenario is warmed up once on the heap engine, its state is pickled (a snapshot) and
+# every continuation starts from a copy of it with its own Config / Config_NR. The results of a continuation cover
+# only its own simulated time, the warm-up is not counted. Continuations of a snapshot share the random streams of
+# the warm-up (common random numbers), so they differ only by their parameters.
+
+
+def warm_up(
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        seed: int,
+        warm_up_time: float,
+        frame_stats: bool = False,
+) -> bytes:
+    # snapshot of the scenario after warm_up_time s
+    channel = simulation_channel(config, configNr, number_of_stations, number_of_gnb, warm_up_time, frame_stats)
+    simulation = HeapSimulation(number_of_stations, number_of_gnb, seed, config, configNr, channel)
+    simulation.run(seconds_to_ticks(warm_up_time, "warm_up_time"))
+    return pickle.dumps((seed, simulation), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def continue_run(snapshot: bytes, config: Config, configNr: Config_NR, simulation_time: float) -> SimulationResult:
+    # runs a copy of the snapshot with the new parameters for simulation_time s
+    seed, simulation = pickle.loads(snapshot)
+    for station in simulation.stations:
+        station.reconfigure(config)
+    for gnb in simulation.gnbs:
+        gnb.reconfigure(configNr)
+    simulation.reset_statistics(max(config.cw_max, configNr.cw_max))
+    simulation.channel.simulation_time = seconds_to_ticks(simulation_time)
+    simulation.run(simulation.now + seconds_to_ticks(simulation_time))
+    return simulation_result(config, configNr, seed, simulation_time, simulation.channel, simulation.stations,
+                             simulation.gnbs)
+
+
+def continue_run_arguments(arguments):
+    return continue_run(*arguments)
+
+
+def run_forks(snapshot: bytes, continuations: List[Tuple[Config, Config_NR]], simulation_time: float, jobs=1):
+    # continuations of the snapshot, yielded in their order; jobs: worker processes (0 - one per CPU, 1 - no pool)
+    runs = [(snapshot, config, configNr, simulation_time) for config, configNr in continuations]
+    if jobs == 1:
+        for arguments in runs:
+            yield continue_run(*arguments)
+        return
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        yield from executor.map(continue_run_arguments, runs)
@@ -13,8 +13,7 @@ fbe_version_list = [FBEVersion.STANDARD_FBE,
 
 def run_single_station(station_number, ffp, cot, airtime_list, fbe_version):
     environment = simpy.Environment()
-    channel = Channel(None, simpy.Resource(environment, capacity=1), 0, 0, None, None, None, None, None,
-                      simulation_time)
+    channel = Channel(None, 0, 0, None, None, None, None, None, simulation_time)
     list_test = []
     timers = FBETimers(ffp, cot)
     if fbe_version == FBEVersion.STANDARD_FBE:
@@ -47,7 +46,7 @@ def run_multiple_stations(offsets, ffp, cot_list, fbe_versions):
     all_stations_sim_result_dict = {"station_name": [], "x": [], "y": []}
     for cot in cot_list:
         env = simpy.Environment()
-        channel = Channel(None, simpy.Resource(env, capacity=1), 0, 0, None, None, None, None, None, simulation_time)
+        channel = Channel(None, 0, 0, None, None, None, None, None, simulation_time)
         timers = FBETimers(ffp, cot)
         print('------------------------------------------')
         print('Cot = {}'.format(cot))
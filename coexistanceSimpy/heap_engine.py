@@ -0,0 +1,296 @@
+import heapq
+
+from coexistanceSimpy.backoff_countdowns import BackoffCountdowns
+from coexistanceSimpy.backoff_histogram import BackoffHistogram
+from coexistanceSimpy.channel_state import NR, WIFI
+from coexistanceSimpy.Coexistence import Channel, Config, Config_NR, Times, add_frame_stats, gap
+from coexistanceSimpy.random_streams import RandomStream, node_stream
+
+# priorities of callbacks scheduled for the same instant (lower goes first)
+IDLE = 0  # channel released by the node holding it
+READY = 1  # node finished its transmission (and ack / ack timeout)
+BACK_OFF_END = 2  # nodes finished counting down their backoffs
+ARBITRATION = 3  # every node starting to transmit at this instant is already known
+
+
+class EventCalendar:
+    # single heapq calendar driving all nodes, entries: (time, priority, sequence, callback, argument)
+    def __init__(self):
+        self.now = 0
+        self.queue = []
+        self.sequence = 0  # keeps FIFO order of callbacks with the same time and priority
+
+    def schedule(self, delay, priority, callback, argument=None):
+        heapq.heappush(self.queue, (self.now + delay, priority, self.sequence, callback, argument))
+        self.sequence += 1
+
+    def run(self, until):
+        queue = self.queue
+        while queue and queue[0][0] < until:
+            self.now, _, _, callback, argument = heapq.heappop(queue)
+            callback(argument)
+        self.now = until
+
+
+class Medium:
+    # shared channel state: backoff countdowns of all nodes and who contends right now
+    def __init__(self, calendar: EventCalendar, channel: Channel):
+        self.calendar = calendar
+        self.channel = channel  # Channel dataclass collecting the results, same as in the SimPy engine
+        self.countdowns = BackoffCountdowns(calendar, self.schedule_back_off_end)
+        self.channel.backoff_countdowns = self.countdowns
+        self.contenders = []  # (node, transmission time) of nodes starting to transmit at this instant
+
+    def schedule_back_off_end(self, delay, callback):
+        self.calendar.schedule(delay, BACK_OFF_END, callback)
+
+    def contend(self, node, transmission_time):
+        if not self.contenders:
+            self.calendar.schedule(0, ARBITRATION, self.arbitrate)
+        self.contenders.append((node, transmission_time))
+
+    def arbitrate(self, _):
+        contenders = self.contenders
+        self.contenders = []
+        collision = len(contenders) > 1
+        winner, transmission_time = max(contenders, key=lambda contender: contender[1])  # the longest frame wins
+        self.countdowns.freeze()  # channel is not idle anymore, stop all backoff countdowns
+        self.calendar.schedule(winner.channel_hold_time(transmission_time, collision), IDLE, self.release)
+        for node, _ in contenders:
+            node.transmission_started(collision)
+
+    def release(self, _):
+        self.countdowns.resume()
+
+
+class HeapStation:
+    # Station from Coexistence.py as an explicit state machine
+    def __init__(self, name: str, calendar: EventCalendar, medium: Medium, rng: RandomStream,
+                 config: Config = Config()):
+        self.config = config
+        self.times = Times(config.data_size, config.mcs)
+        self.name = name
+        self.calendar = calendar
+        self.medium = medium
+        self.channel = medium.channel
+        self.rng = rng
+        self.frame_time = 5400  # same constant frame length as in Station.generate_new_frame
+        self.frame_start = 0  # generation time of the frame which is next to send
+        self.number_of_retransmissions = 0  # retransmissions of the frame which is next to send
+        self.succeeded_transmissions = 0
+        self.failed_transmissions = 0
+        self.failed_transmissions_in_row = 0
+        self.cw_min = config.cw_min
+        self.cw_max = config.cw_max
+        self.countdown_index = medium.countdowns.add_node(self, Times.t_difs, Times.t_slot)
+        self.frame_stats = add_frame_stats(self.channel, name)
+        self.channel.airtime_data.update({name: 0})
+        self.channel.airtime_control.update({name: 0})
+        calendar.schedule(0, READY, self.start)
+
+    def reconfigure(self, config: Config):
+        # new parameters of a forked run, used from the next backoff / transmission on
+        self.config = config
+        self.times = Times(config.data_size, config.mcs)
+        self.cw_min = config.cw_min
+        self.cw_max = config.cw_max
+
+    def start(self, _=None):
+        back_off_time = self.generate_new_back_off_time(self.failed_transmissions_in_row)
+        self.medium.countdowns.count_down(self.countdown_index, back_off_time)  # starts with the next idle period
+
+    def back_off_waited(self):
+        self.medium.contend(self, self.frame_time)
+
+    def channel_hold_time(self, frame_time, collision):
+        return frame_time + (Times.ack_timeout if collision else self.times.get_ack_frame_time())
+
+    def transmission_started(self, collision):
+        self.calendar.schedule(self.frame_time, READY, self.frame_sent, collision)
+
+    def frame_sent(self, collision):
+        if collision:
+            self.sent_failed()
+            self.calendar.schedule(Times.ack_timeout, READY, self.start)
+        else:
+            self.sent_completed()
+            self.calendar.schedule(self.times.get_ack_frame_time(), READY, self.start)
+
+    def generate_new_back_off_time(self, failed_transmissions_in_row):
+        upper_limit = min((self.cw_min + 1 << failed_transmissions_in_row) - 1, self.cw_max)
+        back_off = self.rng.randint(0, upper_limit)
+        self.channel.backoffs.add(WIFI, back_off)
+        return back_off * Times.t_slot
+
+    def sent_failed(self):
+        self.number_of_retransmissions += 1
+        self.channel.failed_transmissions += 1
+        self.failed_transmissions += 1
+        self.failed_transmissions_in_row += 1
+        if self.number_of_retransmissions > self.config.r_limit:  # frame dropped, next one is generated
+            if self.frame_stats is not None:
+                self.frame_stats.dropped += 1
+            self.frame_start = self.calendar.now
+            self.number_of_retransmissions = 0
+            self.failed_transmissions_in_row = 0
+
+    def sent_completed(self):
+        now = self.calendar.now
+        if self.frame_stats is not None:
+            self.frame_stats.add(now - self.frame_start, self.number_of_retransmissions)
+        self.frame_start = now + self.times.get_ack_frame_time()  # next frame is generated after the ack
+        self.number_of_retransmissions = 0
+        self.channel.succeeded_transmissions += 1
+        self.succeeded_transmissions += 1
+        self.failed_transmissions_in_row = 0
+        self.channel.bytes_sent += self.config.data_size
+        self.channel.airtime_data[self.name] += self.frame_time
+        self.channel.airtime_control[self.name] += self.times.get_ack_frame_time()
+
+
+class HeapGnb:
+    # Gnb from Coexistence.py as an explicit state machine
+    def __init__(self, name: str, calendar: EventCalendar, medium: Medium, rng: RandomStream,
+                 config_nr: Config_NR = Config_NR()):
+        self.config_nr = config_nr
+        self.name = name
+        self.calendar = calendar
+        self.medium = medium
+        self.channel = medium.channel
+        self.rng = rng
+        self.transmission_time = config_nr.transmission_time
+        self.prioritization_period_time = config_nr.deter_period + config_nr.M * config_nr.observation_slot_duration
+        self.succeeded_transmissions = 0
+        self.failed_transmissions = 0
+        self.failed_transmissions_in_row = 0
+        self.cw_min = config_nr.cw_min
+        self.cw_max = config_nr.cw_max
+        self.desync = rng.randint(config_nr.min_sync_slot_desync, config_nr.max_sync_slot_desync)
+        self.countdown_index = medium.countdowns.add_node(self, self.prioritization_period_time,
+                                                          config_nr.observation_slot_duration)
+        if gap:  # backoff with prioritization period ends on a sync slot boundary
+            medium.countdowns.align(self.countdown_index, self.desync, config_nr.synchronization_slot_duration)
+        self.frame_stats = add_frame_stats(self.channel, name)
+        self.rs_time = 0
+        self.channel.airtime_data_NR.update({name: 0})
+        self.channel.airtime_control_NR.update({name: 0})
+        calendar.schedule(0, READY, self.start)
+
+    def reconfigure(self, config_nr: Config_NR):
+        # new parameters of a forked run, the timing of the prioritization period and sync slots is kept by the
+        # backoff countdowns so only the contention window and MCOT can change
+        fixed = ["deter_period", "observation_slot_duration", "synchronization_slot_duration", "max_sync_slot_desync",
+                 "min_sync_slot_desync", "M"]
+        changed = [name for name in fixed if getattr(config_nr, name) != getattr(self.config_nr, name)]
+        if changed:
+            raise ValueError(f"{', '.join(changed)} of a running gNB cannot be changed")
+        self.config_nr = config_nr
+        self.transmission_time = config_nr.transmission_time
+        self.cw_min = config_nr.cw_min
+        self.cw_max = config_nr.cw_max
+
+    def next_sync_slot_boundary(self, now):
+        if now < self.desync:
+            return self.desync
+        sync_slot = self.config_nr.synchronization_slot_duration
+        return self.desync + ((now - self.desync) // sync_slot + 1) * sync_slot
+
+    def start(self, _=None):
+        back_off_time = self.generate_new_back_off_time(self.failed_transmissions_in_row)
+        self.medium.countdowns.count_down(self.countdown_index, back_off_time)
+
+    def back_off_waited(self):
+        self.medium.contend(self, self.transmission_time)
+
+    def channel_hold_time(self, transmission_time, collision):
+        return transmission_time
+
+    def transmission_started(self, collision):
+        now = self.calendar.now
+        self.rs_time = 0 if gap else self.next_sync_slot_boundary(now) - now
+        self.calendar.schedule(self.transmission_time, READY, self.transmission_sent, collision)
+
+    def transmission_sent(self, collision):
+        if collision:
+            self.sent_failed()
+        else:
+            self.sent_completed()
+        self.start()
+
+    def generate_new_back_off_time(self, failed_transmissions_in_row):
+        upper_limit = min((self.cw_min + 1 << failed_transmissions_in_row) - 1, self.cw_max)
+        back_off = self.rng.randint(0, upper_limit)
+        self.channel.backoffs.add(NR, back_off)
+        return back_off * self.config_nr.observation_slot_duration
+
+    def sent_failed(self):
+        self.channel.failed_transmissions_NR += 1
+        self.failed_transmissions += 1
+        self.failed_transmissions_in_row += 1
+
+    def sent_completed(self):
+        if self.frame_stats is not None:  # every transmission attempt is a new record in Gnb.gen_new_transmission
+            self.frame_stats.add(self.transmission_time, 0)
+        self.channel.succeeded_transmissions_NR += 1
+        self.succeeded_transmissions += 1
+        self.failed_transmissions_in_row = 0
+        self.channel.airtime_control_NR[self.name] += self.rs_time
+        self.channel.airtime_data_NR[self.name] += self.transmission_time - self.rs_time
+
+
+class HeapSimulation:
+    # a heap engine run: the calendar, the channel and the nodes are plain objects and the scheduled callbacks are
+    # bound methods, so the whole run can be pickled between two calendar.run calls (see checkpoint.py)
+    def __init__(
+            self,
+            number_of_stations: int,
+            number_of_gnb: int,
+            seed: int,
+            config: Config,
+            configNr: Config_NR,
+            channel: Channel,
+    ):
+        self.calendar = EventCalendar()
+        self.channel = channel
+        medium = Medium(self.calendar, channel)
+        # node streams are the ones of run_simpy_engine, both engines see the same draws
+        self.stations = [HeapStation(name, self.calendar, medium, node_stream(seed, name), config)
+                         for name in ("Station {}".format(i) for i in range(1, number_of_stations + 1))]
+        self.gnbs = [HeapGnb(name, self.calendar, medium, node_stream(seed, name), configNr)
+                     for name in ("Gnb {}".format(i) for i in range(1, number_of_gnb + 1))]
+
+    @property
+    def now(self):
+        return self.calendar.now
+
+    def run(self, until):
+        # runs all events before until (us), the same events in the same order however the run is split
+        self.calendar.run(until)
+
+    def reset_statistics(self, max_back_off: int):
+        # results are collected from now on (the warm-up of a forked run is not counted), node states are kept
+        channel = self.channel
+        channel.backoffs = BackoffHistogram(max_back_off)
+        channel.failed_transmissions = channel.succeeded_transmissions = channel.bytes_sent = 0
+        channel.failed_transmissions_NR = channel.succeeded_transmissions_NR = 0
+        for airtime in (channel.airtime_data, channel.airtime_control, channel.airtime_data_NR,
+                        channel.airtime_control_NR):
+            airtime.update(dict.fromkeys(airtime, 0))
+        for node in self.stations + self.gnbs:
+            node.succeeded_transmissions = node.failed_transmissions = 0
+            node.frame_stats = add_frame_stats(channel, node.name)
+
+
+def run_heap_engine(
+        number_of_stations: int,
+        number_of_gnb: int,
+        seed: int,
+        simulation_time: int,
+        config: Config,
+        configNr: Config_NR,
+        channel: Channel,
+):
+    # runs the same scenario as run_simpy_engine on a single heapq calendar, simulation_time in us
+    simulation = HeapSimulation(number_of_stations, number_of_gnb, seed, config, configNr, channel)
+    simulation.run(simulation_time)
+    return simulation.stations, simulation.gnbs
@@ -0,0 +1,121 @@
+import math
+
+from coexistanceSimpy.channel_state import NR_FBE
+from coexistanceSimpy.Coexistence import FBEVersion
+from coexistanceSimpy.fbe_engine import CCA, COLLIDED, MONITOR, SIMULATION_END, TRANSMITTING
+
+# Standard and fixed-muting FBE stations do not draw random numbers, so a scenario made only of them is deterministic
+# and once the joint state of the stations repeats the channel pattern repeats forever. The FBE engine records
+# the joint state every hyper-period (lcm of the FFPs, all stations are then in the same FFP phase) and when a state
+# comes again, the results and events of the period between the two are repeated up to the end of the simulation
+# without simulating it, only the transient before the period and the remainder after the repetitions are simulated.
+PERIODIC_VERSIONS = [FBEVersion.STANDARD_FBE, FBEVersion.FIXED_MUTING_FBE]
+EVENT_KEYS = ["time", "event_end", "station_name", "event_type"]
+
+
+def is_periodic(stations):
+    return len(stations) > 0 and all(station.get_fbe_version() in PERIODIC_VERSIONS for station in stations)
+
+
+def hyper_period(stations):
+    return math.lcm(*[station.timers.ffp for station in stations])
+
+
+def program_position(program):
+    # code positions of the program of a station and of the phase generators it runs with yield from, the programs of
+    # standard and fixed-muting FBE keep no other state than the attributes of the station
+    position = []
+    while program is not None:
+        position.append((program.gi_code, program.gi_frame.f_lasti))
+        program = program.gi_yieldfrom
+    return tuple(position)
+
+
+class HyperPeriodExtrapolation:
+    def __init__(self, calendar, drivers, arbiter, channel, simulation_time: int):
+        self.calendar = calendar
+        self.drivers = drivers  # FBEStepper of every station
+        self.index = {driver: i for i, driver in enumerate(drivers)}
+        self.arbiter = arbiter
+        self.channel = channel
+        self.simulation_time = simulation_time
+        self.period = hyper_period([driver.station for driver in drivers])
+        self.max_cot = max(driver.timers.cot for driver in drivers)
+        self.snapshots = {}  # joint state -> (time, counters) when it was seen first
+        self.extrapolated = None  # (period, repetitions) once the results were extrapolated
+        calendar.check_time = max(driver.station.offset for driver in drivers)
+        calendar.check = self.check
+
+    def check(self):
+        now = self.calendar.now
+        state = self.state(now)
+        counters = self.counters()
+        if state not in self.snapshots:
+            self.snapshots[state] = (now, counters)
+            self.calendar.check_time = now + self.period
+            return
+        self.calendar.check_time = math.inf
+        first_time, first_counters = self.snapshots[state]
+        period = now - first_time
+        # transmissions of the repeated periods must not reach the end of the simulation (handle_sim_end)
+        repetitions = (self.simulation_time - now - self.max_cot) // period
+        if repetitions > 0:
+            self.repeat(first_counters, counters, period, repetitions)
+            self.shift(period * repetitions)
+            self.extrapolated = (period, repetitions)
+
+    def state(self, now):
+        # everything the future of the stations depends on, times relative to now (between two instants, so every
+        # station waits for its decision point and no transmission start is pending)
+        queue = tuple((time - now, self.index[driver]) for time, _, driver, version in sorted(self.calendar.queue)
+                      if version == driver.version)
+        stations = tuple(self.station_state(driver, now) for driver in self.drivers)
+        channel = (tuple(self.index[driver] for driver in self.channel.state.sensing_nodes()),
+                   tuple(self.index[driver] for driver in self.channel.state.transmitters(NR_FBE)),
+                   None if self.arbiter.holder is None else self.index[self.arbiter.holder])
+        return queue, stations, channel
+
+    @staticmethod
+    def station_state(driver, now):
+        station = driver.station
+        state = (program_position(driver.program), driver.stage, driver.cut, station.skip_next_cot,
+                 getattr(station, "muted_periods_to_go", 0), driver.sensing, driver.transmitting)
+        if driver.stage in (CCA, MONITOR):
+            state += (driver.start - now,)
+        elif driver.stage in (TRANSMITTING, SIMULATION_END, COLLIDED):
+            state += (driver.start - now, driver.transmission_end - now)
+        return state
+
+    def counters(self):
+        stations = [(driver.station.air_time, driver.station.succeeded_transmissions,
+                     driver.station.failed_transmissions) for driver in self.drivers]
+        return (stations, self.channel.succeeded_transmissions_NR_FBE, self.channel.failed_transmissions_NR_FBE,
+                len(self.channel.event_dict["time"]))
+
+    def repeat(self, first_counters, counters, period, repetitions):
+        first_stations, first_succeeded, first_failed, first_events = first_counters
+        stations, succeeded, failed, events = counters
+        for driver, first, last in zip(self.drivers, first_stations, stations):
+            driver.station.air_time += (last[0] - first[0]) * repetitions
+            driver.station.succeeded_transmissions += (last[1] - first[1]) * repetitions
+            driver.station.failed_transmissions += (last[2] - first[2]) * repetitions
+        self.channel.succeeded_transmissions_NR_FBE += (succeeded - first_succeeded) * repetitions
+        self.channel.failed_transmissions_NR_FBE += (failed - first_failed) * repetitions
+        event_dict = self.channel.event_dict
+        period_events = {key: event_dict[key][first_events:events] for key in EVENT_KEYS}
+        for repetition in range(1, repetitions + 1):
+            shift = period * repetition
+            event_dict["time"].extend(time + shift for time in period_events["time"])
+            event_dict["event_end"].extend(end + shift for end in period_events["event_end"])
+            event_dict["station_name"].extend(period_events["station_name"])
+            event_dict["event_type"].extend(period_events["event_type"])
+
+    def shift(self, shift):
+        # the state at now is the state at now + shift, so the simulation continues from there
+        self.calendar.now += shift
+        self.calendar.queue[:] = [(time + shift, sequence, driver, version)
+                                  for time, sequence, driver, version in self.calendar.queue]
+        for driver in self.drivers:
+            driver.start += shift
+            driver.transmission_end += shift
+            driver.remained_time -= shift
@@ -1,14 +1,33 @@
+import atexit
 import logging
 
+from coexistanceSimpy.trace_util import TraceWriter
 
-def station_log(gnb, mes: str) -> None:
-    if hasattr(gnb, 'logger_name'):
-        logger = logging.getLogger(gnb.logger_name)
-    else:
-        logger = logging.getLogger('default')
-    logger.info(
-        f"Time: {gnb.env.now} Station: {gnb.name} Message: {mes}"
-    )
+# set by enable_logging, call sites on hot paths check it before building the arguments of station_log:
+#     if logger_util.enabled:
+#         station_log(self, "Backoff counter: %s", self.backoff_counter)
+enabled = False
+
+trace_writer = None  # TraceWriter taking the station logs instead of the text log in the trace mode
+
+_loggers = {}  # logger name -> logger, getLogger takes a lock on every call
+
+
+def _get_logger(name: str) -> logging.Logger:
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = logging.getLogger(name)
+    return logger
+
+
+def station_log(gnb, mes, *args) -> None:
+    # mes is a %-style format string, it is formatted with args only if the record is emitted
+    if trace_writer is not None:
+        trace_writer.record(gnb.env.now, gnb.name, mes, args)
+        return
+    logger = _get_logger(getattr(gnb, 'logger_name', 'default'))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Time: %s Station: %s Message: " + str(mes), gnb.env.now, gnb.name, *args)
 
 
 def log(mes: str, log_name: str) -> None:
@@ -16,8 +35,29 @@ def log(mes: str, log_name: str) -> None:
     logger.info(mes)
 
 
-def enable_logging(log_name=None, log_path="") -> None:
+def enable_logging(log_name=None, log_path="", trace=False) -> None:
+    # trace: station logs go to the structured {log_name}.trace.jsonl (see trace_util), the text log keeps the rest
+    global enabled
+    enabled = True
     setup_logger(log_name, log_path)
+    close_trace()
+    if trace:
+        set_trace_writer(TraceWriter(f'{log_path}/{log_name}.trace.jsonl'))
+
+
+def set_trace_writer(writer) -> None:
+    global trace_writer
+    trace_writer = writer
+
+
+def close_trace() -> None:
+    # writes the records which are still buffered, has to be called before the trace is read
+    if trace_writer is not None:
+        trace_writer.close()
+        set_trace_writer(None)
+
+
+atexit.register(close_trace)
 
 
 def setup_logger(log_name, log_path) -> None:
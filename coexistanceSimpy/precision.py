@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import scipy.stats as st
+
+
+def ci_half_width(values, confidence=0.95):
+    # half-width of the Student t confidence interval of the mean, as in simulation_runner.add_confidence_interval
+    if len(values) < 2:
+        return math.inf
+    return float(np.std(values, ddof=1) / np.sqrt(len(values)) * st.t.ppf(1 - (1 - confidence) / 2, len(values) - 1))
+
+
+class PrecisionTarget:
+    # Sequential stopping of replications: a configuration point gets new runs until the confidence interval
+    # half-width of each of its KPIs is at most relative_half_width of the KPI mean (or max_runs is reached).
+    # The relative width of a KPI with a mean of or close to 0 is hardly ever reached, a half-width of at most
+    # absolute_half_width is then enough.
+    # Points are any hashable keys, samples are added per point as {kpi: value} of a single run.
+    def __init__(self, kpis, relative_half_width: float, confidence: float = 0.95, min_runs: int = 2,
+                 max_runs: int = 100, absolute_half_width: float = None):
+        if min_runs < 2:
+            raise ValueError(f"The confidence interval needs at least 2 runs, min_runs = {min_runs}")
+        if max_runs < min_runs:
+            raise ValueError(f"max_runs = {max_runs} is smaller than min_runs = {min_runs}")
+        self.kpis = list(kpis)
+        self.relative_half_width = relative_half_width
+        self.confidence = confidence
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.absolute_half_width = absolute_half_width
+        self.samples = {}  # point -> kpi -> values
+
+    def add(self, point, values):
+        samples = self.samples.setdefault(point, {kpi: [] for kpi in self.kpis})
+        for kpi in self.kpis:
+            samples[kpi].append(values[kpi])
+
+    def runs(self, point):
+        samples = self.samples.get(point)
+        return len(samples[self.kpis[0]]) if samples else 0
+
+    def relative_precision(self, point, kpi):
+        values = self.samples[point][kpi]
+        half_width = ci_half_width(values, self.confidence)
+        if half_width == 0:  # constant KPI (e.g. no collisions at all)
+            return 0.0
+        mean = abs(float(np.mean(values)))
+        return half_width / mean if mean else math.inf
+
+    def kpi_reached(self, point, kpi):
+        if self.relative_precision(point, kpi) <= self.relative_half_width:
+            return True
+        return (self.absolute_half_width is not None
+                and ci_half_width(self.samples[point][kpi], self.confidence) <= self.absolute_half_width)
+
+    def reached(self, point):
+        # the target is met by every KPI of the point
+        return self.runs(point) >= self.min_runs and all(self.kpi_reached(point, kpi) for kpi in self.kpis)
+
+    def converged(self, point):
+        # no more runs are needed: the target is met or max_runs is reached
+        return self.runs(point) >= self.max_runs or self.reached(point)
+
+    def all_converged(self):
+        return all(self.converged(point) for point in self.samples)
+
+    def summary(self, point):
+        precision = ", ".join(f"{kpi} +-{self.relative_precision(point, kpi):.2%}" for kpi in self.kpis)
+        summary = f"{self.runs(point)} runs, {precision}"
+        if not self.reached(point):
+            summary += " - precision target not reached, stopped at max_runs"
+        return summary
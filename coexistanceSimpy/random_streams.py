@@ -0,0 +1,39 @@
+import numpy as np
+
+PARAMETERS_SPAWN_KEY = (256,)  # spawn keys of node names are bytes, so no node shares the parameter stream
+
+
+class RandomStream:
+    # Random numbers of a single node: a NumPy Generator of its own, uniform numbers are drawn in blocks and
+    # handed out one by one, so a draw costs a list lookup instead of a call into NumPy
+    def __init__(self, seed_sequence: np.random.SeedSequence, block_size: int = 256):
+        self.generator = np.random.default_rng(seed_sequence)
+        self.block_size = block_size
+        self.block = []
+        self.position = 0
+
+    def random(self) -> float:
+        if self.position == len(self.block):
+            self.block = self.generator.random(self.block_size).tolist()
+            self.position = 0
+        value = self.block[self.position]
+        self.position += 1
+        return value
+
+    def randint(self, low: int, high: int) -> int:
+        # integer from <low, high>, like random.randint
+        return low + int(self.random() * (high - low + 1))
+
+
+def node_stream(seed, name: str, block_size: int = 256) -> RandomStream:
+    # the stream is spawned from the seed with the node name as the spawn key, so the draws of a node depend only on
+    # the seed and its name - not on the number or order of other nodes, nor on the process running the simulation.
+    # Runs with the same seed share the streams of same-named nodes (common random numbers).
+    # seed: int, sequence of ints or None (fresh entropy)
+    return RandomStream(np.random.SeedSequence(seed, spawn_key=tuple(name.encode())), block_size)
+
+
+def parameter_stream(seed, block_size: int = 256) -> RandomStream:
+    # stream of the random parameters of a scenario ("a..b" ranges of the JSON files), spawned from the seed like the
+    # node streams, so a seeded scenario draws the same parameters in every simulation
+    return RandomStream(np.random.SeedSequence(seed, spawn_key=PARAMETERS_SPAWN_KEY), block_size)
@@ -0,0 +1,156 @@
+import csv
+import io
+import os
+from abc import ABC, abstractmethod
+
+try:
+    import fcntl  # advisory locks of the CSV file shared by worker processes, not available on Windows
+except ImportError:
+    fcntl = None
+
+# columns of the result rows (Coexistence.result_row) with their SQL types
+RESULT_SCHEMA = [
+    ("Seed", "BIGINT"),
+    ("CwMax", "BIGINT"),
+    ("Fairness", "DOUBLE"),
+    ("WiFi", "BIGINT"),
+    ("Gnb", "BIGINT"),
+    ("ChannelOccupancyWiFi", "DOUBLE"),
+    ("ChannelEfficiencyWiFi", "DOUBLE"),
+    ("PcolWifi", "DOUBLE"),
+    ("ChannelOccupancyNR", "DOUBLE"),
+    ("ChannelEfficiencyNR", "DOUBLE"),
+    ("PcolNR", "DOUBLE"),
+    ("ChannelOccupancyAll", "DOUBLE"),
+    ("ChannelEfficiencyAll", "DOUBLE"),
+]
+RESULT_COLUMNS = [column for column, _ in RESULT_SCHEMA]
+CSV_HEADER = ",".join(RESULT_COLUMNS) + "\r\n"
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class ResultSink(ABC):
+    # Buffers result rows in memory and writes them in batches, use as a context manager or call close()
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.write(self.rows)
+            self.rows = []
+
+    @abstractmethod
+    def write(self, rows):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def batch_data_frame(self, rows):
+        import pandas as pd
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def check_csv_header(path: str, file_descriptor: int):
+    # rows are appended only to a file with the RESULT_SCHEMA header, e.g. not to a result file of an older version
+    lines = os.pread(file_descriptor, len(CSV_HEADER) + 1, 0).decode(errors="replace").splitlines()
+    header = lines[0] if lines else ""
+    if header != ",".join(RESULT_COLUMNS):
+        raise ValueError(f"{path} has the columns {header}, expected {','.join(RESULT_COLUMNS)}. "
+                         f"Write the results to another file")
+
+
+class CsvResultSink(ResultSink):
+    # Every batch is a single write to the file opened in append mode (under an exclusive lock where available), so
+    # sinks of parallel worker processes appending to the same file do not interleave their rows. The header of an
+    # existing file is checked when the sink is created, before any run, and again by every write
+    def __init__(self, path: str, batch_size: int = 1000):
+        super().__init__(path, batch_size)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            file_descriptor = os.open(path, os.O_RDONLY)
+            try:
+                check_csv_header(path, file_descriptor)
+            finally:
+                os.close(file_descriptor)
+
+    def write(self, rows):
+        batch = io.StringIO()
+        writer = csv.writer(batch, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerows(rows)
+        file_descriptor = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+            data = batch.getvalue()
+            if os.fstat(file_descriptor).st_size == 0:  # header is written by the first writer only
+                data = CSV_HEADER + data
+            else:
+                check_csv_header(self.path, file_descriptor)
+            os.write(file_descriptor, data.encode())
+        finally:
+            os.close(file_descriptor)  # releases the lock
+
+
+class ParquetResultSink(ResultSink):
+    # path is a directory, every batch is a new part file written under a temporary name and renamed when complete,
+    # read the results with duckdb.query("SELECT * FROM '<path>/*.parquet'") or pandas.read_parquet(path)
+    def __init__(self, path: str, batch_size: int = 1000):
+        super().__init__(path, batch_size)
+        os.makedirs(path, exist_ok=True)
+        self.part = 0
+
+    def write(self, rows):
+        import duckdb
+        name = os.path.join(self.path, f"part-{os.getpid()}-{self.part:05d}.parquet")
+        self.part += 1
+        connection = duckdb.connect()
+        connection.register("batch", self.batch_data_frame(rows))
+        columns = ", ".join(f"CAST({column} AS {sql_type}) AS {column}" for column, sql_type in RESULT_SCHEMA)
+        connection.execute(f"COPY (SELECT {columns} FROM batch) TO {sql_string(name + '.tmp')} (FORMAT PARQUET)")
+        connection.close()
+        os.replace(name + ".tmp", name)
+
+
+class DuckDBResultSink(ResultSink):
+    # rows are inserted to the "results" table of the database file, a DuckDB file has a single writing process
+    def __init__(self, path: str, batch_size: int = 1000):
+        super().__init__(path, batch_size)
+        import duckdb
+        self.connection = duckdb.connect(path)
+        columns = ", ".join(f"{column} {sql_type}" for column, sql_type in RESULT_SCHEMA)
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS results ({columns})")
+
+    def write(self, rows):
+        self.connection.register("batch", self.batch_data_frame(rows))
+        self.connection.execute("INSERT INTO results SELECT * FROM batch")  # a batch is inserted in one transaction
+        self.connection.unregister("batch")
+
+    def close(self):
+        super().close()
+        self.connection.close()
+
+
+def open_result_sink(path: str, batch_size: int = 1000) -> ResultSink:
+    # back-end selected by the extension: .parquet (directory of part files), .duckdb / .db, anything else is CSV
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        return ParquetResultSink(path, batch_size)
+    if extension in (".duckdb", ".db"):
+        return DuckDBResultSink(path, batch_size)
+    return CsvResultSink(path, batch_size)
@@ -1,13 +1,14 @@
 import json
-import random
 from dataclasses import dataclass
 
-from coexistanceSimpy import DeterministicBackoffFBE, FBEVersion
+from coexistanceSimpy import DeterministicBackoffFBE, FBEVersion, HEAP_ENGINE, SIMPY_ENGINE
 from coexistanceSimpy import FBETimers
 from coexistanceSimpy import FixedMutingFBE
 from coexistanceSimpy import FloatingFBE
 from coexistanceSimpy import RandomMutingFBE
 from coexistanceSimpy import StandardFBE
+from coexistanceSimpy.precision import PrecisionTarget
+from coexistanceSimpy.random_streams import RandomStream, parameter_stream
 
 standard_fbe_json_list = []
 fixed_muting_fbe_json_list = []
@@ -17,7 +18,7 @@ db_fbe_json_list = []
 CONTAINS_RANDOM_PARAMS = False
 
 
-def collect_cot_ffp_offset_zip(cot_list, ffp_list, offset_list):
+def collect_cot_ffp_offset_zip(cot_list, ffp_list, offset_list, rng: RandomStream):
     max_size = max(len(cot_list), len(ffp_list), len(offset_list))
     last_ffp_value = ffp_list[-1]
     last_cot_value = cot_list[-1]
@@ -28,19 +29,19 @@ def collect_cot_ffp_offset_zip(cot_list, ffp_list, offset_list):
         cot_list.append(last_cot_value)
     for i in range(0, max_size - len(offset_list)):
         offset_list.append(last_offset_value)
-    check_for_random_params(cot_list)
-    check_for_random_params(ffp_list)
-    check_for_random_params(offset_list)
+    check_for_random_params(cot_list, rng)
+    check_for_random_params(ffp_list, rng)
+    check_for_random_params(offset_list, rng)
 
     return zip([int(cot) for cot in cot_list], [int(ffp) for ffp in ffp_list], [int(offset) for offset in offset_list])
 
 
-def check_for_random_params(variable_list):
+def check_for_random_params(variable_list, rng: RandomStream):
     contains_random_params_local = False
     for i in range(len(variable_list)):
         if ".." in variable_list[i]:
             bounds = variable_list[i].split("..")
-            random_num = random.randint(int(bounds[0]), int(bounds[1]))
+            random_num = rng.randint(int(bounds[0]), int(bounds[1]))
             variable_list[i] = str(random_num)
             contains_random_params_local = True
     if contains_random_params_local:
@@ -187,11 +188,26 @@ def get_scenario_directly_from_json(json_path):
     is_separate_run = j["RUN_SEPARATELY"] if "RUN_SEPARATELY" in j else False
     scenario_runs = j["SCENARIO_RUNS"] if "SCENARIO_RUNS" in j else 1
     contains_db_fbe = len(db_fbe_json_list) > 0
+    seed = j["SEED"] if "SEED" in j else None
+    precision = build_precision_target(j["PRECISION"], scenario_runs) if "PRECISION" in j else None
+    engine = j["ENGINE"] if "ENGINE" in j else SIMPY_ENGINE
+    if engine not in [SIMPY_ENGINE, HEAP_ENGINE]:
+        raise ValueError(f'Not supported FBE engine {engine}, expected {SIMPY_ENGINE} or {HEAP_ENGINE}')
     simulation_params = SimulationParams(simulation_time, output_params, is_separate_run, scenario_runs,
-                                         contains_db_fbe)
+                                         contains_db_fbe, seed, precision, engine)
     return simulation_params
 
 
+def build_precision_target(precision_json, scenario_runs):
+    # SCENARIO_RUNS is the minimum number of runs of every configuration point
+    kpis = precision_json.get("kpis", ["normalized_air_time"])
+    relative_half_width = precision_json["relative_half_width"]
+    confidence = precision_json.get("confidence", 0.95)
+    max_runs = precision_json.get("max_runs", 100)
+    absolute_half_width = precision_json.get("absolute_half_width")
+    return PrecisionTarget(kpis, relative_half_width, confidence, scenario_runs, max_runs, absolute_half_width)
+
+
 def build_output_params_obj(output_params_json):
     if output_params_json is None:
         return None
@@ -203,59 +219,63 @@ def build_output_params_obj(output_params_json):
     separate_plots = output_params_json.get("separate_plots")
     enable_logging = output_params_json["enable_logging"] if "enable_logging" in output_params_json else False
     is_random = output_params_json["is_random"] if "is_random" in output_params_json else False
-    return OutputParams(folder_name, file_name, all_in_one, fairness, summary_airtime, separate_plots, enable_logging, is_random)
+    trace_logging = output_params_json["trace_logging"] if "trace_logging" in output_params_json else False
+    return OutputParams(folder_name, file_name, all_in_one, fairness, summary_airtime, separate_plots, enable_logging, is_random,
+                        trace_logging)
 
 
-def get_standard_fbe_from_json_list(stations_list):
+def get_standard_fbe_from_json_list(stations_list, rng):
     for i, standard_fbe_json in enumerate(standard_fbe_json_list, start=1):
         params = get_station_params_from_json(standard_fbe_json, FBEVersion.STANDARD_FBE)
         cot_ffp_offset_zip = collect_cot_ffp_offset_zip(params.cot.split(';'), params.ffp.split(';'),
-                                                        params.offset.split(';'))
+                                                        params.offset.split(';'), rng)
         create_standard_fbe(cot_ffp_offset_zip, params.name.format(i), stations_list)
 
 
-def get_fixed_muting_fbe_from_json_list(stations_list):
+def get_fixed_muting_fbe_from_json_list(stations_list, rng):
     for i, fixed_muting_fbe_json in enumerate(fixed_muting_fbe_json_list, start=1):
         params = get_station_params_from_json(fixed_muting_fbe_json, FBEVersion.FIXED_MUTING_FBE)
         cot_ffp_offset_zip = collect_cot_ffp_offset_zip(params.cot.split(';'), params.ffp.split(';'),
-                                                        params.offset.split(';'))
+                                                        params.offset.split(';'), rng)
         create_fixed_muting_fbe(cot_ffp_offset_zip, params.max_muted_periods, params.name.format(i),
                                 stations_list)
 
 
-def get_random_muting_fbe_from_json_list(stations_list):
+def get_random_muting_fbe_from_json_list(stations_list, rng):
     for i, random_muting_fbe_json in enumerate(random_muting_fbe_json_list, start=1):
         params = get_station_params_from_json(random_muting_fbe_json, FBEVersion.RANDOM_MUTING_FBE)
         cot_ffp_offset_zip = collect_cot_ffp_offset_zip(params.cot.split(';'), params.ffp.split(';'),
-                                                        params.offset.split(';'))
+                                                        params.offset.split(';'), rng)
         create_random_muting_fbe(cot_ffp_offset_zip, params.max_muted_periods, params.max_frames_in_row,
                                  params.name.format(i), stations_list)
 
 
-def get_floating_fbe_from_json_list(stations_list):
+def get_floating_fbe_from_json_list(stations_list, rng):
     for i, floating_fbe_json in enumerate(floating_fbe_json_list, start=1):
         params = get_station_params_from_json(floating_fbe_json, FBEVersion.FLOATING_FBE)
         cot_ffp_offset_zip = collect_cot_ffp_offset_zip(params.cot.split(';'), params.ffp.split(';'),
-                                                        params.offset.split(';'))
+                                                        params.offset.split(';'), rng)
         create_floating_fbe(cot_ffp_offset_zip, params.name.format(i), stations_list)
 
 
-def get_db_fbe_from_json_list(stations_list):
+def get_db_fbe_from_json_list(stations_list, rng):
     for i, db_fbe_json in enumerate(db_fbe_json_list, start=1):
         params = get_station_params_from_json(db_fbe_json, FBEVersion.DETERMINISTIC_BACKOFF_FBE)
         cot_ffp_offset_zip = collect_cot_ffp_offset_zip(params.cot.split(';'), params.ffp.split(';'),
-                                                        params.offset.split(';'))
+                                                        params.offset.split(';'), rng)
         create_db_fbe(cot_ffp_offset_zip, params.init_backoff, params.max_retransmissions, params.name.format(i),
                       stations_list, params.threshold)
 
 
-def get_station_list_from_json_lists():
+def get_station_list_from_json_lists(seed=None):
+    # random parameters ("a..b") are drawn from the parameter stream of the seed, None - they differ in every call
+    rng = parameter_stream(seed)
     stations_list = []
-    get_standard_fbe_from_json_list(stations_list)
-    get_fixed_muting_fbe_from_json_list(stations_list)
-    get_random_muting_fbe_from_json_list(stations_list)
-    get_floating_fbe_from_json_list(stations_list)
-    get_db_fbe_from_json_list(stations_list)
+    get_standard_fbe_from_json_list(stations_list, rng)
+    get_fixed_muting_fbe_from_json_list(stations_list, rng)
+    get_random_muting_fbe_from_json_list(stations_list, rng)
+    get_floating_fbe_from_json_list(stations_list, rng)
+    get_db_fbe_from_json_list(stations_list, rng)
     return stations_list
 
 
@@ -309,6 +329,7 @@ class OutputParams:
     separate_plots: dict
     enable_logging: bool
     is_random:bool
+    trace_logging: bool = False  # station logs written to the structured trace instead of the text log
 
 
 @dataclass
@@ -318,3 +339,6 @@ class SimulationParams:
     is_separate_run: bool
     scenario_runs: int
     contains_db_fbe: bool
+    seed: int = None  # seed of the station random streams, None - different streams in every simulation
+    precision: PrecisionTarget = None  # scenario runs are added until it is reached, None - SCENARIO_RUNS runs
+    engine: str = SIMPY_ENGINE  # simpy processes or heap (fbe_engine.py decision points)
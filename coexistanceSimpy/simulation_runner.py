@@ -5,11 +5,13 @@ import duckdb
 import pandas as pd
 import simpy
 from matplotlib import pyplot as plt
-from coexistanceSimpy.logger_util import enable_logging, log
+from coexistanceSimpy.logger_util import close_trace, enable_logging, log
+from coexistanceSimpy.random_streams import node_stream
 import numpy as np
 
 import coexistanceSimpy
-from coexistanceSimpy import FBEVersion, EventType
+from coexistanceSimpy import FBEVersion, EventType, HEAP_ENGINE, SIMPY_ENGINE
+from coexistanceSimpy.fbe_engine import run_fbe_engine
 from coexistanceSimpy.scenario_creator_helper import OutputParams
 from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json
 from coexistanceSimpy.scenario_creator_helper import get_station_list_from_json_lists
@@ -47,13 +49,29 @@ def get_stations_for_current_run(stations_list, run_number):
     return current_run_stations_list
 
 
-def set_env_channel(stations_list, env, channel):
+def set_env_channel(stations_list, env, channel, seed=None):
+    # every station draws from its own stream of the seed, named after the station
     for station in stations_list:
         station.set_channel(channel)
-        station.set_environment(env)
+        station.set_environment(env, node_stream(seed, station.name))
         station.set_log_name(log_name)
 
 
+def run_stations(stations_list, simulation_time, seed=None, engine=SIMPY_ENGINE):
+    # single simulation of the stations, returns its channel with the events and DB-FBE counter changes
+    if engine == HEAP_ENGINE:
+        channel = coexistanceSimpy.Channel(None, 0, 0, None, None, None, None, None, simulation_time)
+        for station in stations_list:
+            station.set_log_name(log_name)
+        run_fbe_engine(stations_list, channel, simulation_time, seed)
+        return channel
+    env = simpy.Environment()
+    channel = coexistanceSimpy.Channel(None, 0, 0, None, None, None, None, None, simulation_time)
+    set_env_channel(stations_list, env, channel, seed)
+    env.run(until=simulation_time)
+    return channel
+
+
 def collect_results(stations_list, result_dict, simulation_time):
     standard_fbe_stations = []
     fixed_muting_fbe_stations = []
@@ -141,7 +159,7 @@ def run_simulation(simulation_params):
     simulation_time = simulation_params.simulation_time
     path_to_folder = get_path_to_folder(output_params)
     if output_params.enable_logging:
-        enable_logging(output_params.file_name, path_to_folder)
+        enable_logging(output_params.file_name, path_to_folder, output_params.trace_logging)
         global log_name
         log_name = output_params.file_name
     result_dict = {"station_name": [],
@@ -157,27 +175,47 @@ def run_simulation(simulation_params):
                    "fairness": [],
                    "summary_air_time": [],
                    "offset": []}
+    precision = simulation_params.precision
+    if precision is not None:
+        unknown_kpis = [kpi for kpi in precision.kpis if kpi not in result_dict]
+        if unknown_kpis:
+            raise ValueError(f"Unknown precision kpis: {unknown_kpis}, expected some of {list(result_dict)}")
     event_dict_list = []
-    db_fbe_backoff_changes_dict_list = []
-    db_fbe_interrupt_counter_dict_list = []
+    db_fbe_backoff_changes_list = []
+    db_fbe_interrupt_changes_list = []
+    first_run_events = None
     print(f"Test name: {output_params.file_name} in folder: {output_params.folder_name}")
     log(f"Test name: {output_params.file_name} in folder: {output_params.folder_name}", log_name)
-    for i in range(scenario_runs):
-        print(f"Running scenario : {i + 1}/{scenario_runs}")
-        log(f"Running scenario : {i + 1}/{scenario_runs}", log_name)
-        stations_list = get_station_list_from_json_lists()
+    i = 0
+    # with a precision target the runs go on until every configuration point reaches it, converged points are skipped
+    while i < scenario_runs or (precision is not None and not precision.all_converged()):
+        total = scenario_runs if precision is None else f"{scenario_runs}+ (until the precision target is reached)"
+        print(f"Running scenario : {i + 1}/{total}")
+        log(f"Running scenario : {i + 1}/{total}", log_name)
+        seed = None if simulation_params.seed is None else [simulation_params.seed, i]  # scenario runs differ
+        stations_list = get_station_list_from_json_lists(seed)
         if is_separate_run:
             separate_runner(stations_list, simulation_time, result_dict, event_dict_list,
-                            db_fbe_backoff_changes_dict_list, db_fbe_interrupt_counter_dict_list)
+                            db_fbe_backoff_changes_list, db_fbe_interrupt_changes_list, seed, precision,
+                            simulation_params.engine)
         else:
             runner(simulation_time, stations_list, result_dict,
-                   event_dict_list, db_fbe_backoff_changes_dict_list, db_fbe_interrupt_counter_dict_list)
+                   event_dict_list, db_fbe_backoff_changes_list, db_fbe_interrupt_changes_list, seed,
+                   precision, simulation_params.engine)
+        if first_run_events is None:
+            first_run_events = len(event_dict_list)
+        i += 1
+    if precision is not None:
+        for point in precision.samples:
+            print(f"Point {point}: {precision.summary(point)}")
+            log(f"Point {point}: {precision.summary(point)}", log_name)
+    close_trace()  # the trace is complete before the results are processed
 
     df_full = pd.DataFrame.from_dict(result_dict)
     df_full = duckdb.query("SELECT * FROM df_full ORDER BY cot, station_name").df()
     df = prepare_dataframe(df_full)
     if output_params is not None:
-        process_results(df, output_params, scenario_runs)
+        process_results(df, output_params)
         sim_results_path = path_to_folder + output_params.file_name + "_df.csv"
         log(f"Saving simulation results to:{sim_results_path} ...", log_name)
         df.to_csv(sim_results_path)
@@ -186,8 +224,7 @@ def run_simulation(simulation_params):
         events_path = path_to_folder + output_params.file_name + "_events.csv"
         log(f"Saving simulation events to:{events_path} ...", log_name)
         events_df.to_csv(events_path)
-        if scenario_runs > 1:
-            first_run_events = int(len(event_dict_list) / scenario_runs)
+        if i > 1:
             log(f"Number of scenario runs is larger than one. Plotting events from first run only ...", log_name)
             plot_events(event_dict_list[0:first_run_events], output_params)
             return
@@ -195,6 +232,9 @@ def run_simulation(simulation_params):
             log("Plotting events ...", log_name)
             plot_events(event_dict_list, output_params)
         if simulation_params.contains_db_fbe:
+            # the compact DB-FBE counter changes are turned into columns only here
+            db_fbe_backoff_changes_dict_list = [changes.as_dict() for changes in db_fbe_backoff_changes_list]
+            db_fbe_interrupt_counter_dict_list = [changes.as_dict() for changes in db_fbe_interrupt_changes_list]
             db_fbe_interrupt_df = merge_dicts_into_df(db_fbe_interrupt_counter_dict_list)
             db_fbe_interrupt_df_path = path_to_folder + output_params.file_name + "_db_fbe_interrupt.csv"
             db_fbe_backoff_changes_df = merge_dicts_into_df(db_fbe_backoff_changes_dict_list)
@@ -218,6 +258,7 @@ def prepare_dataframe(df):
                         "avg(failed_transmissions) as failed_transmissions, "
                         "fbe_version, avg(fairness) as fairness, "
                         "avg(summary_air_time) as summary_air_time,"
+                        "count(*) as runs,"
                         "stddev_samp(normalized_air_time) as normalized_air_time_std,"
                         "stddev_samp(successful_transmissions) as successful_transmissions_std,"
                         "stddev_samp(failed_transmissions) as failed_transmissions_std "
@@ -240,50 +281,73 @@ def log_run_stations_params(stations_list):
         log(repr(station), log_name)
 
 
-def runner(simulation_time, stations_list, result_dict, event_dict_list, db_fbe_backoff_changes_dict_list,
-           db_fbe_interrupt_changes_dict_list):
+def pending_points(precision, points):
+    # points which need more runs, all of them without a precision target
+    if precision is None:
+        return points
+    return [point for point in points if not precision.converged(point)]
+
+
+def collect_pending_results(stations_list, result_dict, simulation_time, precision, points, pending):
+    # results of the stations of the pending points only, so converged points keep the runs of the stopping rule.
+    # The other stations were simulated with them (and count in their fairness) but get no new rows
+    if precision is None:
+        collect_results(stations_list, result_dict, simulation_time)
+        return
+    run_dict = {key: [] for key in result_dict}
+    collect_results(stations_list, run_dict, simulation_time)
+    for row, point in enumerate(points):
+        if point in pending:
+            for key in result_dict:
+                result_dict[key].append(run_dict[key][row])
+            precision.add(point, {kpi: run_dict[kpi][row] for kpi in precision.kpis})
+
+
+def runner(simulation_time, stations_list, result_dict, event_dict_list, db_fbe_backoff_changes_list,
+           db_fbe_interrupt_changes_list, seed=None, precision=None, engine=SIMPY_ENGINE):
+    # precision: PrecisionTarget of the stations (run number, station index), runs which reached it are skipped
     total_run_number = get_total_run_number(stations_list)
     print(f'Total run number: {total_run_number}')
     for run_number in range(total_run_number):
+        current_run_stations_list = get_stations_for_current_run(stations_list, run_number)
+        points = [(run_number, index) for index in range(len(current_run_stations_list))]
+        pending = pending_points(precision, points)
+        if not pending:
+            continue
         print(f'Running simulation:{run_number + 1}/{total_run_number}')
         log(f'Running simulation:{run_number + 1}/{total_run_number}', log_name)
-        env = simpy.Environment()
-        channel = coexistanceSimpy.Channel(None, simpy.Resource(env, capacity=1), 0, 0, None, None, None, None, None,
-                                           simulation_time)
-        current_run_stations_list = get_stations_for_current_run(stations_list, run_number)
-        set_env_channel(current_run_stations_list, env, channel)
         log_run_stations_params(current_run_stations_list)
-        env.run(until=simulation_time)
-        collect_results(current_run_stations_list, result_dict, simulation_time)
+        channel = run_stations(current_run_stations_list, simulation_time, seed, engine)
+        collect_pending_results(current_run_stations_list, result_dict, simulation_time, precision, points, pending)
         current_run_stations_list.clear()
         event_dict_list.append(channel.event_dict)
-        db_fbe_backoff_changes_dict_list.append(channel.db_fbe_backoff_change_dict)
-        db_fbe_interrupt_changes_dict_list.append(channel.db_interrupt_counter)
-
-
-def separate_runner(stations_list, simulation_time, result_dict, event_dict_list, db_fbe_backoff_changes_dict_list,
-                    db_fbe_interrupt_changes_dict_list):
-    for stations in stations_list:
+        db_fbe_backoff_changes_list.append(channel.db_fbe_backoff_changes)
+        db_fbe_interrupt_changes_list.append(channel.db_interrupt_counter_changes)
+
+
+def separate_runner(stations_list, simulation_time, result_dict, event_dict_list, db_fbe_backoff_changes_list,
+                    db_fbe_interrupt_changes_list, seed=None, precision=None, engine=SIMPY_ENGINE):
+    # precision: PrecisionTarget of the stations (list index, station index), lists which reached it are skipped
+    for list_index, stations in enumerate(stations_list):
+        points = [(list_index, index) for index in range(len(stations))]
+        pending = pending_points(precision, points)
+        if not pending:
+            continue
         print(f'Running stations separately. Current number of stations: {len(stations)}')
         for station in stations:
             print(f'Current station: {station.name}')
-            env = simpy.Environment()
-            channel = coexistanceSimpy.Channel(None, simpy.Resource(env, capacity=1), 0, 0, None, None, None, None,
-                                               None,
-                                               simulation_time)
             log(repr(station), log_name)
-            set_env_channel([station], env, channel)
-            env.run(until=simulation_time)
+            channel = run_stations([station], simulation_time, seed, engine)
             event_dict_list.append(channel.event_dict)
-            db_fbe_backoff_changes_dict_list.append(channel.db_fbe_backoff_change_dict)
-            db_fbe_interrupt_changes_dict_list.append(channel.db_interrupt_counter)
-        collect_results(stations, result_dict, simulation_time)
+            db_fbe_backoff_changes_list.append(channel.db_fbe_backoff_changes)
+            db_fbe_interrupt_changes_list.append(channel.db_interrupt_counter_changes)
+        collect_pending_results(stations, result_dict, simulation_time, precision, points, pending)
 
 
-def process_results(df, output_params: OutputParams, scenario_runs):
+def process_results(df, output_params: OutputParams):
     log("Processing results ...", log_name)
     if output_params.all_in_one is not None:
-        plot_all_in_one(df, output_params, scenario_runs)
+        plot_all_in_one(df, output_params)
     if output_params.fairness is not None:
         plot_fairness(df, output_params)
     if output_params.summary_airtime is not None:
@@ -418,7 +482,7 @@ def set_plot_ylim(ax: plt.Axes, y_axis: str):
         ax.set_ylim(bottom=0)
 
 
-def plot_all_in_one(df: pd.DataFrame, output_params: OutputParams, scenario_runs):
+def plot_all_in_one(df: pd.DataFrame, output_params: OutputParams):
     axis_label_zip = zip_plot_params(output_params.all_in_one["x_axis"], output_params.all_in_one["x_label"],
                                      output_params.all_in_one["y_axis"], output_params.all_in_one["y_label"],
                                      output_params.all_in_one.get("plot_file_name"))
@@ -439,7 +503,8 @@ def plot_all_in_one(df: pd.DataFrame, output_params: OutputParams, scenario_runs
             x = grp[x_axis].tolist()
             y = grp[y_axis].tolist()
             std = grp[y_axis+"_std"].tolist()
-            add_confidence_interval(x, y, ax, colors[i], scenario_runs=scenario_runs, std=std)
+            runs = grp["runs"].to_numpy()  # points stopped by the precision target differ in runs
+            add_confidence_interval(x, y, ax, colors[i], scenario_runs=runs, std=std)
             i += 1
 
         ax.set(xlabel=x_label, ylabel=y_label, title=output_params.all_in_one["title"])
@@ -449,7 +514,7 @@ def plot_all_in_one(df: pd.DataFrame, output_params: OutputParams, scenario_runs
 
 
 def add_confidence_interval(x, y, ax, color, scenario_runs=1, std=None):
-    if scenario_runs < 2 and std is not None:
+    if np.max(scenario_runs) < 2 and std is not None:
         return
     # ci = 1.96 * np.std(y) / np.sqrt(len(x))
     ci = std / np.sqrt(scenario_runs) * st.t.ppf(1 - 0.05 / 2, scenario_runs - 1)
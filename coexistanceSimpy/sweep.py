@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from coexistanceSimpy.Coexistence import VECTOR_ENGINE, report_result, simulate_seeds
+from coexistanceSimpy.precision import PrecisionTarget
+
+SEED_ARGUMENT = 4  # index of the seed in simulate() arguments
+ENGINE_ARGUMENT = 6  # index of the engine in simulate() arguments, the engine is simpy when it is not given
+# SimulationResult KPIs which can be used as precision targets
+PRECISION_KPIS = ["p_coll", "channel_occupancy", "channel_efficiency", "p_coll_NR", "channel_occupancy_NR",
+                  "channel_efficiency_NR", "channel_occupancy_all", "channel_efficiency_all", "fairness", "joint"]
+
+
+def without_seed(arguments):
+    return arguments[:SEED_ARGUMENT] + arguments[SEED_ARGUMENT + 1:]
+
+
+def seed_batches(runs):
+    # consecutive vector engine runs differing only by the seed are simulated together, other runs one by one
+    batches = []
+    for arguments in runs:
+        vector = len(arguments) > ENGINE_ARGUMENT and arguments[ENGINE_ARGUMENT] == VECTOR_ENGINE
+        if vector and batches and without_seed(batches[-1][0]) == without_seed(arguments):
+            batches[-1].append(arguments)
+        else:
+            batches.append([arguments])
+    return batches
+
+
+def simulate_batch(batch):
+    first = batch[0]
+    return simulate_seeds(*first[:SEED_ARGUMENT], [arguments[SEED_ARGUMENT] for arguments in batch],
+                          *first[SEED_ARGUMENT + 1:])
+
+
+def run_sweep(runs, jobs=1, sink=None):
+    # runs: simulate() arguments of independent runs, jobs: worker processes (0 - one per CPU, 1 - no pool)
+    # results are reported (printed and added to the result sink) and yielded in the order of runs
+    batches = seed_batches(runs)
+    if jobs == 1:
+        for batch in batches:
+            for result in simulate_batch(batch):
+                report_result(result, sink)
+                yield result
+        return
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        for results in executor.map(simulate_batch, batches):  # workers only simulate, the results are reported here
+            for result in results:
+                report_result(result, sink)
+                yield result
+
+
+def run_precision_sweep(points, precision: PrecisionTarget, jobs=1, sink=None):
+    # points: simulate() arguments of configuration points, their seeds are the first seeds of the points.
+    # Every point starts with precision.min_runs runs, then each round adds the next seed of every point which has not
+    # reached the precision yet. Runs of a round are run in parallel, the runs made do not depend on the number of jobs.
+    runs = [0] * len(points)
+    pending = list(range(len(points)))
+    while pending:
+        batch = []  # (point, simulate arguments)
+        for point in pending:
+            for _ in range(precision.min_runs if runs[point] == 0 else 1):
+                arguments = list(points[point])
+                arguments[SEED_ARGUMENT] += runs[point]
+                runs[point] += 1
+                batch.append((point, tuple(arguments)))
+        for (point, _), result in zip(batch, run_sweep([arguments for _, arguments in batch], jobs, sink)):
+            precision.add(point, {kpi: getattr(result, kpi) for kpi in precision.kpis})
+            yield result
+        still_pending = []
+        for point in pending:
+            if precision.converged(point):
+                print(f"N_stations:={points[point][2]} N_gNB:={points[point][3]} stopped after "
+                      f"{precision.summary(point)}")
+            else:
+                still_pending.append(point)
+        pending = still_pending
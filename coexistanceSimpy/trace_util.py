@@ -0,0 +1,71 @@
+import json
+import queue
+import threading
+
+# Structured trace of station logs, every line is a JSON array with a batch of entries:
+#   {"station": 0, "name": "Standard FBE 1"}           station id definition
+#   {"event": 0, "format": "Backoff counter: %s"}      event code definition (format string of the station_log call)
+#   [1000, 0, 0, 3]                                    record: time, station id, event code, arguments
+# definitions always precede the first record using them
+
+
+class TraceWriter:
+    # The simulation thread only appends tuples to a batch, full batches are encoded and written by a background thread
+    def __init__(self, path: str, batch_size: int = 4096, max_pending_batches: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch = []
+        self.station_ids = {}
+        self.event_codes = {}
+        self.batches = queue.Queue(max_pending_batches)  # bounded, a slow disk slows down the simulation
+        self.thread = threading.Thread(target=self.write_batches, name="trace-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, time, station: str, message: str, args) -> None:
+        station_id = self.station_ids.get(station)
+        if station_id is None:
+            station_id = self.station_ids[station] = len(self.station_ids)
+            self.batch.append({"station": station_id, "name": station})
+        event_code = self.event_codes.get(message)
+        if event_code is None:
+            event_code = self.event_codes[message] = len(self.event_codes)
+            self.batch.append({"event": event_code, "format": message})
+        self.batch.append((time, station_id, event_code) + args)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.batch:
+            self.batches.put(self.batch)
+            self.batch = []
+
+    def close(self) -> None:
+        self.flush()
+        self.batches.put(None)
+        self.thread.join()
+
+    def write_batches(self) -> None:
+        encode = json.JSONEncoder(separators=(',', ':'), default=str).encode
+        with open(self.path, 'w') as trace_file:
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    return
+                trace_file.write(encode(batch) + '\n')  # a whole batch is encoded at once, much cheaper per record
+
+
+def read_trace(path: str):
+    # yields (time, station name, message) of every record, messages are formatted here
+    stations = {}
+    formats = {}
+    with open(path) as trace_file:
+        for line in trace_file:
+            for entry in json.loads(line):
+                if isinstance(entry, dict):
+                    if "station" in entry:
+                        stations[entry["station"]] = entry["name"]
+                    else:
+                        formats[entry["event"]] = entry["format"]
+                    continue
+                time, station_id, event_code, *args = entry
+                yield time, stations[station_id], formats[event_code] % tuple(args)
@@ -0,0 +1,165 @@
+from typing import List
+
+import numpy as np
+
+from coexistanceSimpy.backoff_histogram import HISTOGRAM_TECHNOLOGIES, BackoffHistogram
+from coexistanceSimpy.channel_state import NR, WIFI
+from coexistanceSimpy.Coexistence import Config, Config_NR, SimulationResult, Times, gap
+from coexistanceSimpy.Times import seconds_to_ticks
+from coexistanceSimpy.random_streams import node_stream
+
+# Saturated Wi-Fi / NR-U LBE scenario of many replicas (seeds) at once. In a single collision domain every node starts
+# its countdown when the channel becomes idle (a node which ends its transmission earlier waits for the idle channel),
+# so a run is a sequence of contention cycles: from the idle channel to the earliest backoff deadline(s), then the
+# busy period of the transmission(s). Each step advances all replicas by one cycle with arrays of shape
+# (replicas, nodes): backoff counters, retry stages and contention windows, with a mask of the transmitting nodes.
+# The nodes draw from their node_stream in the same order as in the other engines, so every replica gives the same
+# results as run_simpy_engine / run_heap_engine with its seed.
+
+FRAME_TIME = 5400  # Wi-Fi frame length used by Station.generate_new_frame, us
+BLOCK_SIZE = 256  # uniform numbers drawn at once from a node stream
+
+
+class ReplicaStreams:
+    # node_stream of every (replica, node) read through a (replicas, nodes, BLOCK_SIZE) array of uniform numbers
+    def __init__(self, seeds, names):
+        self.generators = [[node_stream(seed, name).generator for name in names] for seed in seeds]
+        self.block = np.array([[generator.random(BLOCK_SIZE) for generator in row] for row in self.generators])
+        self.block = self.block.reshape(len(seeds), len(names), BLOCK_SIZE)
+        self.position = np.zeros((len(seeds), len(names)), dtype=np.int64)
+
+    def random(self, replicas, nodes):
+        exhausted = self.position[replicas, nodes] == BLOCK_SIZE
+        for replica, node in zip(replicas[exhausted].tolist(), nodes[exhausted].tolist()):
+            self.block[replica, node] = self.generators[replica][node].random(BLOCK_SIZE)
+            self.position[replica, node] = 0
+        values = self.block[replicas, nodes, self.position[replicas, nodes]]
+        self.position[replicas, nodes] += 1
+        return values
+
+    def randint(self, replicas, nodes, low, high):
+        # integers from <low, high>, like RandomStream.randint
+        return low + (self.random(replicas, nodes) * (high - low + 1)).astype(np.int64)
+
+
+def simulate_replicas(
+        config: Config,
+        configNr: Config_NR,
+        number_of_stations: int,
+        number_of_gnb: int,
+        seeds: list,
+        simulation_time: float,
+) -> List[SimulationResult]:
+    # simulate() of every seed, simulation_time in s
+    until = seconds_to_ticks(simulation_time)
+    times = Times(config.data_size, config.mcs)
+    ack_time = times.get_ack_frame_time()
+    nr_time = configNr.transmission_time
+    sync_slot_duration = configNr.synchronization_slot_duration
+    replicas = len(seeds)
+    names = (["Station {}".format(i) for i in range(1, number_of_stations + 1)]
+             + ["Gnb {}".format(i) for i in range(1, number_of_gnb + 1)])
+    nodes = len(names)
+    station = np.arange(nodes) < number_of_stations
+    streams = ReplicaStreams(seeds, names)
+
+    # per node parameters
+    pre = np.where(station, Times.t_difs, configNr.deter_period + configNr.M * configNr.observation_slot_duration)
+    slot = np.where(station, Times.t_slot, configNr.observation_slot_duration)
+    cw_min = np.where(station, config.cw_min, configNr.cw_min)
+    cw_max = np.where(station, config.cw_max, configNr.cw_max)
+    retry_limit = np.where(station, config.r_limit, np.iinfo(np.int64).max)  # gNBs retransmit without a limit
+    transmission_time = np.where(station, FRAME_TIME, nr_time)
+    sync_slot = np.where(station | (not gap), 0, sync_slot_duration)  # countdown ends on a sync slot boundary
+    technology_row = np.where(station, HISTOGRAM_TECHNOLOGIES.index(WIFI), HISTOGRAM_TECHNOLOGIES.index(NR))
+
+    # per replica and node state
+    all_replicas, all_nodes = np.indices((replicas, nodes)).reshape(2, -1)
+    desync = np.zeros((replicas, nodes), dtype=np.int64)
+    gnb_replicas, gnb_nodes = all_replicas[~station[all_nodes]], all_nodes[~station[all_nodes]]
+    desync[gnb_replicas, gnb_nodes] = streams.randint(gnb_replicas, gnb_nodes, configNr.min_sync_slot_desync,
+                                                      configNr.max_sync_slot_desync)
+    failed_in_row = np.zeros((replicas, nodes), dtype=np.int64)
+    backoffs = np.zeros((replicas, len(HISTOGRAM_TECHNOLOGIES), max(config.cw_max, configNr.cw_max) + 1),
+                        dtype=np.int64)
+    succeeded = np.zeros((replicas, nodes), dtype=np.int64)
+    failed = np.zeros((replicas, nodes), dtype=np.int64)
+    airtime_data = np.zeros((replicas, nodes), dtype=np.int64)
+    airtime_control = np.zeros((replicas, nodes), dtype=np.int64)
+
+    def draw_back_offs(draw_replicas, draw_nodes):
+        upper_limit = np.minimum(((cw_min[draw_nodes] + 1) << np.minimum(failed_in_row[draw_replicas, draw_nodes], 32))
+                                 - 1, cw_max[draw_nodes])
+        back_off = streams.randint(draw_replicas, draw_nodes, 0, upper_limit)
+        np.add.at(backoffs, (draw_replicas, technology_row[draw_nodes], back_off), 1)
+        return back_off * slot[draw_nodes]
+
+    remaining = np.zeros((replicas, nodes), dtype=np.int64)  # backoff left without DIFS / prioritization period
+    now = np.zeros(replicas, dtype=np.int64)  # the channel became idle
+    active = np.full(replicas, until > 0)
+    if until > 0:
+        remaining[all_replicas, all_nodes] = draw_back_offs(all_replicas, all_nodes)
+
+    while active.any():
+        # countdowns of the idle period, aligned ones start after the gap so they end on a sync slot boundary
+        countdown = pre + remaining
+        end = now[:, None] + countdown
+        boundary = np.where(end < desync, desync,
+                            desync + ((end - desync) // np.maximum(sync_slot, 1) + 1) * sync_slot)
+        start = np.where(sync_slot > 0, boundary - countdown, now[:, None])
+        deadline = start + countdown
+        transmission_start = deadline.min(axis=1)
+        active &= transmission_start < until
+        transmitting = (deadline == transmission_start[:, None]) & active[:, None]
+
+        # others freeze, only the slots completed after DIFS / prioritization period are counted
+        waited = np.maximum(transmission_start[:, None] - start - pre, 0)
+        remaining = np.where(transmitting, remaining, remaining - waited // slot * slot)
+
+        collision = transmitting.sum(axis=1) > 1
+        wifi_transmits = (transmitting & station).any(axis=1)
+        nr_transmits = (transmitting & ~station).any(axis=1)
+        # the longest transmission holds the channel, a station wins a tie (it contends first)
+        hold = np.where(wifi_transmits & ((FRAME_TIME >= nr_time) | ~nr_transmits),
+                        FRAME_TIME + np.where(collision, Times.ack_timeout, ack_time), nr_time)
+
+        # results of the transmissions ending before the end of the simulation
+        transmission_end = transmission_start[:, None] + transmission_time
+        ended = transmitting & (transmission_end < until)
+        success = ended & ~collision[:, None]
+        failed += ended & collision[:, None]
+        succeeded += success
+        if gap:
+            rs_time = 0
+        else:  # reservation signal up to the sync slot boundary
+            rs_time = np.where(transmission_start[:, None] < desync, desync, desync + (
+                    (transmission_start[:, None] - desync) // sync_slot_duration + 1) * sync_slot_duration) \
+                      - transmission_start[:, None]
+        airtime_data += np.where(success, np.where(station, FRAME_TIME, nr_time - rs_time), 0)
+        airtime_control += np.where(success, np.where(station, ack_time, rs_time), 0)
+
+        # retry stages, a station drops the frame after the retry limit
+        failed_in_row = np.where(transmitting, np.where(collision[:, None], failed_in_row + 1, 0), failed_in_row)
+        failed_in_row = np.where(failed_in_row > retry_limit, 0, failed_in_row)
+
+        # new backoffs drawn after the transmission (and ack / ack timeout)
+        restart = transmission_end + np.where(station, np.where(collision, Times.ack_timeout, ack_time)[:, None], 0)
+        draw_replicas, draw_nodes = np.nonzero(transmitting & (restart < until))
+        remaining[draw_replicas, draw_nodes] = draw_back_offs(draw_replicas, draw_nodes)
+
+        now = np.where(active, transmission_start + hold, now)
+        active &= now < until
+
+    results = []
+    for replica, seed in enumerate(seeds):
+        histogram = BackoffHistogram(max(config.cw_max, configNr.cw_max))
+        histogram.counts = backoffs[replica]
+        results.append(SimulationResult(
+            seed, simulation_time, config, configNr,
+            airtime_data[replica, station], airtime_control[replica, station],
+            succeeded[replica, station], failed[replica, station],
+            airtime_data[replica, ~station], airtime_control[replica, ~station],
+            succeeded[replica, ~station], failed[replica, ~station],
+            histogram,
+        ))
+    return results
@@ -0,0 +1,81 @@
+import itertools
+
+import click
+from coexistanceSimpy.Coexistence import *
+from coexistanceSimpy.fork import run_forks, warm_up
+from coexistanceSimpy.result_sink import open_result_sink
+
+
+@click.command()
+@click.option("-r", "--runs", "runs", default=10, help="Number of simulation runs (warm-ups)")
+@click.option("--seed", "seed", default=1, help="Seed for simulation")
+@click.option("--ap-number", "ap_number", type=int, required=True, help="Number of Wi-Fi stations")
+@click.option("--gnb-number", "gnb_number", type=int, required=True, help="Number of NR-U gNBs")
+@click.option("-w", "--warm-up", "warm_up_time", default=10.0, help="Duration of the shared warm-up in s")
+@click.option(
+    "-t",
+    "--simulation-time",
+    "simulation_time",
+    default=100.0,
+    help="Duration of every continuation after the warm-up in s",
+)
+@click.option("--wifi_cw_min", "wifi_cw_min", default=15, help="Size of Wi-Fi cw min")
+@click.option("--wifi_cw_max", "wifi_cw_max", default=[63], multiple=True,
+              help="Size of Wi-Fi cw max (can be repeated, the first one is used in the warm-up)")
+@click.option("--nru_cw_min", "nru_cw_min", default=15, help="Size of NR-U cw min")
+@click.option("--nru_cw_max", "nru_cw_max", default=[63], multiple=True,
+              help="Size of NR-U cw max (can be repeated, the first one is used in the warm-up)")
+@click.option(
+    "--wifi_r_limit", "wifi_r_limit", default=7, help="Number of failed transmissions in a row",
+)
+@click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs")
+@click.option("-syn_slot", "--synchronization_slot_duration", default=1000,
+              help="Synchronization slot length in mikrosecounds")
+@click.option("-max_des", "--max_sync_slot_desync", default=1000, help="Max value of gNB desynchronization")
+@click.option("-min_des", "--min_sync_slot_desync", default=0, help="Min value of gNB desynchronization")
+@click.option("-nru_obser_slots", "--nru_observation_slot", default=3, help="amount of observation slots for NR_U")
+@click.option("--mcot", default=[6], multiple=True,
+              help="Max channel occupancy time for NR-U (ms) (can be repeated, the first one is used in the warm-up)")
+@click.option("-o", "--output", "output", default=output_csv,
+              help="Results file: .csv, .parquet (directory of Parquet files) or .duckdb")
+@click.option("-j", "--jobs", "jobs", default=1,
+              help="Number of worker processes running the continuations (0 - one per CPU)")
+def forked_runs(
+        runs: int,
+        seed: int,
+        ap_number: int,
+        gnb_number: int,
+        warm_up_time: float,
+        simulation_time: float,
+        wifi_cw_min: int,
+        wifi_cw_max: list,
+        nru_cw_min: int,
+        nru_cw_max: list,
+        wifi_r_limit: int,
+        mcs_value: int,
+        synchronization_slot_duration: int,
+        max_sync_slot_desync: int,
+        min_sync_slot_desync: int,
+        nru_observation_slot: int,
+        mcot: list,
+        output: str,
+        jobs: int,
+):
+    # every run is warmed up once (heap engine) and continued with every combination of the repeated parameters
+    def configs(wifi_cw, nru_cw, nru_mcot):
+        return (Config(1472, wifi_cw_min, wifi_cw, wifi_r_limit, mcs_value),
+                Config_NR(16, 9, synchronization_slot_duration, max_sync_slot_desync, min_sync_slot_desync,
+                          nru_observation_slot, nru_cw_min, nru_cw, nru_mcot))
+
+    continuations = [configs(*values) for values in itertools.product(wifi_cw_max, nru_cw_max, mcot)]
+    config, config_nr = configs(wifi_cw_max[0], nru_cw_max[0], mcot[0])
+
+    with open_result_sink(output) as sink:
+        for i in range(0, runs):
+            snapshot = warm_up(config, config_nr, ap_number, gnb_number, seed + i, warm_up_time)
+            for result in run_forks(snapshot, continuations, simulation_time, jobs):
+                report_result(result, sink)
+
+
+if __name__ == "__main__":
+    forked_runs()
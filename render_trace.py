@@ -0,0 +1,24 @@
+import click
+
+from coexistanceSimpy.trace_util import read_trace
+
+
+@click.command()
+@click.argument("trace_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("-o", "--output", "output", type=click.File("w"), default="-",
+              help="Rendered log file (standard output by default)")
+@click.option("-s", "--station", "stations", multiple=True, help="Render only this station (can be repeated)")
+@click.option("--start", "start", type=float, default=None, help="Render records from this time in us")
+@click.option("--end", "end", type=float, default=None, help="Render records up to this time in us")
+def render(trace_path, output, stations, start, end):
+    # renders a structured trace written in the trace_logging mode as the text station log
+    for time, station, message in read_trace(trace_path):
+        if stations and station not in stations:
+            continue
+        if (start is not None and time < start) or (end is not None and time > end):
+            continue
+        output.write(f"Time: {time} Station: {station} Message: {message}\n")
+
+
+if __name__ == "__main__":
+    render()
@@ -1,5 +1,9 @@
 import click
 from coexistanceSimpy.Coexistence import *
+from coexistanceSimpy.backoff_histogram import save_backoff_histograms
+from coexistanceSimpy.result_sink import open_result_sink
+from coexistanceSimpy.precision import PrecisionTarget
+from coexistanceSimpy.sweep import PRECISION_KPIS, run_precision_sweep, run_sweep
 
 
 @click.command()
@@ -40,6 +44,32 @@ from coexistanceSimpy.Coexistence import *
 @click.option("-min_des", "--min_sync_slot_desync", default=0, help="Min value of gNB desynchronization")
 @click.option("-nru_obser_slots", "--nru_observation_slot", default=3, help="amount of observation slots for NR_U")
 @click.option("--mcot", default=6, help="Max channel occupancy time for NR-U (ms)")
+@click.option("--engine", type=click.Choice(ENGINES), default=SIMPY_ENGINE, help="Simulation engine")
+@click.option("--frame-stats", "frame_stats", is_flag=True, help="Print aggregated per-frame statistics")
+@click.option("--backoffs-output", "backoffs_output", default=None,
+              help="Save the histogram of drawn backoffs merged over all runs to this .npz file")
+@click.option("-o", "--output", "output", default=output_csv,
+              help="Results file: .csv, .parquet (directory of Parquet files) or .duckdb")
+@click.option("-j", "--jobs", "jobs", default=1, help="Number of worker processes running the seeds (0 - one per CPU)")
+@click.option("--target-precision", "target_precision", type=float, default=None,
+              help="Add runs (seeds from --seed on, at least --runs) until the relative confidence interval "
+                   "half-width of every --precision-kpi is at most this value")
+@click.option("--precision-kpi", "precision_kpis", type=click.Choice(PRECISION_KPIS), multiple=True,
+              default=["channel_occupancy", "channel_occupancy_NR"],
+              help="KPI of the precision target (can be repeated)")
+@click.option("--confidence", "confidence", default=0.95, help="Confidence level of the precision target")
+@click.option("--max-runs", "max_runs", default=100, help="Maximum number of runs with the precision target")
+@click.option("--absolute-precision", "absolute_precision", type=float, default=None,
+              help="Confidence interval half-width which is enough for a KPI whose relative width is not reached "
+                   "(e.g. a KPI with a mean close to 0)")
+@click.option("--checkpoint-dir", "checkpoint_dir", default=None,
+              help="Save the state of every run to this directory each --checkpoint-interval and continue runs from "
+                   "their checkpoints (heap engine only)")
+@click.option("--checkpoint-interval", "checkpoint_interval", type=click.FloatRange(min=0, min_open=True),
+              default=CHECKPOINT_INTERVAL,
+              help="Simulated time between checkpoints in s")
+@click.option("--analytic", "analytic", is_flag=True,
+              help="Print the analytic estimate of the KPIs instead of simulating (runs, seeds and time are ignored)")
 def single_run(
         runs: int,
         seed: int,
@@ -58,20 +88,47 @@ def single_run(
         min_sync_slot_desync: int,
         nru_observation_slot: int,
         mcot: int,
+        engine: str,
+        frame_stats: bool,
+        backoffs_output: str,
+        jobs: int,
+        output: str,
+        analytic: bool,
+        checkpoint_dir: str,
+        checkpoint_interval: float,
+        target_precision: float,
+        precision_kpis: list,
+        confidence: float,
+        max_runs: int,
+        absolute_precision: float,
 ):
-    backoffs = {key: {ap_number: 0} for key in range(wifi_cw_max + 1)}
-    airtime_data = {"Station {}".format(i): 0 for i in range(1, ap_number + 1)}
-    airtime_control = {"Station {}".format(i): 0 for i in range(1, ap_number + 1)}
-    airtime_data_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
-    airtime_control_NR = {"Gnb {}".format(i): 0 for i in range(1, gnb_number + 1)}
+    config = Config(1472, wifi_cw_min, wifi_cw_max, wifi_r_limit, mcs_value)
+    config_nr = Config_NR(16, 9, synchronization_slot_duration, max_sync_slot_desync, min_sync_slot_desync,
+                          nru_observation_slot, nru_cw_min, nru_cw_max, mcot)
+    if analytic:
+        run_analytic(ap_number, gnb_number, config, config_nr)
+        return
 
+    backoffs = BackoffHistogram(max(wifi_cw_max, nru_cw_max))
+
+    sweep = []  # simulate arguments of every run
     for i in range(0, runs):
         curr_seed = seed + i
-        run_simulation(ap_number, gnb_number, curr_seed, simulation_time,
-                       Config(1472, wifi_cw_min, wifi_cw_max, wifi_r_limit, mcs_value),
-                       Config_NR(16, 9, synchronization_slot_duration, max_sync_slot_desync, min_sync_slot_desync,
-                                 nru_observation_slot, nru_cw_min, nru_cw_max, mcot),
-                       backoffs, airtime_data, airtime_control, airtime_data_NR, airtime_control_NR)
+        sweep.append((config, config_nr, ap_number, gnb_number, curr_seed, simulation_time, engine, frame_stats,
+                      checkpoint_dir, checkpoint_interval))
+
+    with open_result_sink(output) as sink:
+        if target_precision is None:
+            results = run_sweep(sweep, jobs, sink)
+        else:
+            precision = PrecisionTarget(precision_kpis, target_precision, confidence, runs, max_runs,
+                                        absolute_precision)
+            results = run_precision_sweep(sweep[:1], precision, jobs, sink)
+        for result in results:
+            backoffs.merge(result.backoffs)
+
+    if backoffs_output is not None:
+        save_backoff_histograms(backoffs_output, {"all": backoffs})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from coexistanceSimpy.analytic import analytic_estimate, attempt_probability
+from coexistanceSimpy.Coexistence import Config, Config_NR, HEAP_ENGINE, simulate
+
+TOLERANCE = 0.04  # absolute, as in validation.valid_analytic the model is an approximation
+
+
+def test_attempt_probability_without_collisions_is_bianchi():
+    assert attempt_probability(0.0, 15, 63) == pytest.approx(2 / 17)
+
+
+def test_attempt_probability_decreases_with_collisions():
+    probabilities = [attempt_probability(p, 15, 1023, 7) for p in [0.0, 0.1, 0.3, 0.6]]
+    assert probabilities == sorted(probabilities, reverse=True)
+
+
+def test_single_station_has_no_collisions():
+    result = analytic_estimate(Config(), Config_NR(), 1, 0)
+    assert result.p_coll == pytest.approx(0.0)
+    assert result.channel_occupancy_NR == 0
+    assert 0 < result.channel_occupancy < 1
+
+
+def test_empty_scenario():
+    result = analytic_estimate(Config(), Config_NR(), 0, 0)
+    assert result.channel_occupancy_all == 0 and result.fairness == 0
+
+
+@pytest.mark.parametrize("number_of_nodes", [1, 4, 8])
+def test_estimate_is_close_to_the_simulation(number_of_nodes):
+    estimate = analytic_estimate(Config(), Config_NR(), number_of_nodes, number_of_nodes)
+    results = [simulate(Config(), Config_NR(), number_of_nodes, number_of_nodes, seed, 5, HEAP_ENGINE)
+               for seed in range(1, 4)]
+    for kpi in ["channel_occupancy_all", "channel_occupancy", "channel_occupancy_NR", "p_coll"]:
+        simulated = np.mean([getattr(result, kpi) for result in results])
+        assert getattr(estimate, kpi) == pytest.approx(simulated, abs=TOLERANCE), kpi
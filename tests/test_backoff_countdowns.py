@@ -0,0 +1,115 @@
+import heapq
+import itertools
+
+from coexistanceSimpy.backoff_countdowns import BackoffCountdowns
+
+DIFS = 34
+SLOT = 9
+
+
+class Calendar:
+    # minimal clock and schedule of BackoffCountdowns
+    def __init__(self):
+        self.now = 0
+        self.queue = []
+        self.sequence = itertools.count()
+
+    def schedule(self, delay, callback):
+        heapq.heappush(self.queue, (self.now + delay, next(self.sequence), callback))
+
+    def run(self, until):
+        while self.queue and self.queue[0][0] <= until:
+            self.now, _, callback = heapq.heappop(self.queue)
+            callback(None)
+        self.now = until
+
+
+class Node:
+    def __init__(self, calendar):
+        self.calendar = calendar
+        self.released = []
+
+    def back_off_waited(self):
+        self.released.append(self.calendar.now)
+
+
+def countdowns_with_nodes(number_of_nodes, pre=DIFS, slot=SLOT):
+    calendar = Calendar()
+    countdowns = BackoffCountdowns(calendar, calendar.schedule)
+    nodes = [Node(calendar) for _ in range(number_of_nodes)]
+    for node in nodes:
+        countdowns.add_node(node, pre, slot)
+    return calendar, countdowns, nodes
+
+
+def test_countdown_ends_after_pre_and_backoff():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1)
+    countdowns.count_down(0, 3 * SLOT)
+    calendar.run(1000)
+    assert node.released == [DIFS + 3 * SLOT]
+
+
+def test_freeze_keeps_only_completed_slots():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1)
+    countdowns.count_down(0, 3 * SLOT)
+    calendar.run(DIFS + 2 * SLOT + 4)  # two slots and a part of the third one counted
+    countdowns.freeze()
+    assert countdowns.remaining[0] == SLOT
+    calendar.run(100)
+    assert node.released == []
+    countdowns.resume()
+    calendar.run(1000)
+    assert node.released == [100 + DIFS + SLOT]
+
+
+def test_freeze_during_pre_does_not_decrease_backoff():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1)
+    countdowns.count_down(0, 2 * SLOT)
+    calendar.run(DIFS - 1)
+    countdowns.freeze()
+    assert countdowns.remaining[0] == 2 * SLOT
+    calendar.run(50)
+    countdowns.resume()
+    calendar.run(1000)
+    assert node.released == [50 + DIFS + 2 * SLOT]
+
+
+def test_countdown_started_on_busy_channel_waits_for_idle():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1)
+    countdowns.freeze()
+    countdowns.count_down(0, SLOT)
+    calendar.run(200)
+    assert node.released == []
+    countdowns.resume()
+    calendar.run(1000)
+    assert node.released == [200 + DIFS + SLOT]
+
+
+def test_nodes_with_the_same_deadline_are_released_together():
+    calendar, countdowns, nodes = countdowns_with_nodes(3)
+    countdowns.count_down(0, 2 * SLOT)
+    countdowns.count_down(1, 2 * SLOT)
+    countdowns.count_down(2, 5 * SLOT)
+    calendar.run(1000)
+    assert [node.released for node in nodes] == [[DIFS + 2 * SLOT], [DIFS + 2 * SLOT], [DIFS + 5 * SLOT]]
+
+
+def test_stale_wakeup_after_freeze_is_ignored():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1)
+    countdowns.count_down(0, 4 * SLOT)
+    calendar.run(DIFS + SLOT)
+    countdowns.freeze()
+    countdowns.resume()  # the wakeup scheduled by count_down is still in the calendar
+    calendar.run(1000)
+    assert node.released == [DIFS + SLOT + DIFS + 3 * SLOT]
+
+
+def test_aligned_countdown_ends_on_sync_slot_boundary():
+    calendar, countdowns, (node,) = countdowns_with_nodes(1, pre=16)
+    countdowns.align(0, 100, 1000)
+    countdowns.count_down(0, 3 * SLOT)
+    calendar.run(500)
+    assert node.released == [100]
+    countdowns.count_down(0, 3 * SLOT)
+    calendar.run(5000)
+    assert node.released == [100, 1100]
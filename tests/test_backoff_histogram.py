@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from coexistanceSimpy.backoff_histogram import (BackoffHistogram, load_backoff_histograms,
+                                                save_backoff_histograms)
+from coexistanceSimpy.channel_state import NR, WIFI
+
+
+def test_add_counts_per_technology():
+    histogram = BackoffHistogram(15)
+    for back_off in [0, 3, 3, 15]:
+        histogram.add(WIFI, back_off)
+    histogram.add(NR, 7)
+    assert histogram.counts.shape == (2, 16)
+    assert histogram[WIFI][3] == 2
+    assert histogram[WIFI].sum() == 4
+    assert histogram[NR].tolist() == [0] * 7 + [1] + [0] * 8
+
+
+def test_merge_pads_the_narrower_histogram():
+    narrow = BackoffHistogram(15)
+    narrow.add(WIFI, 15)
+    wide = BackoffHistogram(63)
+    wide.add(WIFI, 63)
+    wide.add(NR, 1)
+    narrow.merge(wide)
+    assert narrow.counts.shape == (2, 64)
+    assert narrow[WIFI][15] == 1 and narrow[WIFI][63] == 1
+    assert narrow[NR][1] == 1
+
+    narrow_again = BackoffHistogram(15)
+    narrow_again.add(NR, 2)
+    wide.merge(narrow_again)
+    assert wide.counts.shape == (2, 64)
+    assert wide[NR][2] == 1
+
+
+def test_save_and_load(tmp_path):
+    histogram = BackoffHistogram(31)
+    histogram.add(WIFI, 5)
+    histogram.add(NR, 31)
+    path = tmp_path / "backoffs.npz"
+    save_backoff_histograms(path, {"1": histogram, "all": histogram})
+    loaded = load_backoff_histograms(path)
+    assert sorted(loaded) == ["1", "all"]
+    np.testing.assert_array_equal(loaded["all"].counts, histogram.counts)
+
+
+def test_load_rejects_other_rows(tmp_path):
+    path = tmp_path / "backoffs.npz"
+    np.savez_compressed(path, technologies=np.array(["a", "b"]), all=np.zeros((2, 4), dtype=np.int64))
+    with pytest.raises(ValueError):
+        load_backoff_histograms(path)
@@ -0,0 +1,47 @@
+from coexistanceSimpy.channel_state import NR, NR_FBE, WIFI, ChannelState
+
+
+class Node:
+    transmitting = False
+    sensing = False
+
+
+def test_transmissions_are_counted_per_technology():
+    state = ChannelState()
+    station, gnb, fbe = Node(), Node(), Node()
+    state.start_transmission(station, WIFI)
+    state.start_transmission(gnb, NR)
+    state.start_transmission(fbe, NR_FBE)
+    assert state.transmitter_count == 3
+    assert list(state.transmitters(WIFI)) == [station]
+    assert station.transmitting and gnb.transmitting and fbe.transmitting
+
+    state.end_transmission(gnb, NR)
+    assert state.transmitter_count == 2
+    assert list(state.transmitters(NR)) == []
+    assert not gnb.transmitting
+
+
+def test_end_all_transmissions_of_technologies():
+    state = ChannelState()
+    stations = [Node() for _ in range(3)]
+    gnb = Node()
+    for station in stations:
+        state.start_transmission(station, WIFI)
+    state.start_transmission(gnb, NR)
+    state.end_all_transmissions(WIFI)
+    assert state.transmitter_count == 1
+    assert list(state.transmitters(WIFI)) == []
+    assert not any(station.transmitting for station in stations)
+    assert list(state.transmitters(NR)) == [gnb]
+
+
+def test_sensing_nodes_keep_insertion_order():
+    state = ChannelState()
+    nodes = [Node() for _ in range(4)]
+    for node in nodes:
+        state.start_sensing(node)
+    state.stop_sensing(nodes[1])
+    assert list(state.sensing_nodes()) == [nodes[0], nodes[2], nodes[3]]
+    assert not nodes[1].sensing
+    assert nodes[0].sensing
@@ -0,0 +1,35 @@
+from coexistanceSimpy.counter_changes import CounterChanges
+
+
+def test_station_names_are_registered_once():
+    changes = CounterChanges("backoff")
+    assert changes.station_index("DB-FBE 1") == 0
+    assert changes.station_index("DB-FBE 2") == 1
+    assert changes.station_index("DB-FBE 1") == 0
+    assert changes.names == ["DB-FBE 1", "DB-FBE 2"]
+
+
+def test_as_dict_rebuilds_the_times_from_the_deltas():
+    changes = CounterChanges("backoff", with_init=True)
+    first, second = changes.station_index("DB-FBE 1"), changes.station_index("DB-FBE 2")
+    changes.add(0, 3, first, is_init=True)
+    changes.add(0, 5, second, is_init=True)
+    changes.add(1000, 2, first)
+    changes.add(10 ** 12, 4, second)  # beyond 32-bit ticks
+    assert len(changes) == 4
+    assert list(changes.time_deltas) == [0, 0, 1000, 10 ** 12 - 1000]
+    assert changes.as_dict() == {"time": [0, 0, 1000, 10 ** 12], "backoff": [3, 5, 2, 4],
+                                 "station_name": ["DB-FBE 1", "DB-FBE 2", "DB-FBE 1", "DB-FBE 2"],
+                                 "is_init": [True, True, False, False]}
+
+
+def test_changes_without_init_have_no_is_init_column():
+    changes = CounterChanges("interrupt_counter")
+    changes.add(500, 1, changes.station_index("DB-FBE 1"))
+    assert changes.as_dict() == {"time": [500], "interrupt_counter": [1], "station_name": ["DB-FBE 1"]}
+
+
+def test_empty_changes():
+    changes = CounterChanges("backoff", with_init=True)
+    assert len(changes) == 0
+    assert changes.as_dict() == {"time": [], "backoff": [], "station_name": [], "is_init": []}
@@ -0,0 +1,76 @@
+import contextlib
+import glob
+import io
+import os
+
+import pytest
+
+from coexistanceSimpy import HEAP_ENGINE, SIMPY_ENGINE, logger_util, simulation_runner
+from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json, get_station_list_from_json_lists
+
+CONFIGS = sorted(glob.glob(os.path.join(os.path.dirname(simulation_runner.__file__), "sim_configs", "*", "*.json")))
+RESULT_KEYS = ["station_name", "air_time", "cot", "normalized_cot", "ffp", "normalized_ffp", "normalized_air_time",
+               "successful_transmissions", "failed_transmissions", "fbe_version", "fairness", "summary_air_time",
+               "offset"]
+SIMULATION_TIME = 100000
+SEED = [7, 0]
+
+
+def run_config(path, engine):
+    # results, events and DB-FBE counter changes of every run of the scenario
+    result_dict = {key: [] for key in RESULT_KEYS}
+    event_dict_list, backoff_changes_list, interrupt_changes_list = [], [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation_params = get_scenario_directly_from_json(path)
+        stations_list = get_station_list_from_json_lists(SEED)
+        runner = simulation_runner.separate_runner if simulation_params.is_separate_run else simulation_runner.runner
+        if simulation_params.is_separate_run:
+            runner(stations_list, SIMULATION_TIME, result_dict, event_dict_list, backoff_changes_list,
+                   interrupt_changes_list, SEED, engine=engine)
+        else:
+            runner(SIMULATION_TIME, stations_list, result_dict, event_dict_list, backoff_changes_list,
+                   interrupt_changes_list, SEED, engine=engine)
+    return (result_dict, event_dict_list, [changes.as_dict() for changes in backoff_changes_list],
+            [changes.as_dict() for changes in interrupt_changes_list])
+
+
+@pytest.mark.parametrize("path", CONFIGS, ids=[os.path.relpath(path, os.path.dirname(path) + "/..")
+                                               for path in CONFIGS])
+def test_heap_engine_matches_simpy(path):
+    results, events, backoff_changes, interrupt_changes = run_config(path, HEAP_ENGINE)
+    expected = run_config(path, SIMPY_ENGINE)
+    assert results == expected[0]
+    assert events == expected[1]
+    assert backoff_changes == expected[2]
+    assert interrupt_changes == expected[3]
+    assert any(len(event_dict["time"]) for event_dict in events)  # transmissions or collisions were simulated
+
+
+class LogRecords:
+    # trace writer keeping the station logs in memory
+    def __init__(self):
+        self.records = []
+
+    def record(self, time, station, message, args):
+        self.records.append((time, station, message, args))
+
+    def close(self):
+        pass
+
+
+def logged_run(path, engine, monkeypatch):
+    records = LogRecords()
+    monkeypatch.setattr(logger_util, "enabled", True)
+    monkeypatch.setattr(logger_util, "trace_writer", records)
+    run_config(path, engine)
+    return records.records
+
+
+@pytest.mark.parametrize("config", ["four_stations_no_offset/standard_fbe.json", "four_stations_with_offset/db_fbe.json",
+                                    "random_muting_test/random_muting_fbe_test.json",
+                                    "floating_fbe_test/floating_fbe_test.json"])
+def test_heap_engine_writes_the_station_logs_of_simpy(config, monkeypatch):
+    path = os.path.join(os.path.dirname(simulation_runner.__file__), "sim_configs", config)
+    records = logged_run(path, HEAP_ENGINE, monkeypatch)
+    assert records == logged_run(path, SIMPY_ENGINE, monkeypatch)
+    assert any(message == "Sensing if channel is idle" for _, _, message, _ in records)
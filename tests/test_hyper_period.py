@@ -0,0 +1,56 @@
+import contextlib
+import io
+import os
+import types
+
+import pytest
+
+import coexistanceSimpy
+from coexistanceSimpy import logger_util, simulation_runner
+from coexistanceSimpy.fbe_engine import run_fbe_engine
+from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json, get_station_list_from_json_lists
+
+CONFIG_DIRECTORY = os.path.join(os.path.dirname(simulation_runner.__file__), "sim_configs")
+SIMULATION_TIME = 1000000
+
+
+def run(path, run_number, extrapolate):
+    # counters and events of one run of the scenario on the heap engine, with the extrapolation it returned
+    with contextlib.redirect_stdout(io.StringIO()):
+        get_scenario_directly_from_json(path)
+        stations_list = get_station_list_from_json_lists([1, 0])
+    stations = simulation_runner.get_stations_for_current_run(stations_list, run_number)
+    channel = coexistanceSimpy.Channel(None, 0, 0, None, None, None, None, None, SIMULATION_TIME)
+    extrapolation = run_fbe_engine(stations, channel, SIMULATION_TIME, 1, extrapolate)
+    counters = [(station.air_time, station.succeeded_transmissions, station.failed_transmissions)
+                for station in stations]
+    return counters, channel.event_dict, extrapolation
+
+
+@pytest.mark.parametrize("config", ["four_stations_with_offset/standard_fbe.json",
+                                    "four_stations_with_offset/fixed_muting_fbe.json",
+                                    "four_stations_no_offset/standard_fbe.json"])
+@pytest.mark.parametrize("run_number", [0, 4, 8])
+def test_extrapolation_matches_the_full_simulation(config, run_number):
+    path = os.path.join(CONFIG_DIRECTORY, config)
+    counters, events, extrapolation = run(path, run_number, True)
+    expected_counters, expected_events, no_extrapolation = run(path, run_number, False)
+    assert no_extrapolation is None
+    assert extrapolation.extrapolated is not None  # the scenario was extrapolated, not simulated to the end
+    assert counters == expected_counters
+    assert events == expected_events
+
+
+def test_non_periodic_scenario_is_not_extrapolated():
+    path = os.path.join(CONFIG_DIRECTORY, "four_stations_with_offset", "floating_fbe.json")
+    assert run(path, 0, True)[2] is None
+
+
+def test_logged_run_is_simulated_in_full(monkeypatch):
+    # the station logs have to cover the repeated periods too
+    records = []
+    monkeypatch.setattr(logger_util, "enabled", True)
+    monkeypatch.setattr(logger_util, "trace_writer", types.SimpleNamespace(record=lambda *record: records.append(record)))
+    path = os.path.join(CONFIG_DIRECTORY, "four_stations_with_offset", "standard_fbe.json")
+    assert run(path, 0, True)[2] is None
+    assert records[-1][0] > SIMULATION_TIME - 10000
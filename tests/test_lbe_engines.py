@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from coexistanceSimpy.Coexistence import (Config, Config_NR, HEAP_ENGINE, SIMPY_ENGINE, VECTOR_ENGINE, simulate,
+                                          simulate_seeds)
+
+NODE_ARRAYS = ["airtime_data", "airtime_control", "succeeded_transmissions", "failed_transmissions",
+               "airtime_data_NR", "airtime_control_NR", "succeeded_transmissions_NR", "failed_transmissions_NR"]
+
+
+def assert_same_result(result, expected):
+    for attribute in NODE_ARRAYS:
+        np.testing.assert_array_equal(getattr(result, attribute), getattr(expected, attribute), err_msg=attribute)
+    np.testing.assert_array_equal(result.backoffs.counts, expected.backoffs.counts)
+
+
+@pytest.mark.parametrize("number_of_stations, number_of_gnb", [(1, 0), (0, 1), (1, 1), (3, 2), (4, 4)])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_heap_engine_matches_simpy(number_of_stations, number_of_gnb, seed):
+    arguments = (Config(), Config_NR(), number_of_stations, number_of_gnb, seed, 1)
+    assert_same_result(simulate(*arguments, engine=HEAP_ENGINE), simulate(*arguments, engine=SIMPY_ENGINE))
+
+
+def test_heap_engine_matches_simpy_with_other_parameters():
+    config = Config(cw_min=31, cw_max=255, r_limit=5, mcs=5)
+    config_nr = Config_NR(max_sync_slot_desync=500, M=2, cw_min=31, cw_max=255, mcot=8)
+    arguments = (config, config_nr, 3, 3, 7, 1)
+    assert_same_result(simulate(*arguments, engine=HEAP_ENGINE), simulate(*arguments, engine=SIMPY_ENGINE))
+
+
+@pytest.mark.parametrize("number_of_stations, number_of_gnb", [(1, 0), (0, 1), (1, 1), (3, 2), (4, 4)])
+def test_vector_engine_matches_simpy_for_every_seed(number_of_stations, number_of_gnb):
+    seeds = [1, 2, 3, 4]
+    results = simulate_seeds(Config(), Config_NR(), number_of_stations, number_of_gnb, seeds, 1, VECTOR_ENGINE)
+    assert [result.seed for result in results] == seeds
+    for seed, result in zip(seeds, results):
+        assert_same_result(result, simulate(Config(), Config_NR(), number_of_stations, number_of_gnb, seed, 1,
+                                            SIMPY_ENGINE))
+
+
+def test_vector_engine_matches_simpy_with_other_parameters():
+    config = Config(cw_min=31, cw_max=255, r_limit=5, mcs=5)
+    config_nr = Config_NR(max_sync_slot_desync=500, M=2, cw_min=31, cw_max=255, mcot=8)
+    results = simulate_seeds(config, config_nr, 3, 3, [7, 8], 1, VECTOR_ENGINE)
+    for seed, result in zip([7, 8], results):
+        assert_same_result(result, simulate(config, config_nr, 3, 3, seed, 1, SIMPY_ENGINE))
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+import math
+
+import pytest
+
+from coexistanceSimpy import simulation_runner
+from coexistanceSimpy.precision import PrecisionTarget, ci_half_width
+from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json, get_station_list_from_json_lists
+
+RESULT_KEYS = ["station_name", "air_time", "cot", "normalized_cot", "ffp", "normalized_ffp", "normalized_air_time",
+               "successful_transmissions", "failed_transmissions", "fbe_version", "fairness", "summary_air_time",
+               "offset"]
+
+
+def test_ci_half_width():
+    assert ci_half_width([1.0]) == math.inf
+    assert ci_half_width([2.0, 2.0, 2.0]) == 0
+    # t(0.975, 3) = 3.182, sample std of 1..4 = 1.291
+    assert ci_half_width([1.0, 2.0, 3.0, 4.0]) == pytest.approx(3.182 * 1.291 / 2, rel=1e-3)
+
+
+def test_invalid_run_limits_are_rejected():
+    with pytest.raises(ValueError):
+        PrecisionTarget(["kpi"], 0.01, min_runs=1)
+    with pytest.raises(ValueError):
+        PrecisionTarget(["kpi"], 0.01, min_runs=5, max_runs=4)
+
+
+def test_point_converges_when_every_kpi_reaches_the_target():
+    precision = PrecisionTarget(["a", "b"], 0.05, min_runs=3)
+    for a, b in [(1.0, 5.0), (1.01, 5.0), (0.99, 5.0)]:
+        assert not precision.converged("point")
+        precision.add("point", {"a": a, "b": b})
+    assert precision.runs("point") == 3
+    assert precision.converged("point") and precision.reached("point")
+    precision.add("other", {"a": 1.0, "b": 1.0})
+    precision.add("other", {"a": 3.0, "b": 1.0})
+    precision.add("other", {"a": 2.0, "b": 1.0})
+    assert not precision.converged("other")
+    assert not precision.all_converged()
+
+
+def test_kpi_with_zero_mean_needs_the_absolute_width():
+    values = [0.001, -0.001, 0.0, 0.0005, -0.0005]
+    relative = PrecisionTarget(["p"], 0.05, max_runs=10)
+    absolute = PrecisionTarget(["p"], 0.05, max_runs=10, absolute_half_width=0.01)
+    for value in values:
+        relative.add(0, {"p": value})
+        absolute.add(0, {"p": value})
+    assert not relative.converged(0)
+    assert absolute.converged(0) and absolute.reached(0)
+
+
+def test_max_runs_stops_without_reaching_the_target():
+    precision = PrecisionTarget(["a"], 0.001, max_runs=4)
+    for value in [1.0, 2.0, 3.0, 4.0]:
+        precision.add(0, {"a": value})
+    assert precision.converged(0) and not precision.reached(0)
+    assert "not reached" in precision.summary(0)
+
+
+def test_runner_adds_samples_only_to_points_which_have_not_converged(tmp_path):
+    scenario = {"FLOATING_FBE": [{"name": "Floating FBE {}", "offset": "0", "cot": "500", "ffp": "1000"}] * 2}
+    path = tmp_path / "precision.json"
+    path.write_text(json.dumps(scenario))
+    precision = PrecisionTarget(["normalized_air_time"], 0.01)
+    for _ in range(2):  # the first station of the run has converged already
+        precision.add((0, 0), {"normalized_air_time": 0.25})
+    result_dict = {key: [] for key in RESULT_KEYS}
+    with contextlib.redirect_stdout(io.StringIO()):
+        get_scenario_directly_from_json(str(path))
+        for run in range(3):
+            simulation_runner.runner(20000, get_station_list_from_json_lists([1, run]), result_dict, [], [], [],
+                                     [1, run], precision)
+    assert precision.runs((0, 0)) == 2
+    assert precision.runs((0, 1)) == 3
+    assert result_dict["station_name"] == ["Floating FBE Floating FBE 2"] * 3
+    # both stations were simulated together, the summary airtime of the rows covers both
+    for summary_air_time, air_time in zip(result_dict["summary_air_time"], result_dict["air_time"]):
+        assert summary_air_time > air_time
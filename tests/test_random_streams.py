@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import random
+
+from coexistanceSimpy.Coexistence import Config, Config_NR, SIMPY_ENGINE, simulate
+from coexistanceSimpy.random_streams import node_stream, parameter_stream
+from coexistanceSimpy.scenario_creator_helper import get_scenario_directly_from_json, get_station_list_from_json_lists
+
+
+def draws(stream, count=600):
+    # more than two blocks of pre-drawn numbers
+    return [stream.random() for _ in range(count)]
+
+
+def test_node_stream_depends_only_on_seed_and_name():
+    assert draws(node_stream(1, "Station 1")) == draws(node_stream(1, "Station 1"))
+    assert draws(node_stream(1, "Station 1")) != draws(node_stream(1, "Station 2"))
+    assert draws(node_stream(1, "Station 1")) != draws(node_stream(2, "Station 1"))
+    assert draws(node_stream([1, 0], "Gnb 1")) != draws(node_stream([1, 1], "Gnb 1"))
+
+
+def test_block_size_does_not_change_the_draws():
+    assert draws(node_stream(3, "Gnb 1", block_size=7)) == draws(node_stream(3, "Gnb 1"))
+
+
+def test_unseeded_streams_differ():
+    assert draws(node_stream(None, "Station 1")) != draws(node_stream(None, "Station 1"))
+
+
+def test_randint_is_inclusive():
+    stream = node_stream(5, "Station 1")
+    values = [stream.randint(3, 6) for _ in range(2000)]
+    assert set(values) == {3, 4, 5, 6}
+
+
+def test_parameter_stream_is_reproducible_and_not_shared_with_nodes():
+    assert draws(parameter_stream([1, 0])) == draws(parameter_stream([1, 0]))
+    assert draws(parameter_stream([1, 0])) != draws(parameter_stream([1, 1]))
+    assert draws(parameter_stream(1)) != draws(node_stream(1, ""))
+
+
+def test_random_offsets_follow_the_scenario_seed(tmp_path):
+    scenario = {"STANDARD_FBE": [{"name": "Standard FBE {}", "offset": "0..5000", "cot": "900", "ffp": "1000"}] * 3}
+    path = tmp_path / "random_offset.json"
+    path.write_text(json.dumps(scenario))
+
+    def offsets(seed):
+        with contextlib.redirect_stdout(io.StringIO()):
+            get_scenario_directly_from_json(str(path))
+            stations_list = get_station_list_from_json_lists(seed)
+        return [station.offset for stations in stations_list for station in stations]
+
+    assert offsets([7, 0]) == offsets([7, 0])
+    assert offsets([7, 0]) != offsets([7, 1])
+    assert all(0 <= offset <= 5000 for offset in offsets([7, 0]))
+
+
+def test_simulate_does_not_touch_the_global_random_state():
+    state = random.getstate()
+    simulate(Config(), Config_NR(), 2, 2, 1, 0.1, SIMPY_ENGINE)
+    assert random.getstate() == state
@@ -0,0 +1,74 @@
+import duckdb
+import pandas as pd
+import pytest
+
+from coexistanceSimpy.result_sink import (RESULT_COLUMNS, CsvResultSink, DuckDBResultSink, ParquetResultSink,
+                                          open_result_sink)
+
+
+def rows(count, first_seed=1):
+    return [[seed, 63, 0.5, 2, 2, 0.4, 0.39, 0.1, 0.4, 0.38, 0.2, 0.8, 0.77]
+            for seed in range(first_seed, first_seed + count)]
+
+
+def test_open_result_sink_selects_the_back_end_by_extension(tmp_path):
+    assert isinstance(open_result_sink(str(tmp_path / "a.csv")), CsvResultSink)
+    assert isinstance(open_result_sink(str(tmp_path / "a.parquet")), ParquetResultSink)
+    sink = open_result_sink(str(tmp_path / "a.duckdb"))
+    assert isinstance(sink, DuckDBResultSink)
+    sink.close()
+
+
+def test_csv_rows_are_written_in_batches_under_one_header(tmp_path):
+    path = tmp_path / "results.csv"
+    with CsvResultSink(str(path), batch_size=2) as sink:
+        for row in rows(3):
+            sink.add(row)
+        assert len(pd.read_csv(path)) == 2  # the last row is still buffered
+    with CsvResultSink(str(path)) as sink:
+        for row in rows(2, first_seed=4):
+            sink.add(row)
+    results = pd.read_csv(path)
+    assert list(results.columns) == RESULT_COLUMNS
+    assert results["Seed"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_csv_with_another_header_is_rejected(tmp_path):
+    path = tmp_path / "output_test.csv"
+    path.write_text("Seed,WiFi,Gnb,ChannelOccupancyWiFi\n1,2,2,0.4\n")
+    with pytest.raises(ValueError):
+        CsvResultSink(str(path))
+    assert path.read_text() == "Seed,WiFi,Gnb,ChannelOccupancyWiFi\n1,2,2,0.4\n"
+
+
+def test_csv_header_is_checked_by_every_write(tmp_path):
+    path = tmp_path / "results.csv"
+    sink = CsvResultSink(str(path))
+    path.write_text("Seed,WiFi\n")  # written by someone else after the sink was created
+    sink.add(rows(1)[0])
+    with pytest.raises(ValueError):
+        sink.close()
+
+
+def test_parquet_parts(tmp_path):
+    path = tmp_path / "results.parquet"
+    with ParquetResultSink(str(path), batch_size=2) as sink:
+        for row in rows(5):
+            sink.add(row)
+    assert len(list(path.glob("*.parquet"))) == 3
+    results = duckdb.query(f"SELECT * FROM '{path}/*.parquet' ORDER BY Seed").df()
+    assert list(results.columns) == RESULT_COLUMNS
+    assert results["Seed"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_duckdb_table(tmp_path):
+    path = str(tmp_path / "results.duckdb")
+    for first_seed in [1, 4]:
+        with DuckDBResultSink(path, batch_size=2) as sink:
+            for row in rows(3, first_seed):
+                sink.add(row)
+    connection = duckdb.connect(path)
+    results = connection.execute("SELECT * FROM results ORDER BY Seed").df()
+    connection.close()
+    assert list(results.columns) == RESULT_COLUMNS
+    assert results["Seed"].tolist() == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from coexistanceSimpy import Coexistence
+from coexistanceSimpy.checkpoint import checkpoint_path, resume_simulation, save_checkpoint
+from coexistanceSimpy.Coexistence import (Config, Config_NR, HEAP_ENGINE, SIMPY_ENGINE, report_result, simulate,
+                                          simulation_channel)
+from coexistanceSimpy.heap_engine import HeapSimulation
+
+
+def test_simulate_has_no_side_effects(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    result = simulate(Config(), Config_NR(), 2, 1, 1, 0.5, SIMPY_ENGINE)
+    assert capsys.readouterr().out == ""
+    assert list(tmp_path.iterdir()) == []
+    assert result.number_of_stations == 2 and result.number_of_gnb == 1
+    assert result.resumed_from is None
+    assert 0 < result.channel_occupancy_all <= 1
+
+
+def test_checkpointed_run_resumes_silently_with_the_same_result(tmp_path, capsys):
+    config, config_nr = Config(), Config_NR()
+    arguments = (config, config_nr, 2, 2, 3, 0.5, False)
+    channel = simulation_channel(config, config_nr, 2, 2, 0.5)
+    simulation = HeapSimulation(2, 2, 3, config, config_nr, channel)
+    simulation.run(200000)
+    path = checkpoint_path(str(tmp_path), 2, 2, 3)
+    save_checkpoint(path, arguments, 0.1, simulation)
+
+    result = simulate(config, config_nr, 2, 2, 3, 0.5, HEAP_ENGINE, False, str(tmp_path), 0.1)
+    assert capsys.readouterr().out == ""
+    assert result.resumed_from == 0.2
+    assert list(tmp_path.iterdir()) == []  # the checkpoint is removed at the end of the run
+    expected = simulate(config, config_nr, 2, 2, 3, 0.5, HEAP_ENGINE)
+    np.testing.assert_array_equal(result.airtime_data, expected.airtime_data)
+    np.testing.assert_array_equal(result.succeeded_transmissions_NR, expected.succeeded_transmissions_NR)
+
+
+def test_report_result_prints_and_appends_the_row(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(Coexistence, "output_csv", str(tmp_path / "results.csv"))
+    result = simulate(Config(), Config_NR(), 1, 1, 1, 0.2, HEAP_ENGINE)
+    result.resumed_from = 0.1
+    report_result(result)
+    out = capsys.readouterr().out
+    assert out.startswith("Resumed N_stations:=1 N_gNB:=1 SEED = 1 from 0.1 s")
+    assert "fairness:" in out
+    assert len((tmp_path / "results.csv").read_text().splitlines()) == 2
+
+
+@pytest.mark.parametrize("interval", [0, -0.1])
+def test_non_positive_checkpoint_interval_is_rejected(tmp_path, interval):
+    with pytest.raises(ValueError):
+        simulate(Config(), Config_NR(), 1, 1, 1, 0.2, HEAP_ENGINE, False, str(tmp_path), interval)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resume_with_non_positive_interval_is_rejected(tmp_path):
+    config, config_nr = Config(), Config_NR()
+    simulation = HeapSimulation(1, 1, 1, config, config_nr, simulation_channel(config, config_nr, 1, 1, 0.2))
+    path = checkpoint_path(str(tmp_path), 1, 1, 1)
+    save_checkpoint(path, (config, config_nr, 1, 1, 1, 0.2, False), 0.1, simulation)
+    with pytest.raises(ValueError):
+        resume_simulation(path, 0)
+    assert [str(file) for file in tmp_path.iterdir()] == [path]  # the checkpoint is kept
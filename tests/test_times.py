@@ -0,0 +1,23 @@
+import dataclasses
+
+import pytest
+
+from coexistanceSimpy.Coexistence import Config_NR, FBETimers
+from coexistanceSimpy.Times import seconds_to_ticks, ticks_to_seconds, to_ticks
+
+
+def test_durations_are_whole_us_ticks():
+    assert to_ticks(16) == 16 and isinstance(to_ticks(16.0), int)
+    assert seconds_to_ticks(0.5) == 500000
+    assert ticks_to_seconds(200000) == 0.2
+    with pytest.raises(ValueError):
+        to_ticks(9.5, "observation_slot_duration")
+    with pytest.raises(ValueError):
+        FBETimers(1000, 900.5)
+
+
+def test_replacing_a_config_keeps_its_durations():
+    config = Config_NR(deter_period=16.0, synchronization_slot_duration=500)
+    replaced = dataclasses.replace(config, cw_max=1023)
+    assert (replaced.deter_period, replaced.synchronization_slot_duration) == (16, 500)
+    assert replaced.transmission_time == config.transmission_time == 6000
@@ -432,6 +432,83 @@ def coexistence_gap_pcol():
     plt.savefig('val/coex/coexistence_gap_1023_pcol.svg')
 
 
+def valid_analytic(path='val/coex/coex5g_coexistence_gap_63.csv', tolerance=0.05):
+    # compares simulated points (rows of the results file, Wi-Fi and NR-U with the same cw max) with the analytic model
+    from coexistanceSimpy.Coexistence import Config, Config_NR
+    from coexistanceSimpy.analytic import analytic_estimate
+
+    viridis(0.0, 1.0, 4)
+
+    coex5g = pd.read_csv(path, delimiter=',')
+    kpis = {'PcolWifi': 'p_coll', 'ChannelOccupancyWiFi': 'channel_occupancy', 'PcolNR': 'p_coll_NR',
+            'ChannelOccupancyNR': 'channel_occupancy_NR'}
+    simulated = coex5g.groupby(['WiFi', 'Gnb', 'CwMax'])[list(kpis)].mean()
+
+    rows = []
+    for (wifi, gnb, cw_max), values in simulated.iterrows():
+        estimate = analytic_estimate(Config(cw_max=cw_max), Config_NR(cw_max=cw_max), wifi, gnb)
+        rows.append({'WiFi': wifi, 'Gnb': gnb, 'CwMax': cw_max,
+                     **{column: values[column] for column in kpis},
+                     **{column + 'Analytic': getattr(estimate, attribute) for column, attribute in kpis.items()}})
+    comparison = pd.DataFrame(rows)
+    for column in kpis:
+        comparison[column + 'Error'] = (comparison[column + 'Analytic'] - comparison[column]).abs()
+
+    print(comparison.to_string())
+    errors = comparison[[column + 'Error' for column in kpis]].max()
+    print(errors)
+    outliers = errors[errors > tolerance]
+    if len(outliers):
+        print(f"Analytic model differs from {path} by more than {tolerance}: {dict(outliers)}")
+
+    ax = comparison.plot(x='Gnb', y='ChannelOccupancyNR', marker="o", ylim=(0, 1))
+    comparison.plot(x='WiFi', y='ChannelOccupancyWiFi', marker="o", ylim=(0, 1), ax=ax)
+    comparison.plot(x='Gnb', y='ChannelOccupancyNRAnalytic', marker="x", linestyle='--', ylim=(0, 1), ax=ax)
+    comparison.plot(x='WiFi', y='ChannelOccupancyWiFiAnalytic', marker="x", linestyle='--', ylim=(0, 1), ax=ax)
+
+    ax.legend(['5G-Coex-SimPy NR-U cot', '5G-Coex-SimPy Wi-Fi cot', 'Analytic NR-U cot', 'Analytic Wi-Fi cot'])
+    ax.set_xlabel('Number of gNBs/stations', fontsize=14)
+    ax.set_ylabel('Channel occupation time', fontsize=14)
+
+    plt.tight_layout()
+    plt.savefig(path.rsplit('.', 1)[0] + '_analytic.svg')
+    return comparison
+
+
+def valid_vector_engine(node_numbers=(1, 2, 4, 8, 16), seeds=range(1, 11), simulation_time=10.0, alpha=0.01):
+    # the vector engine against the SimPy engine: runs of the same seed have to be equal, and KPI samples of independent
+    # seeds (the SimPy engine with seeds shifted by 1000) must not differ significantly (Welch's t-test)
+    from coexistanceSimpy.Coexistence import Config, Config_NR, simulate, simulate_seeds, VECTOR_ENGINE
+
+    kpis = ['p_coll', 'channel_occupancy', 'p_coll_NR', 'channel_occupancy_NR', 'fairness']
+    seeds = list(seeds)
+    rows = []
+    for node_number in node_numbers:
+        vector = simulate_seeds(Config(), Config_NR(), node_number, node_number, seeds, simulation_time, VECTOR_ENGINE)
+        same_seeds = [simulate(Config(), Config_NR(), node_number, node_number, seed, simulation_time)
+                      for seed in seeds]
+        other_seeds = [simulate(Config(), Config_NR(), node_number, node_number, seed + 1000, simulation_time)
+                       for seed in seeds]
+        for kpi in kpis:
+            vector_values = np.array([getattr(result, kpi) for result in vector])
+            simpy_values = np.array([getattr(result, kpi) for result in other_seeds])
+            p_value = st.ttest_ind(vector_values, simpy_values, equal_var=False).pvalue \
+                if vector_values.std() + simpy_values.std() > 0 else 1.0
+            rows.append({'Nodes': node_number, 'KPI': kpi, 'Vector': vector_values.mean(),
+                         'SimPy': simpy_values.mean(), 'PValue': p_value,
+                         'SameSeedsEqual': all(getattr(a, kpi) == getattr(b, kpi)
+                                               for a, b in zip(vector, same_seeds))})
+    comparison = pd.DataFrame(rows)
+    print(comparison.to_string())
+    different = comparison[~comparison['SameSeedsEqual']]
+    if len(different):
+        print(f"Vector engine results differ from the SimPy engine with the same seed: {different[['Nodes', 'KPI']]}")
+    significant = comparison[comparison['PValue'] < alpha]
+    if len(significant):
+        print(f"KPIs differing significantly at {alpha}: {significant[['Nodes', 'KPI', 'PValue']]}")
+    return comparison
+
+
 if __name__ == "__main__":
     # valid_wifi()
     # valid_nru()